@@ -1,25 +1,55 @@
 # app/__init__.py
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from .startup import StartupProfile
+
+import importlib
 from datetime import datetime, timedelta
 from flask import Flask, request, redirect, url_for
 from config import Config
 from .extensions import db, login_manager, migrate
-from .models import Debate, Topic, Vote, User
+from .models import User
+from . import compression, metrics, profiling, user_cache
+from .sockets import SocketIO, register_handlers
 from flask_login import current_user
-from datetime import datetime
-from flask_socketio import SocketIO
 
 socketio = SocketIO()  # Create the SocketIO object globally
 
+_IMPORT_FINISHED = time.perf_counter()
+
+# (module, blueprint attribute) in registration order
+BLUEPRINTS = (
+    ("auth", "auth_bp"),
+    ("main", "main_bp"),
+    ("admin", "admin_bp"),
+    ("debate", "debate_bp"),
+    ("profile", "profile_bp"),
+    ("analytics", "analytics_bp"),
+    ("tournament", "tournament_bp"),
+)
+
+
 def create_app(config_file=None):
+    profile = StartupProfile()
+    profile.add("import app package", _IMPORT_FINISHED - _IMPORT_STARTED)
+
     app = Flask(__name__)
 
-    # Load configuration
-    app.config.from_object(Config)
-    if config_file:
-        app.config.from_pyfile(config_file)
+    with profile.step("configuration"):
+        app.config.from_object(Config)
+        if config_file:
+            app.config.from_pyfile(config_file)
 
     # Initialize SocketIO with CORS options
-    socketio.init_app(app, cors_allowed_origins=app.config['CORS_ALLOWED_ORIGINS'])
+    with profile.step("socketio"):
+        socketio.init_app(
+            app,
+            cors_allowed_origins=app.config['CORS_ALLOWED_ORIGINS'],
+            async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+        )
+        register_handlers(socketio)
 
     # Enable a 'startswith' test in our Jinja templates
     app.jinja_env.tests['startswith'] = lambda val, prefix: (
@@ -27,31 +57,28 @@ def create_app(config_file=None):
     )
 
     # Initialize extensions
-    db.init_app(app)
-    login_manager.init_app(app)
-    migrate.init_app(app, db)
-
-    # Register blueprints (to be implemented in the next steps)
-    from .auth import auth_bp
-    from .main import main_bp
-    from .admin import admin_bp
-    from .debate import debate_bp
-    from .profile import profile_bp
-    from .analytics import analytics_bp
-
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(main_bp)
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(debate_bp)
-    app.register_blueprint(profile_bp)
-    app.register_blueprint(analytics_bp)
-    
-    print(app.url_map)
-    
+    with profile.step("extensions"):
+        db.init_app(app)
+        login_manager.init_app(app)
+        migrate.init_app(app, db)
+        compression.init_app(app)
+        profiling.init_app(app)
+        metrics.init_app(app)
+
+    for module, attr in BLUEPRINTS:
+        with profile.step(f"import app.{module}"):
+            blueprint = getattr(importlib.import_module(f".{module}", __name__), attr)
+        with profile.step(f"register {blueprint.name}"):
+            app.register_blueprint(blueprint)
+
+    from .commands import register_commands
+
+    register_commands(app)
+
     @app.before_request
     def require_login():
         # These endpoints do NOT require login:
-        open_routes = ['auth.login', 'auth.register', 'auth.forgot_password', 'auth.reset_password', 'auth.confirm_email', 'main.privacy', 'static']
+        open_routes = ['auth.login', 'auth.register', 'auth.forgot_password', 'auth.reset_password', 'auth.confirm_email', 'main.privacy', 'admin.metrics', 'static']
         # If the user is NOT authenticated and is not on a public page
         if (not current_user.is_authenticated
             and request.endpoint not in open_routes
@@ -62,37 +89,20 @@ def create_app(config_file=None):
     def update_last_seen():
         # Only for authenticated users, and not for static/assets
         if current_user.is_authenticated and not request.path.startswith('/static'):
-            current_user.last_seen = datetime.utcnow()
-            db.session.commit()
-            
-            # --- WebSocket live update for active debates ---
-            open_debates = Debate.query.filter_by(active=True).all()
+            # last_seen only feeds the "seen within" filter of the admin user
+            # list; who is online comes from the open sockets (app.presence).
+            # Refreshing it once per LAST_SEEN_INTERVAL keeps requests from
+            # writing the user row every time.
             now = datetime.utcnow()
-            ten_minutes_ago = now - timedelta(minutes=10)
-
-            active_user_ids = set(
-                u.id for u in User.query.filter(User.last_seen >= ten_minutes_ago).all()
+            last_seen = current_user.last_seen
+            interval = timedelta(seconds=app.config['LAST_SEEN_INTERVAL'])
+            if last_seen and now - last_seen < interval:
+                return
+            User.query.filter_by(id=current_user.id).update(
+                {User.last_seen: now}, synchronize_session=False
             )
-            for debate in open_debates:
-                voted_user_ids = set(
-                    row[0]
-                    for row in db.session.query(Vote.user_id)
-                    .join(Topic)
-                    .filter(Topic.debate_id == debate.id)
-                    .distinct()
-                    .all()
-                )
-                eligible_user_ids = active_user_ids.union(voted_user_ids)
-                total_users = len(eligible_user_ids)
-                voted_users = len(voted_user_ids)
-
-                socketio.emit('vote_update', {
-                    'debate_id': debate.id,
-                    'vote_data': {
-                        'total_users': total_users,
-                        'voted_users': voted_users
-                    }
-                })
-            # --- End live update ---
+            db.session.commit()
+            user_cache.touch(current_user.id, last_seen=now)
 
+    profile.report()
     return app
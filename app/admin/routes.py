@@ -1,13 +1,39 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, abort, Response
 from flask_login import login_required, current_user
-from sqlalchemy import distinct
+from sqlalchemy import and_, distinct, func, insert, literal, or_, select, tuple_
 import itertools
-from app.models import Debate, Topic, Vote, User
+import json
+from app.models import (
+    Debate,
+    LibraryTopic,
+    Participation,
+    RunoffTopic,
+    SpeakerSlot,
+    Topic,
+    User,
+    Vote,
+    factsheet_hash,
+)
 from app.extensions import db
-from app.logic.assign import assign_dynamic, _compute_room_counts
-from app.utils import compute_winning_topic, reset_prefer_judging, reset_prefer_free
+from app.logic import languages, lifecycle
+from app.logic.assign import assign_dynamic, load_participants, _compute_room_counts
+from app.logic.topic_import import (
+    FORMATS as TOPIC_IMPORT_FORMATS,
+    TopicImportError,
+    detect_format,
+    parse_topics,
+)
+from app.utils import (
+    compute_winning_topic,
+    recount_voters,
+    runoff_topic_ids,
+    set_runoff,
+    tied_topic_ids,
+    vote_counts,
+    voting_topics,
+)
 from datetime import datetime, timedelta
-from app import socketio
+from app import live, socketio, metrics, user_cache
 
 from . import admin_bp
 
@@ -29,30 +55,64 @@ def admin_required(f):
 
 
 # Admin dashboard: list debates, option to add
+DEBATES_PER_PAGE = 20
+
+
 @admin_bp.route("/admin")
 @login_required
 @admin_required
 def admin_dashboard():
-    debates = Debate.query.all()
-    #reverse debates for better admin experience
-    debates = list(debates)[::-1]
-    # Build voter count per debate
-    voter_counts = {}
-    for debate in debates:
-        topic_ids = [t.id for t in debate.topics]
-        if topic_ids:
-            # Query for unique user_ids who voted for any topic in this debate
-            count = (
-                db.session.query(Vote.user_id)
-                .filter(Vote.topic_id.in_(topic_ids))
-                .distinct()
-                .count()
+    page = request.args.get("page", 1, type=int)
+    topic_counts = (
+        select(Topic.debate_id, func.count(Topic.id).label("n"))
+        .group_by(Topic.debate_id)
+        .subquery()
+    )
+    slot_counts = (
+        select(SpeakerSlot.debate_id, func.count(SpeakerSlot.id).label("n"))
+        .group_by(SpeakerSlot.debate_id)
+        .subquery()
+    )
+    # newest first for better admin experience
+    pagination = (
+        db.session.query(
+            Debate,
+            func.coalesce(topic_counts.c.n, 0).label("topic_count"),
+            func.coalesce(slot_counts.c.n, 0).label("slot_count"),
+        )
+        .outerjoin(topic_counts, topic_counts.c.debate_id == Debate.id)
+        .outerjoin(slot_counts, slot_counts.c.debate_id == Debate.id)
+        .order_by(Debate.id.desc())
+        .paginate(page=page, per_page=DEBATES_PER_PAGE, error_out=False)
+    )
+
+    # Topics of the listed debates with their vote counts in one query
+    debate_ids = [row.Debate.id for row in pagination.items]
+    topics = {debate_id: [] for debate_id in debate_ids}
+    runoff_debates = set()
+    if debate_ids:
+        rows = (
+            db.session.query(
+                Topic, func.count(Vote.id), RunoffTopic.topic_id.isnot(None)
             )
-        else:
-            count = 0
-        voter_counts[debate.id] = count
+            .outerjoin(Vote, Vote.topic_id == Topic.id)
+            .outerjoin(RunoffTopic, RunoffTopic.topic_id == Topic.id)
+            .filter(Topic.debate_id.in_(debate_ids))
+            .group_by(Topic.id, RunoffTopic.topic_id)
+            .order_by(Topic.id)
+            .all()
+        )
+        for topic, votes, in_runoff in rows:
+            topics[topic.debate_id].append((topic, votes))
+            if in_runoff:
+                runoff_debates.add(topic.debate_id)
+
     return render_template(
-        "admin/dashboard.html", debates=debates, voter_counts=voter_counts
+        "admin/dashboard.html",
+        debates=pagination.items,
+        pagination=pagination,
+        topics=topics,
+        runoff_debates=runoff_debates,
     )
 
 
@@ -69,11 +129,14 @@ def create_debate():
             flash("Please fill all fields correctly.", "danger")
             return redirect(url_for("admin.create_debate"))
         debate = Debate(
-            title=title, style="Dynamic", assignment_mode=assignment_mode, active=False
+            title=title,
+            style="Dynamic",
+            assignment_mode=assignment_mode,
+            active=False,
+            state=lifecycle.CREATED,
+            **lifecycle.FLAGS[lifecycle.CREATED],
         )
         db.session.add(debate)
-        reset_prefer_free()
-        reset_prefer_judging()
         db.session.commit()
         flash("Debate created!", "success")
         return redirect(url_for("admin.admin_dashboard"))
@@ -95,35 +158,42 @@ def add_topic(debate_id):
         topic = Topic(text=text, factsheet=factsheet, debate_id=debate_id)
         db.session.add(topic)
         db.session.commit()
-        socketio.emit("topic_list_update", {"debate_id": debate_id})
+        emit_topic_list(debate)
         flash("Topic added.", "success")
         return redirect(url_for("admin.admin_dashboard"))
     return render_template("admin/add_topic.html", debate=debate)
 
 
+@lifecycle.on_enter(lifecycle.VOTING, lifecycle.RUNOFF, lifecycle.CLOSED)
+def _broadcast_voting_status(change):
+    live.after_request(live.broadcast_debate_status, change)
+
+
+@lifecycle.on_enter(lifecycle.ASSIGNED)
+def _broadcast_assignments(change):
+    live.after_request(live.broadcast_assignments, change.debate_id)
+
+
 # Toggle voting
 @admin_bp.route("/admin/<int:debate_id>/toggle_voting")
 @login_required
 @admin_required
 def toggle_voting(debate_id):
     debate = Debate.query.get_or_404(debate_id)
-    debate.voting_open = not debate.voting_open
-    if not debate.voting_open:
-        if debate.second_voting_open:
-            debate.second_voting_open = False
+    try:
+        if debate.state in (lifecycle.VOTING, lifecycle.RUNOFF):
+            old = lifecycle.transition(debate, lifecycle.CLOSED)
+            if old == lifecycle.VOTING:
+                # Check for tie in first round
+                set_runoff(debate.id, tied_topic_ids(debate.id))
         else:
-            # Check for tie in first round
-            votes = {t.id: len(t.votes) for t in debate.topics}
-            if votes:
-                max_votes = max(votes.values())
-                tied = [str(tid) for tid, c in votes.items() if c == max_votes]
-                if len(tied) > 1:
-                    debate.second_voting_topics = ",".join(tied)
-                else:
-                    debate.second_voting_topics = None
+            lifecycle.transition(debate, lifecycle.VOTING)
+    except lifecycle.LifecycleError as exc:
+        flash(str(exc), "danger")
+        return redirect(url_for("admin.admin_dashboard"))
     db.session.commit()
 
-    if not debate.voting_open and not debate.second_voting_open:
+    if debate.state == lifecycle.CLOSED:
         winner = compute_winning_topic(debate)
         if winner:
             socketio.emit(
@@ -133,22 +203,10 @@ def toggle_voting(debate_id):
                     "topic": {
                         "id": winner.id,
                         "text": winner.text,
-                        "factsheet": winner.factsheet,
+                        "factsheet_hash": winner.factsheet_hash,
                     },
                 },
             )
-    socketio.emit(
-        "debate_status",
-        {
-            "debate_id": debate_id,
-            "voting_open": debate.voting_open,
-            "second_voting_open": debate.second_voting_open,
-        },
-    )
-    socketio.emit(
-        "debate_list_update",
-        {"debate_id": debate_id, "voting_open": debate.voting_open},
-    )
     status = "opened" if debate.voting_open else "closed"
     flash(f"Voting {status} for {debate.title}.", "info")
     return redirect(url_for("admin.admin_dashboard"))
@@ -159,21 +217,20 @@ def toggle_voting(debate_id):
 @admin_required
 def open_second_voting(debate_id):
     debate = Debate.query.get_or_404(debate_id)
-    if not debate.second_voting_topics:
+    if not db.session.scalar(select(runoff_topic_ids(debate_id).exists())):
         flash("No tie detected.", "warning")
         return redirect(url_for("admin.admin_dashboard"))
-    debate.voting_open = True
-    debate.second_voting_open = True
+    try:
+        lifecycle.transition(debate, lifecycle.RUNOFF)
+    except lifecycle.LifecycleError as exc:
+        flash(str(exc), "danger")
+        return redirect(url_for("admin.admin_dashboard"))
     topic_ids = db.session.query(Topic.id).filter(Topic.debate_id == debate_id)
     Vote.query.filter(Vote.round == 2, Vote.topic_id.in_(topic_ids)).delete(
         synchronize_session=False
     )
+    recount_voters(debate_id)
     db.session.commit()
-    socketio.emit(
-        "debate_status",
-        {"debate_id": debate_id, "voting_open": True, "second_voting_open": True},
-    )
-    socketio.emit("debate_list_update", {"debate_id": debate_id, "voting_open": True})
     flash("Second voting opened.", "info")
     return redirect(url_for("admin.admin_dashboard"))
 
@@ -186,9 +243,7 @@ def toggle_active(debate_id):
     debate = Debate.query.get_or_404(debate_id)
     debate.active = not debate.active
     db.session.commit()
-    socketio.emit(
-        "debate_list_update", {"debate_id": debate_id, "active": debate.active}
-    )
+    live.broadcast_debate_lists()
     status = "activated" if debate.active else "deactivated"
     flash(f"Debate {status}.", "info")
     return redirect(url_for("admin.admin_dashboard"))
@@ -198,31 +253,8 @@ def toggle_active(debate_id):
 @login_required
 @admin_required
 def vote_stats(debate_id):
-    now = datetime.utcnow()
-    ten_minutes_ago = now - timedelta(minutes=10)
-
-    # Get IDs of recently active users
-    active_user_ids = set(
-        u.id for u in User.query.filter(User.last_seen >= ten_minutes_ago).all()
-    )
-
-    # Get IDs of users who have voted in this debate
-    voted_user_ids = set(
-        row[0]
-        for row in db.session.query(Vote.user_id)
-        .join(Topic)
-        .filter(Topic.debate_id == debate_id)
-        .distinct()
-        .all()
-    )
-
-    # Union: all users who are either active or have voted
-    eligible_user_ids = active_user_ids.union(voted_user_ids)
-
-    total_users = len(eligible_user_ids)
-    voted_users = len(voted_user_ids)
-
-    return jsonify({"total_users": total_users, "voted_users": voted_users})
+    debate = Debate.query.get_or_404(debate_id)
+    return jsonify(vote_counts(debate))
 
 
 # Edit debate
@@ -269,7 +301,7 @@ def edit_topic(topic_id):
             topic.text = text
             topic.factsheet = factsheet
             db.session.commit()
-            socketio.emit("topic_list_update", {"debate_id": topic.debate_id})
+            emit_topic_list(topic.debate)
             flash("Topic updated.", "success")
             return redirect(url_for("admin.admin_dashboard"))
         flash("Invalid input.", "danger")
@@ -282,21 +314,352 @@ def edit_topic(topic_id):
 @admin_required
 def delete_topic(topic_id):
     topic = Topic.query.get_or_404(topic_id)
+    debate = topic.debate
     db.session.delete(topic)
+    db.session.flush()
+    recount_voters(debate.id)
     db.session.commit()
-    socketio.emit("topic_list_update", {"debate_id": topic.debate_id})
+    emit_topic_list(debate)
     flash("Topic deleted.", "info")
     return redirect(url_for("admin.admin_dashboard"))
 
 
+def emit_topic_list(debate):
+    """Broadcast the debate's current topic list so clients need not refetch it."""
+    socketio.emit(
+        "topic_list_update", {"debate_id": debate.id, "topics": voting_topics(debate)}
+    )
+
+
+def _import_source():
+    """Return ``(content, filename, format)`` of an import request."""
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        if isinstance(data.get("topics"), list):
+            return json.dumps(data["topics"]), None, "json"
+        return data.get("content") or "", None, data.get("format")
+    upload = request.files.get("file")
+    if upload and upload.filename:
+        try:
+            content = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise TopicImportError("The file must be UTF-8 encoded text.")
+        return content, upload.filename, request.form.get("format")
+    return request.form.get("content") or "", None, request.form.get("format")
+
+
+def _import_options():
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        raw_ids = data.get("library_ids") or []
+        save = bool(data.get("save_to_library"))
+    else:
+        raw_ids = request.form.getlist("library_ids")
+        save = bool(request.form.get("save_to_library"))
+    try:
+        library_ids = sorted({int(lid) for lid in raw_ids})
+    except (TypeError, ValueError):
+        raise TopicImportError("Invalid library selection.")
+    return library_ids, save
+
+
+def import_topic_rows(debate, rows, library_ids=(), save_to_library=False):
+    """Insert parsed ``rows`` and library topics into ``debate``; returns the count.
+
+    Parsed topics go in with one multi-row INSERT, library topics with one
+    INSERT ... SELECT so their factsheets never leave the database. Topics
+    the debate already has (same text, ignoring case) are skipped.
+    """
+    existing = {
+        text.lower()
+        for text in db.session.scalars(
+            select(Topic.text).where(Topic.debate_id == debate.id)
+        )
+    }
+    rows = [
+        dict(r, factsheet_hash=factsheet_hash(r["factsheet"]))
+        for r in rows
+        if r["text"].lower() not in existing
+    ]
+    imported = 0
+    if rows:
+        db.session.execute(
+            insert(Topic).values([dict(r, debate_id=debate.id) for r in rows])
+        )
+        imported += len(rows)
+    if library_ids:
+        taken = select(func.lower(Topic.text)).where(Topic.debate_id == debate.id)
+        result = db.session.execute(
+            insert(Topic).from_select(
+                ["text", "factsheet", "factsheet_hash", "debate_id"],
+                select(
+                    LibraryTopic.text,
+                    LibraryTopic.factsheet,
+                    LibraryTopic.factsheet_hash,
+                    literal(debate.id),
+                ).where(
+                    LibraryTopic.id.in_(library_ids),
+                    func.lower(LibraryTopic.text).not_in(taken),
+                ),
+            )
+        )
+        imported += result.rowcount
+    if save_to_library and rows:
+        known = set(
+            db.session.scalars(
+                select(LibraryTopic.text).where(
+                    LibraryTopic.text.in_([r["text"] for r in rows])
+                )
+            )
+        )
+        new = [r for r in rows if r["text"] not in known]
+        if new:
+            db.session.execute(insert(LibraryTopic).values(new))
+    return imported
+
+
+# Bulk import topics from CSV/JSON/Markdown and/or the topic library
+@admin_bp.route("/admin/<int:debate_id>/import_topics", methods=["GET", "POST"])
+@login_required
+@admin_required
+def import_topics(debate_id):
+    debate = Debate.query.get_or_404(debate_id)
+    if request.method == "GET":
+        library = db.session.execute(
+            select(LibraryTopic.id, LibraryTopic.text).order_by(LibraryTopic.text)
+        ).all()
+        return render_template(
+            "admin/import_topics.html",
+            debate=debate,
+            library=library,
+            formats=TOPIC_IMPORT_FORMATS,
+        )
+
+    try:
+        content, filename, fmt = _import_source()
+        library_ids, save_to_library = _import_options()
+        rows = []
+        if content.strip():
+            rows = parse_topics(content, fmt or detect_format(filename, content))
+        elif not library_ids:
+            raise TopicImportError("Nothing to import.")
+    except TopicImportError as exc:
+        if request.is_json:
+            return jsonify({"success": False, "message": str(exc)}), 400
+        flash(str(exc), "danger")
+        return redirect(url_for("admin.import_topics", debate_id=debate_id))
+
+    imported = import_topic_rows(debate, rows, library_ids, save_to_library)
+    db.session.commit()
+    if imported:
+        emit_topic_list(debate)
+
+    if request.is_json:
+        return jsonify({"success": True, "imported": imported})
+    flash(f"Imported {imported} topics.", "success" if imported else "info")
+    return redirect(url_for("admin.admin_dashboard"))
+
+
+LIBRARY_PER_PAGE = 50
+
+
+@admin_bp.route("/admin/topic_library")
+@login_required
+@admin_required
+def topic_library():
+    page = request.args.get("page", 1, type=int)
+    pagination = LibraryTopic.query.order_by(LibraryTopic.text).paginate(
+        page=page, per_page=LIBRARY_PER_PAGE, error_out=False
+    )
+    return render_template("admin/topic_library.html", pagination=pagination)
+
+
+@admin_bp.route("/admin/topic_library/<int:topic_id>/delete", methods=["POST"])
+@login_required
+@admin_required
+def delete_library_topic(topic_id):
+    topic = LibraryTopic.query.get_or_404(topic_id)
+    db.session.delete(topic)
+    db.session.commit()
+    flash("Topic removed from the library.", "info")
+    return redirect(url_for("admin.topic_library"))
+
+
+DEBATE_SKILLS = ["First Timer", "Beginner", "Intermediate", "Advanced", "Expert"]
+JUDGE_SKILLS = ["Suspended", "Cant judge", "Newbie", "Wing", "Trainee", "Chair"]
+USERS_PER_PAGE = 50
+MAX_USERS_PER_PAGE = 200
+PENDING_PER_PAGE = 50
+USER_FILTERS = ("q", "judge_skill", "debate_skill", "seen_within", "admin", "per_page")
+
+
+def _prefix_match(column, prefix):
+    """Case-insensitive ``column LIKE 'prefix%'`` as a range on lower(column).
+
+    Written as a range so the lower() expression indexes can serve it.
+    """
+    lowered = func.lower(column)
+    return and_(lowered >= prefix, lowered < prefix + "\uffff")
+
+
+def search_users(args):
+    """Return ``(users, next_cursor)`` for the admin user list filters.
+
+    Filters: ``q`` (name or email prefix, "first last" matches both names),
+    ``judge_skill``, ``debate_skill``, ``seen_within`` (days), ``admin``
+    ("1"/"0"). Users are ordered by name and paged by keyset: ``after`` is the
+    id of the last user on the previous page, so deep pages cost the same as
+    the first one.
+    """
+    query = User.query
+    term = (args.get("q") or "").strip().lower()
+    if term:
+        first, _, last = term.partition(" ")
+        if last.strip():
+            query = query.filter(
+                _prefix_match(User.first_name, first),
+                _prefix_match(User.last_name, last.strip()),
+            )
+        else:
+            query = query.filter(
+                or_(
+                    _prefix_match(User.first_name, term),
+                    _prefix_match(User.last_name, term),
+                    _prefix_match(User.email, term),
+                )
+            )
+    if args.get("judge_skill"):
+        query = query.filter(User.judge_skill == args["judge_skill"])
+    if args.get("debate_skill"):
+        query = query.filter(User.debate_skill == args["debate_skill"])
+    seen_within = args.get("seen_within", type=int)
+    if seen_within:
+        query = query.filter(
+            User.last_seen >= datetime.utcnow() - timedelta(days=seen_within)
+        )
+    if args.get("admin") == "1":
+        query = query.filter(User.is_admin.is_(True))
+    elif args.get("admin") == "0":
+        query = query.filter(or_(User.is_admin.is_(False), User.is_admin.is_(None)))
+
+    sort_key = func.lower(User.first_name)
+    after = args.get("after", type=int)
+    if after:
+        # compare against the key as the database lowercases it
+        anchor = (
+            db.session.query(sort_key).filter(User.id == after).scalar_subquery()
+        )
+        query = query.filter(tuple_(sort_key, User.id) > tuple_(anchor, after))
+
+    # 0, negative or unparsable sizes fall back to the default page
+    per_page = args.get("per_page", USERS_PER_PAGE, type=int) or USERS_PER_PAGE
+    per_page = max(1, min(per_page, MAX_USERS_PER_PAGE))
+    users = query.order_by(sort_key, User.id).limit(per_page + 1).all()
+    next_cursor = None
+    if len(users) > per_page:
+        users = users[:per_page]
+        next_cursor = users[-1].id
+    return users, next_cursor
+
+
+def user_json(user):
+    return {
+        "id": user.id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "is_admin": bool(user.is_admin),
+        "debate_skill": user.debate_skill,
+        "judge_skill": user.judge_skill,
+        "debate_count": user.debate_count or 0,
+        "last_seen": user.last_seen.isoformat() if user.last_seen else None,
+        "opd_skill": user.opd_skill,
+        "elo_rating": user.elo_rating,
+        "elo_sigma": user.elo_sigma,
+    }
+
+
 @admin_bp.route("/admin/users")
 @login_required
 @admin_required
 def manage_users():
-    from app.models import User
+    users, next_cursor = search_users(request.args)
+    filters = {k: request.args[k] for k in USER_FILTERS if request.args.get(k)}
+    return render_template(
+        "admin/users.html",
+        users=users,
+        next_cursor=next_cursor,
+        filters=filters,
+        paged=bool(request.args.get("after")),
+        debate_skills=DEBATE_SKILLS,
+        judge_skills=JUDGE_SKILLS,
+    )
+
+
+@admin_bp.route("/admin/api/users")
+@login_required
+@admin_required
+def users_json():
+    users, next_cursor = search_users(request.args)
+    return jsonify(
+        {"users": [user_json(u) for u in users], "next_cursor": next_cursor}
+    )
+
+
+@admin_bp.route("/admin/users/bulk_edit", methods=["POST"])
+@login_required
+@admin_required
+def bulk_edit_users():
+    """Set judge and/or debate skill for many users in one UPDATE.
+
+    Accepts the user list form (``user_ids`` checkboxes) or JSON
+    ``{"user_ids": [...], "judge_skill": ..., "debate_skill": ...}``.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        raw_ids = data.get("user_ids") or []
+    else:
+        data = request.form
+        raw_ids = request.form.getlist("user_ids")
+    try:
+        user_ids = sorted({int(uid) for uid in raw_ids})
+    except (TypeError, ValueError):
+        user_ids = []
+
+    changes = {}
+    error = None
+    if data.get("judge_skill"):
+        if data["judge_skill"] in JUDGE_SKILLS:
+            changes[User.judge_skill] = data["judge_skill"]
+        else:
+            error = "Unknown judge skill."
+    if data.get("debate_skill"):
+        if data["debate_skill"] in DEBATE_SKILLS:
+            changes[User.debate_skill] = data["debate_skill"]
+        else:
+            error = "Unknown debate skill."
+    if not error and not user_ids:
+        error = "No users selected."
+    if not error and not changes:
+        error = "Nothing to change."
+
+    if error:
+        if request.is_json:
+            return jsonify({"success": False, "message": error}), 400
+        flash(error, "danger")
+        return redirect(request.referrer or url_for("admin.manage_users"))
+
+    updated = User.query.filter(User.id.in_(user_ids)).update(
+        changes, synchronize_session=False
+    )
+    db.session.commit()
+    for uid in user_ids:
+        user_cache.invalidate(uid)
 
-    users = User.query.all()
-    return render_template("admin/users.html", users=users)
+    if request.is_json:
+        return jsonify({"success": True, "updated": updated})
+    flash(f"Updated {updated} users.", "success")
+    return redirect(request.referrer or url_for("admin.manage_users"))
 
 
 @admin_bp.route("/admin/pending_users")
@@ -305,8 +668,15 @@ def manage_users():
 def manage_pending_users():
     from app.models import PendingUser
 
-    pending = PendingUser.query.all()
-    return render_template("admin/pending_users.html", pending_users=pending)
+    page = request.args.get("page", 1, type=int)
+    pagination = PendingUser.query.order_by(
+        PendingUser.created_at.desc(), PendingUser.id.desc()
+    ).paginate(page=page, per_page=PENDING_PER_PAGE, error_out=False)
+    return render_template(
+        "admin/pending_users.html",
+        pending_users=pagination.items,
+        pagination=pagination,
+    )
 
 
 @admin_bp.route("/admin/pending_users/<int:pending_id>/confirm", methods=["POST"])
@@ -386,43 +756,34 @@ def edit_user(user_id):
 
 @admin_bp.route("/admin/<int:debate_id>/assign", methods=["POST"])
 @login_required
+@metrics.ASSIGN_DURATION.timed
 def run_assign(debate_id):
     if not current_user.is_admin:
         flash("Admin rights required.", "danger")
         return redirect(url_for("main.dashboard"))
 
-    from app.models import Debate, User
+    from app.models import Debate
 
     debate = Debate.query.get_or_404(debate_id)
-    # Option: Only assign users who registered or are eligible
-    # Subquery: all topic IDs for this debate
-    topic_ids_subq = (
-        db.session.query(Topic.id).filter(Topic.debate_id == debate.id).subquery()
-    )
-
-    # Main query: all users who have a vote on one of these topics
-    users = (
-        User.query.join(Vote, User.id == Vote.user_id)
-        .filter(Vote.topic_id.in_(topic_ids_subq))
-        .distinct()
-        .all()
-    )
+    if not lifecycle.can_transition(debate, lifecycle.ASSIGNED):
+        flash(f"Rooms cannot be assigned while the debate is {debate.state}.", "danger")
+        return redirect(url_for("admin.admin_dashboard"))
+    # Everyone who voted, as a detached participant table: the engine never
+    # touches User rows, so commits cannot expire and reload them
+    participants = load_participants(debate)
 
     # Clean up previous assignments for this debate if re-running
     from app.models import SpeakerSlot
 
     SpeakerSlot.query.filter_by(debate_id=debate.id).delete()
-    db.session.commit()
 
     scenario = request.form.get("scenario")
     mode = request.form.get("assignment_mode")
     if mode:
         debate.assignment_mode = mode
-        db.session.commit()
-    ok, msg = assign_dynamic(debate, users, scenario=scenario)
+    db.session.commit()
+    ok, msg = assign_dynamic(debate, participants, scenario=scenario)
     flash(msg, "success" if ok else "danger")
-    if ok:
-        socketio.emit("assignments_ready", {"debate_id": debate_id})
     return redirect(url_for("admin.admin_dashboard"))
 
 
@@ -432,17 +793,16 @@ def run_assign(debate_id):
 @admin_required
 def dynamic_plan(debate_id):
     debate = Debate.query.get_or_404(debate_id)
-    if debate.voting_open:
+    if debate.state in (lifecycle.VOTING, lifecycle.RUNOFF):
         flash("Voting must be closed before planning rooms.", "warning")
         return redirect(url_for("admin.admin_dashboard"))
 
-    topic_ids_subq = (
-        db.session.query(Topic.id).filter(Topic.debate_id == debate.id).subquery()
-    )
     users = (
-        User.query.join(Vote, User.id == Vote.user_id)
-        .filter(Vote.topic_id.in_(topic_ids_subq))
-        .distinct()
+        User.query.join(Participation, Participation.user_id == User.id)
+        .filter(
+            Participation.debate_id == debate.id,
+            Participation.checked_in_at.isnot(None),
+        )
         .all()
     )
 
@@ -466,6 +826,10 @@ def dynamic_plan(debate_id):
 
     fallback_chair_count = sum(1 for u in users if eligible_chair(u))
 
+    masks = [u.language_mask or 0 for u in users]
+    chair_masks = [u.language_mask or 0 for u in users if u.judge_skill == "Chair"]
+    shared_language = languages.common_language(masks)
+
     scenarios = []
     room_types = {"O": ("OPD", 7, 12), "B": ("BP", 9, 11)}
     
@@ -501,21 +865,45 @@ def dynamic_plan(debate_id):
             desc = " + ".join(room_types[c][0] for c in combo)
             if not safe:
                 desc += " (unsafe - using fallback Chairs)"
+            # a language per room if everyone can be seated in one they speak
+            if shared_language is not None:
+                room_langs = [shared_language] * len(counts)
+            else:
+                room_langs = languages.room_languages(counts, masks, chair_masks)
             breakdown = []
-            for c, count in zip(combo, counts):
+            for i, (c, count) in enumerate(zip(combo, counts)):
                 if c == "O":
-                    breakdown.append(opd_breakdown(count))
+                    item = opd_breakdown(count)
                 else:
-                    breakdown.append(bp_breakdown(count))
+                    item = bp_breakdown(count)
+                if room_langs is not None:
+                    item += f", {languages.LANGUAGES[room_langs[i]]}"
+                breakdown.append(item)
             scenarios.append(
                 {
                     "id": "-".join(c for c in combo),
                     "desc": desc,
                     "safe": safe,
+                    "languages_ok": room_langs is not None,
                     "breakdown": breakdown,
                 }
             )
+    # scenarios keeping every room in one language first
+    scenarios.sort(key=lambda sc: not sc["languages_ok"])
 
     return render_template(
         "admin/dynamic_plan.html", debate=debate, groups=groups, scenarios=scenarios
     )
+
+
+# Prometheus scrape target, open to configured scrapers and admins
+@admin_bp.route("/metrics", endpoint="metrics")
+def metrics_endpoint():
+    if not metrics.scraper_allowed() and not (
+        current_user.is_authenticated and getattr(current_user, "is_admin", False)
+    ):
+        abort(403)
+    return Response(
+        metrics.render(metrics.collect()),
+        mimetype="text/plain; version=0.0.4",
+    )
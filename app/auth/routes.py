@@ -1,18 +1,19 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime
 from app.extensions import db, login_manager
 from app.models import User, PendingUser
 from app.models import apply_skills
 from app.utils import send_email, generate_token, confirm_token
+from app.passwords import hash_password, verify_password, needs_rehash
+from app import user_cache
 
 from . import auth_bp 
 
 # For Flask-Login: user loader
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(int(user_id))
 
 # Register route
 @auth_bp.route('/register', methods=['GET', 'POST'])
@@ -35,7 +36,7 @@ def register():
         if password != password2:
             flash('Passwords do not match.')
             return redirect(url_for('auth.register'))
-        hashed_pw = generate_password_hash(password)
+        hashed_pw = hash_password(password)
         pending = PendingUser(first_name=first_name, last_name=last_name, email=email, password=hashed_pw)
         db.session.add(pending)
         db.session.commit()
@@ -55,7 +56,11 @@ def login():
         email = request.form['email']
         password = request.form['password']
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user.password, password):
+            # upgrade hashes made with older work factors while we know the password
+            if needs_rehash(user.password):
+                user.password = hash_password(password)
+                db.session.commit()
             login_user(user)
             flash('Logged in successfully.')
             return redirect(url_for('main.dashboard'))
@@ -95,7 +100,7 @@ def reset_password(token):
         if password != password2:
             flash('Passwords do not match.', 'danger')
             return render_template('auth/reset_password.html')
-        user.password = generate_password_hash(password)
+        user.password = hash_password(password)
         db.session.commit()
         flash('Password updated. You can now log in.', 'success')
         return redirect(url_for('auth.login'))
@@ -0,0 +1,50 @@
+# app/commands.py
+"""One-off maintenance commands, run explicitly instead of on every start.
+
+    flask --app run init-db
+    flask --app run create-admin --email admin@example.com --password ...
+"""
+
+import click
+
+from .extensions import db
+from .models import User
+
+
+@click.command("init-db")
+def init_db_command():
+    """Create missing tables (use ``flask db upgrade`` for migrations)."""
+    db.create_all()
+    click.echo("Database tables created.")
+
+
+@click.command("create-admin")
+@click.option("--email", default="admin@example.com", show_default=True)
+@click.option("--password", default="admin123", show_default=True)
+@click.option("--first-name", default="Admin", show_default=True)
+@click.option("--last-name", default="User", show_default=True)
+def create_admin_command(email, password, first_name, last_name):
+    """Create an admin account unless one already exists."""
+    from .passwords import hash_password
+
+    if User.query.filter_by(is_admin=True).first():
+        click.echo("Admin user already exists.")
+        return
+    if User.query.filter_by(email=email).first():
+        click.echo("Admin email already exists, skipping admin creation.")
+        return
+    admin = User(
+        first_name=first_name,
+        last_name=last_name,
+        email=email,
+        password=hash_password(password),
+        is_admin=True,
+    )
+    db.session.add(admin)
+    db.session.commit()
+    click.echo(f"Admin user created: {email}")
+
+
+def register_commands(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(create_admin_command)
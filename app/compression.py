@@ -0,0 +1,76 @@
+# app/compression.py
+"""Compress text and JSON responses with brotli or gzip.
+
+The encoding is negotiated from ``Accept-Encoding``: brotli when the client
+accepts it and the optional ``brotli`` package is installed, gzip otherwise.
+Responses under ``COMPRESS_MIN_SIZE`` bytes, streamed or file responses and
+responses that already carry a ``Content-Encoding`` are left alone.
+"""
+
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+BROTLI_QUALITY = 5
+
+
+def choose_encoding(accept_encodings):
+    """Return ``"br"``, ``"gzip"`` or None for an ``Accept-Encoding`` header."""
+    gzip_q = accept_encodings.quality("gzip")
+    if brotli is not None:
+        br_q = accept_encodings.quality("br")
+        if br_q and br_q >= gzip_q:
+            return "br"
+    return "gzip" if gzip_q else None
+
+
+def _compressible(response):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _compress_response(response):
+    if not _compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config.get("COMPRESS_MIN_SIZE", 500):
+        return response
+
+    if encoding == "br":
+        data = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        data = gzip.compress(
+            data, compresslevel=current_app.config.get("COMPRESS_LEVEL", 6), mtime=0
+        )
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    # the bytes differ per encoding, so a strong validator becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Register the compression hook; call first so it runs after all others."""
+    app.after_request(_compress_response)
@@ -1,7 +1,20 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import (
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_from_directory,
+    url_for,
+)
 from flask_login import login_required, current_user
 from app.extensions import db
+from app.logic import feedback, history, lifecycle
 from app.logic.elo import compute_bp_elo
+from app.logic.scores import ScoreError, parse_value, room_channel, save_cells
+from app.logic.sync import SyncError, apply_ops
+from app import metrics, socketio, user_cache
 from . import debate_bp
 from app.models import (
     Debate,
@@ -49,35 +62,6 @@ def sort_participants(slots, room_id):
     return judges, speakers
 
 
-def update_wing_status(wing_id):
-    """Evaluate wing judge feedback and adjust judge_skill if relevant."""
-    feedback_values = session.get("feedback", {})
-    judge_user = User.query.filter_by(id=str(wing_id)).first()
-    prev_skill = judge_user.judge_skill
-    individual_feedback = feedback_values.get(str(wing_id))
-
-    # user is upgraded in status if the previous status was Newbie or Can't Judge (the second option should be rare, as the prioritization in picking wing judges is 1. Wing 2. Newbie 3. Can't Judge 3.5 Chair and 4. Suspended)
-    if individual_feedback == "positive":
-        if prev_skill == "Newbie":
-            User.query.filter_by(id=str(wing_id)).update(
-                {User.judge_skill: "Wing"}, synchronize_session=False
-            )
-        elif prev_skill == "Cant judge":
-            User.query.filter_by(id=str(wing_id)).update(
-                {User.judge_skill: "Newbie"}, synchronize_session=False
-            )
-    # user is downgraded in status if the previous status was Newbie or Wing (this serves as a feedback mechanism to existing Wings too)
-    elif individual_feedback == "negative":
-        if prev_skill == "Newbie":
-            User.query.filter_by(id=str(wing_id)).update(
-                {User.judge_skill: "Suspended"}, synchronize_session=False
-            )
-        elif prev_skill == "Wing":
-            User.query.filter_by(id=str(wing_id)).update(
-                {User.judge_skill: "Newbie"}, synchronize_session=False
-            )
-
-
 def update_elo_opd(speaker, debate_id, judge_ids):
     avg = (
         db.session.query(db.func.avg(Score.value))
@@ -170,38 +154,30 @@ def judging(debate_id):
     judge_ids = [j.user_id for j in judges]
 
     if request.method == "POST":
-        Score.query.filter(
-            Score.debate_id == debate_id,
-            Score.speaker_id.in_(speaker_ids),
-            Score.judge_id.in_(judge_ids),
-        ).delete(synchronize_session=False)
-        for sp in speakers:
-            for j in judges:
-                key = f"score_{sp.id}_{j.id}"
-                val = request.form.get(key)
-                if val:
-                    db.session.add(
-                        Score(
-                            debate_id=debate_id,
-                            speaker_id=sp.user_id,
-                            judge_id=j.user_id,
-                            value=int(val),
-                        )
-                    )
+        try:
+            cells = {
+                (sp.user_id, j.user_id): parse_value(request.form.get(f"score_{sp.id}_{j.id}"))
+                for sp in speakers
+                for j in judges
+            }
+        except ScoreError as exc:
+            flash(str(exc), "danger")
+            return redirect(url_for("debate.judging", debate_id=debate_id, room_id=room))
+        save_cells(debate_id, cells)
+        feedback.save(
+            debate_id,
+            current_user.id,
+            {
+                j.user_id: request.form.get(f"feedback_{j.user_id}")
+                for j in judges
+                if j != chair_slot
+            },
+        )
         db.session.commit()
+        _broadcast_scores(debate_id, room, cells)
         flash("Scores saved.", "success")
-        feedback = {}
-
-        for j in judges:
-            if j != chair_slot:
-                key = f"feedback_{j.user_id}"
-                values = request.form.getlist(key)
-                feedback[j.user_id] = values[0] if values else None
-        session["feedback"] = feedback
-
         return redirect(url_for("debate.judging", debate_id=debate_id, room_id=room))
 
-    feedback = session.get("feedback", {})
     scores = {
         (s.speaker_id, s.judge_id): s.value
         for s in Score.query.filter(
@@ -218,18 +194,141 @@ def judging(debate_id):
         judges=judges,
         speakers=speakers,
         scores=scores,
-        feedback=feedback,
+        feedback=feedback.ratings(debate_id, judge_ids),
+    )
+
+
+def _broadcast_scores(debate_id, room, cells):
+    """Show saved cells to everyone watching the room's score matrix."""
+    socketio.emit(
+        "score_update",
+        {
+            "debate_id": debate_id,
+            "room": room,
+            "scores": [
+                {"speaker_id": s, "judge_id": j, "value": v} for (s, j), v in cells.items()
+            ],
+        },
+        to=room_channel(debate_id, room),
     )
 
 
+@debate_bp.route("/debate/<int:debate_id>/scores", methods=["PATCH"])
+@login_required
+def patch_scores(debate_id):
+    """Autosave the OPD score cells that changed on the judging page.
+
+    Takes ``{"scores": [{"speaker_id", "judge_id", "value"}, ...]}`` with
+    user ids; a ``null`` value clears the cell.
+    """
+    debate = Debate.query.get_or_404(debate_id)
+    if not debate.active:
+        return jsonify({"success": False, "message": "This debate is inactive."}), 409
+    chair_slot = get_chair_slot(current_user, debate_id)
+    if not chair_slot:
+        return (
+            jsonify({"success": False, "message": "Only the chair judge can enter scores."}),
+            403,
+        )
+    room = chair_slot.room
+    judges, speakers = sort_participants(
+        SpeakerSlot.query.filter_by(debate_id=debate_id, room=room).all(), room
+    )
+    speaker_ids = {sp.user_id for sp in speakers}
+    judge_ids = {j.user_id for j in judges}
+
+    data = request.get_json(silent=True) or {}
+    cells = {}
+    try:
+        for cell in data.get("scores") or []:
+            key = (int(cell["speaker_id"]), int(cell["judge_id"]))
+            if key[0] not in speaker_ids or key[1] not in judge_ids:
+                raise ScoreError("This cell is not part of your room.")
+            cells[key] = parse_value(cell.get("value"))
+    except ScoreError as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"success": False, "message": "Invalid scores."}), 400
+
+    save_cells(debate_id, cells)
+    db.session.commit()
+    if cells:
+        _broadcast_scores(debate_id, room, cells)
+    return jsonify({"success": True, "saved": len(cells)})
+
+
+@debate_bp.route("/debate/<int:debate_id>/sync", methods=["POST"])
+@login_required
+def sync(debate_id):
+    """Apply the judging changes a chair queued, possibly while offline.
+
+    Takes ``{"ops": [...]}`` as described in :mod:`app.logic.sync` and
+    answers with the ids the client may drop from its queue.
+    """
+    debate = Debate.query.get_or_404(debate_id)
+    if not debate.active:
+        return jsonify({"success": False, "message": "This debate is inactive."}), 409
+    chair_slot = get_chair_slot(current_user, debate_id)
+    if not chair_slot:
+        return (
+            jsonify({"success": False, "message": "Only the chair judge can enter results."}),
+            403,
+        )
+    room = chair_slot.room
+    judges, speakers = sort_participants(
+        SpeakerSlot.query.filter_by(debate_id=debate_id, room=room).all(), room
+    )
+    data = request.get_json(silent=True) or {}
+    try:
+        result = apply_ops(
+            debate_id,
+            current_user.id,
+            {sp.user_id for sp in speakers},
+            {j.user_id for j in judges},
+            data.get("ops"),
+        )
+    except SyncError as exc:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(exc)}), 400
+    db.session.commit()
+    if result.cells:
+        _broadcast_scores(debate_id, room, result.cells)
+    return jsonify(
+        {
+            "success": True,
+            "acked": result.applied
+            + result.duplicates
+            + [op_id for op_id, _ in result.rejected if op_id is not None],
+            "applied": len(result.applied),
+            "duplicates": len(result.duplicates),
+            "rejected": [{"id": op_id, "message": msg} for op_id, msg in result.rejected],
+        }
+    )
+
+
+@debate_bp.route("/judging-sw.js")
+def judging_service_worker():
+    """Service worker of the judging pages, served from the site root."""
+    response = send_from_directory(
+        current_app.static_folder, "js/judging-sw.js", mimetype="application/javascript"
+    )
+    # browsers check for a new worker on every visit
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @debate_bp.route("/debate/<int:debate_id>/finalize/<int:room_id>", methods=["POST"])
 @login_required
+@metrics.FINALIZE_DURATION.timed
 def finalize(debate_id, room_id):
     """Finalize a debate and record results/Elo."""
     debate = Debate.query.get_or_404(debate_id)
     if not debate.active:
         flash("This debate is inactive.", "warning")
         return redirect(url_for("main.debate_view", debate_id=debate_id))
+    if debate.state not in (lifecycle.ASSIGNED, lifecycle.RUNNING):
+        flash(f"This debate cannot be finalized while it is {debate.state}.", "warning")
+        return redirect(url_for("main.debate_view", debate_id=debate_id))
     chair_slot = get_chair_slot(current_user, debate_id)
     if not chair_slot:
         flash("Only the chair judge can finalize this debate.", "danger")
@@ -249,10 +348,10 @@ def finalize(debate_id, room_id):
     speaker_ids = [sp.user_id for sp in speakers]
     judge_ids = [j.user_id for j in judges]
 
-    #might evaluate empty feedback for the chair judge, which will just get ignored
-    for j in judge_ids:
-        update_wing_status(j)
-    
+    # the chair's ratings move the wings' judge levels, all in one UPDATE
+    for user_id in feedback.apply(debate_id, judge_ids):
+        user_cache.invalidate(user_id)
+
     room_style = infer_room_style(debate.style, speakers)
 
     if room_style == "OPD":
@@ -290,11 +389,16 @@ def finalize(debate_id, room_id):
             )
             processed_users.add(slot.user_id)
 
+    # who met whom, so later assignments avoid repeat partners and chairs
+    history.record_room(debate_id, judges + speakers)
+
     debate.finalized_rooms = debate.finalized_rooms + 1
 
     #finalize will also close the debate if all judges have finalized their rooms (exactly once)
     if debate.rooms == debate.finalized_rooms:
-        debate.active = False
+        lifecycle.transition(debate, lifecycle.FINALIZED)
+    else:
+        lifecycle.transition(debate, lifecycle.RUNNING)
 
     db.session.commit()
     
@@ -0,0 +1,423 @@
+# app/live.py
+"""Push-only dashboard state over Socket.IO.
+
+A dashboard connects with ``auth={"snapshot": true}`` and receives a
+``snapshot`` event holding everything it shows for the current debate: the
+debate lists, the topics up for vote, the user's votes and the room
+assignments. From then on every change arrives as an event, votes are cast
+with the ``vote`` event and its acknowledgement carries the new vote status,
+so a client in steady state makes no HTTP requests.
+
+Broadcast events carry a ``seq`` number and the last
+``SOCKET_EVENT_LOG_SIZE`` of them are kept per process. A client that
+reconnects with the ``epoch`` and last ``seq`` it saw is sent only the events
+it missed; if the log no longer reaches back that far, or the client talks
+to another process, it gets a fresh snapshot instead.
+"""
+
+import secrets
+import threading
+from collections import deque
+
+from flask import after_this_request, current_app, has_request_context
+from flask_login import current_user
+from flask_socketio import emit, join_room
+
+from .extensions import db
+from .logic import lifecycle
+from .logic.scores import room_channel
+from .models import Debate, Participation, SpeakerSlot
+from .presence import registry, user_room
+from .utils import (
+    cast_vote,
+    compute_winning_topic,
+    vote_counts,
+    vote_status,
+    voting_topics,
+)
+
+
+class EventLog:
+    """The most recent broadcast events as ``(seq, event, data)``."""
+
+    def __init__(self, size):
+        self.epoch = secrets.token_hex(4)
+        self.seq = 0
+        self._events = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, event, data):
+        """Number ``data`` and keep it; returns the payload to emit."""
+        with self._lock:
+            self.seq += 1
+            data = dict(data, seq=self.seq)
+            self._events.append((self.seq, event, data))
+        return data
+
+    def since(self, seq):
+        """Events after ``seq``, or None if some of them are no longer kept."""
+        with self._lock:
+            if seq > self.seq:
+                return None
+            first = self._events[0][0] if self._events else self.seq + 1
+            if seq + 1 < first:
+                return None
+            return [entry for entry in self._events if entry[0] > seq]
+
+
+def event_log():
+    log = current_app.extensions.get("socket_event_log")
+    if log is None:
+        size = current_app.config.get("SOCKET_EVENT_LOG_SIZE", 256)
+        log = current_app.extensions.setdefault("socket_event_log", EventLog(size))
+    return log
+
+
+def record(event, data):
+    """Log a broadcast event for reconnecting clients; returns its payload."""
+    return event_log().append(event, data)
+
+
+# -- state ---------------------------------------------------------------------
+
+
+def debate_summary(debate):
+    return {
+        "id": debate.id,
+        "title": debate.title,
+        "style": debate.style,
+        "active": debate.active,
+        "state": debate.state,
+        "second_voting_open": debate.second_voting_open,
+    }
+
+
+def current_debate_state(debate, user):
+    """The current debate as the dashboard shows it to ``user``."""
+    counts = vote_counts(debate)
+    votes_cast, votes_total = counts["voted_users"], counts["total_users"]
+    vote_percent = int((votes_cast / votes_total) * 100) if votes_total else 0
+
+    slot = SpeakerSlot.query.filter_by(debate_id=debate.id, user_id=user.id).first()
+    user_role = (
+        (f"{slot.role} in Room {slot.room}" if slot.room else slot.role)
+        if slot
+        else None
+    )
+    winner = compute_winning_topic(debate)
+
+    return {
+        "id": debate.id,
+        "title": debate.title,
+        "style": debate.style,
+        "active": debate.active,
+        "state": debate.state,
+        "voting_open": debate.voting_open,
+        "second_voting_open": debate.second_voting_open,
+        "assignment_complete": debate.assignment_complete,
+        "user_role": user_role,
+        "is_first_timer": getattr(user, "debate_skill", "") == "First Timer",
+        "is_judge_chair": slot.role == "Judge-Chair" if slot else False,
+        "vote_percent": vote_percent,
+        "votes_cast": votes_cast,
+        "votes_total": votes_total,
+        "winner_topic": (
+            {
+                "id": winner.id,
+                "text": winner.text,
+                "factsheet_hash": winner.factsheet_hash,
+            }
+            if winner
+            else None
+        ),
+    }
+
+
+def debate_lists():
+    """The current debate and the debate lists, which are the same for everyone."""
+    debates = Debate.query.order_by(Debate.id.asc()).all()
+    current = lifecycle.current_debate(debates)
+
+    active_debates = [d for d in debates if d.active and d is not current]
+    past_debates = [d for d in debates if not d.active and d.assignment_complete]
+    upcoming_debates = [
+        d for d in debates if not d.active and not d.assignment_complete
+    ]
+    return current, {
+        "current_debate_id": current.id if current else None,
+        "active_debates": [debate_summary(d) for d in active_debates],
+        "past_debates": [debate_summary(d) for d in past_debates],
+        "upcoming_debates": [debate_summary(d) for d in upcoming_debates],
+    }
+
+
+def dashboard_state(user):
+    """The debate lists of the dashboard, in the shape of ``debates_json``."""
+    current, lists = debate_lists()
+    return dict(
+        lists,
+        current_debate=current_debate_state(current, user) if current else None,
+    )
+
+
+def assignments_state(debate):
+    """Room assignments and per-room styles, in the shape of ``assignments_json``."""
+    slots = SpeakerSlot.query.filter_by(debate_id=debate.id).all()
+    prefs = {
+        p.user_id: p for p in Participation.query.filter_by(debate_id=debate.id)
+    }
+    assignments = [
+        {
+            "role": s.role,
+            "room": s.room,
+            "user_id": s.user_id,
+            "name": f"{s.user.first_name} {s.user.last_name}",
+            "prefer_free": s.user_id in prefs and prefs[s.user_id].prefer_free,
+            "prefer_judging": s.user_id in prefs and prefs[s.user_id].prefer_judging,
+        }
+        for s in slots
+    ]
+
+    slots_by_room = {}
+    for s in slots:
+        slots_by_room.setdefault(s.room, []).append(s)
+
+    room_styles = {}
+    for room, room_slots in slots_by_room.items():
+        roles = {sl.role for sl in room_slots}
+        if roles.intersection({"OG", "OO", "CG", "CO"}):
+            room_styles[room] = "BP"
+        elif roles.intersection({"Gov", "Opp"}):
+            room_styles[room] = "OPD"
+        else:
+            room_styles[room] = debate.style
+
+    return {"assignments": assignments, "room_styles": room_styles}
+
+
+def snapshot(user):
+    """Everything the dashboard needs for ``user``, tagged with the log position."""
+    log = event_log()
+    # read the position first: an event racing the queries below is replayed
+    # rather than lost
+    state = {"epoch": log.epoch, "seq": log.seq}
+    state.update(dashboard_state(user))
+    debate = lifecycle.current_debate()
+    voting = debate is not None and debate.voting_open
+    state["topics"] = voting_topics(debate) if voting else []
+    state["vote_status"] = vote_status(debate, user.id) if voting else None
+    state["assignments"] = (
+        assignments_state(debate) if debate and debate.assignment_complete else None
+    )
+    return state
+
+
+def _sent_totals():
+    """Vote totals this process last broadcast, by debate id."""
+    return current_app.extensions.setdefault("presence_totals", {})
+
+
+def broadcast_vote_update(debate, vote_data=None):
+    vote_data = vote_data if vote_data is not None else vote_counts(debate)
+    _sent_totals()[debate.id] = vote_data
+    current_app.extensions["socketio"].emit(
+        "vote_update", {"debate_id": debate.id, "vote_data": vote_data}
+    )
+
+
+def push_presence():
+    """Broadcast the vote totals that changed since this process last sent them.
+
+    Connects and disconnects only change rows; the presence worker calls this
+    once per ``PRESENCE_INTERVAL``, so a crowd arriving costs a few queries and
+    at most one event per open debate and interval. It also carries changes made
+    through other workers to the clients of this one.
+    """
+    if not len(registry()):
+        return
+    sent = _sent_totals()
+    for debate in Debate.query.filter_by(voting_open=True).all():
+        vote_data = vote_counts(debate)
+        if sent.get(debate.id) != vote_data:
+            broadcast_vote_update(debate, vote_data)
+
+
+def _presence_loop(app):
+    interval = app.config.get("PRESENCE_INTERVAL", 2)
+    # refresh our connections a few times per TTL so none of them expires
+    heartbeat_every = max(1, int(app.config.get("PRESENCE_TTL", 90) / interval / 3))
+    ticks = 0
+    while True:
+        with app.app_context():
+            try:
+                if ticks % heartbeat_every == 0:
+                    registry().heartbeat()
+                push_presence()
+            except Exception:
+                app.logger.exception("Presence worker iteration failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        ticks += 1
+        app.extensions["socketio"].sleep(interval)
+
+
+def start_presence_worker(app):
+    """Start the presence worker for this process once."""
+    if app.extensions.get("presence_worker") or not app.config.get("PRESENCE_INTERVAL"):
+        return
+    app.extensions["presence_worker"] = app.extensions["socketio"].start_background_task(
+        _presence_loop, app
+    )
+
+
+def after_request(fn, *args):
+    """Call ``fn(*args)`` once the current request has been handled.
+
+    Lifecycle hooks run inside the commit, where the session cannot query;
+    broadcasts that carry fresh state are built at the end of the request.
+    """
+    if not has_request_context():
+        return
+
+    @after_this_request
+    def run(response):
+        fn(*args)
+        return response
+
+
+def broadcast_debate_lists():
+    """Send the debate lists; dashboards only ask for more if the current debate changed."""
+    _, lists = debate_lists()
+    current_app.extensions["socketio"].emit("debate_list_update", lists)
+
+
+def broadcast_debate_status(change):
+    """Announce a voting state change with the topics and totals of the new round."""
+    debate = db.session.get(Debate, change.debate_id)
+    current_app.extensions["socketio"].emit(
+        "debate_status",
+        {
+            "debate_id": debate.id,
+            "state": debate.state,
+            "voting_open": debate.voting_open,
+            "second_voting_open": debate.second_voting_open,
+            # nobody has voted yet in a round that starts from scratch
+            "fresh_round": change.old != lifecycle.CLOSED or change.new == lifecycle.RUNOFF,
+            "topics": voting_topics(debate) if debate.voting_open else [],
+            "vote_data": vote_counts(debate),
+        },
+    )
+    broadcast_debate_lists()
+
+
+def broadcast_assignments(debate_id):
+    """Send the rooms of a debate; every user finds their own slot in them."""
+    debate = db.session.get(Debate, debate_id)
+    current_app.extensions["socketio"].emit(
+        "assignments_ready",
+        {
+            "debate_id": debate.id,
+            "state": debate.state,
+            "assignment_complete": debate.assignment_complete,
+            "assignments": assignments_state(debate),
+        },
+    )
+
+
+def emit_to_user(user_id, event, data):
+    """Push ``event`` to every open connection of one user."""
+    current_app.extensions["socketio"].emit(event, data, to=user_room(user_id))
+
+
+def push_vote_status(debate, user_id):
+    """Bring all tabs of a user up to date after they voted."""
+    emit_to_user(
+        user_id,
+        "vote_status",
+        dict(vote_status(debate, user_id), debate_id=debate.id),
+    )
+
+
+# -- handlers ------------------------------------------------------------------
+
+
+def on_connect(auth):
+    """Send a snapshot or the missed events to an authenticated client."""
+    if not isinstance(auth, dict) or not auth.get("snapshot"):
+        return None
+    log = event_log()
+    missed = None
+    if auth.get("epoch") == log.epoch:
+        try:
+            missed = log.since(int(auth.get("seq")))
+        except (TypeError, ValueError):
+            missed = None
+    if missed is None:
+        emit("snapshot", snapshot(current_user))
+    else:
+        for _, event, data in missed:
+            emit(event, data)
+    return None
+
+
+def on_snapshot(data=None):
+    if not current_user.is_authenticated:
+        return None
+    return snapshot(current_user)
+
+
+def on_vote(data):
+    """Cast a vote; the acknowledgement carries the user's new vote status."""
+    if not current_user.is_authenticated:
+        return {"success": False, "message": "Please log in."}
+    try:
+        debate_id = int(data["debate_id"])
+        topic_id = int(data["topic_id"])
+    except (KeyError, TypeError, ValueError):
+        return {"success": False, "message": "Invalid vote."}
+    debate = db.session.get(Debate, debate_id)
+    if debate is None:
+        return {"success": False, "message": "Debate not found."}
+    success, message, _ = cast_vote(debate, current_user, topic_id)
+    if success:
+        broadcast_vote_update(debate)
+        push_vote_status(debate, current_user.id)
+    return dict(vote_status(debate, current_user.id), success=success, message=message)
+
+
+def on_vote_stats(data):
+    """Vote progress of the requested debates for the admin dashboard."""
+    if not current_user.is_authenticated or not current_user.is_admin:
+        return {}
+    ids = [int(i) for i in (data or {}).get("debate_ids", []) if str(i).isdigit()]
+    if not ids:
+        return {}
+    debates = Debate.query.filter(Debate.id.in_(ids)).all()
+    return {str(d.id): vote_counts(d) for d in debates}
+
+
+def on_watch_scores(data):
+    """Join the score matrix channel of the judge's room in a debate."""
+    if not current_user.is_authenticated:
+        return {"success": False, "message": "Please log in."}
+    try:
+        debate_id = int(data["debate_id"])
+    except (KeyError, TypeError, ValueError):
+        return {"success": False, "message": "Invalid debate."}
+    slot = SpeakerSlot.query.filter(
+        SpeakerSlot.debate_id == debate_id,
+        SpeakerSlot.user_id == current_user.id,
+        SpeakerSlot.role.startswith("Judge"),
+    ).first()
+    if slot is None:
+        return {"success": False, "message": "You do not judge this debate."}
+    join_room(room_channel(debate_id, slot.room))
+    return {"success": True, "room": slot.room}
+
+
+def register_handlers(socketio):
+    socketio.on_event("snapshot", on_snapshot)
+    socketio.on_event("vote", on_vote)
+    socketio.on_event("vote_stats", on_vote_stats)
+    socketio.on_event("watch_scores", on_watch_scores)
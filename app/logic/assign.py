@@ -1,23 +1,58 @@
 import math
 import random
+from collections import Counter, namedtuple
+from itertools import combinations
 from typing import List, Tuple
 
-from app.models import SpeakerSlot, User, Debate
+from flask import current_app
+from sqlalchemy import insert, select
+
+from app.models import Participation, SpeakerSlot, User
 from app.extensions import db
-from collections import Counter
+from app.logic import languages, lifecycle
+from app.logic.history import CooccurrenceIndex
 
 # ---------------------------------------------------------------------------
-# Helper functions
+# Participant table
 # ---------------------------------------------------------------------------
 
-_EXP_MAP = {
-    "First Timer": 0,
-    "Beginner": 1,
-    "Intermediate": 2,
-    "Advanced": 3,
-    "Expert": 4,
-}
+# The engine works on these instead of ``User`` rows: built once from a
+# column-only query, they never expire, never lazy-load and are cheap to copy
+# between the room lists. ``bp_skill``/``opd_skill`` are the ranking values
+# computed by ``app.logic.skill.SkillModel``, not the raw columns, and
+# ``languages`` is the ``User.language_mask`` bitmask.
+Participant = namedtuple(
+    "Participant",
+    (
+        "id",
+        "judge_skill",
+        "debate_skill",
+        "prefer_judging",
+        "prefer_free",
+        "bp_skill",
+        "opd_skill",
+        "languages",
+    ),
+)
+
+# One role in one room; turned into ``SpeakerSlot`` rows by ``save_slots``.
+Slot = namedtuple("Slot", "user_id role room")
+
+PARTICIPANT_COLUMNS = (
+    User.id,
+    User.judge_skill,
+    User.debate_skill,
+    Participation.prefer_judging,
+    Participation.prefer_free,
+    User.elo_rating,
+    User.elo_sigma,
+    User.opd_skill,
+    User.language_mask,
+)
 
+# ---------------------------------------------------------------------------
+# Helper functions
+# ---------------------------------------------------------------------------
 
 #helper lambdas to determine the judge_skill of a user 
 is_chair = lambda u: getattr(u, "judge_skill", "") == "Chair"
@@ -27,24 +62,84 @@ is_newbie = lambda u: getattr(u, "judge_skill", "") == "Newbie"
 is_first = lambda u: getattr(u, "judge_skill", "") == "Cant judge"
 is_suspended = lambda u: getattr(u, "judge_skill", "") == "Suspended"
 
-def _skill_for(user: User, style: str) -> float:
-    """Return a numeric skill level for a user in the given style."""
+def participants_from(users) -> List[Participant]:
+    """Detach users (``User`` objects or rows of ``PARTICIPANT_COLUMNS``).
+
+    The skills of all of them are computed in one batch by ``SkillModel``.
+    ``User`` objects carry no debate, so their preferences count as unset.
+    """
+    # numpy is only needed when rooms are assigned, keep it out of startup
+    from app.logic.skill import SkillModel, settings_from
 
-    if style == "BP":
-        sigma = getattr(user, "elo_sigma", None)
-        if sigma is not None and sigma <= 320:
-            return float(getattr(user, "elo_rating", 1000))
-        exp = _EXP_MAP.get(getattr(user, "debate_skill", "First Timer"), 0)
-        return 800 + exp * 50
+    users = list(users)
+    model = SkillModel.from_rows(users, **settings_from(current_app.config))
+    return [
+        Participant(
+            id=u.id,
+            judge_skill=u.judge_skill,
+            debate_skill=u.debate_skill,
+            prefer_judging=bool(getattr(u, "prefer_judging", False)),
+            prefer_free=bool(getattr(u, "prefer_free", False)),
+            bp_skill=bp,
+            opd_skill=opd,
+            languages=u.language_mask or 0,
+        )
+        for u, bp, opd in zip(users, model.bp.tolist(), model.opd.tolist())
+    ]
+
+
+def load_participants(debate) -> List[Participant]:
+    """Everyone checked in to ``debate``, read in one column-only query."""
+
+    rows = db.session.execute(
+        select(*PARTICIPANT_COLUMNS)
+        .select_from(User)
+        .join(Participation, Participation.user_id == User.id)
+        .where(
+            Participation.debate_id == debate.id,
+            Participation.checked_in_at.isnot(None),
+        )
+        .order_by(User.id)
+    )
+    return participants_from(rows)
 
-    # OPD
-    if getattr(user, "opd_skill", None) is not None:
-        return float(user.opd_skill)
-    exp = _EXP_MAP.get(getattr(user, "debate_skill", "First Timer"), 0)
-    return 35 + exp * 5
 
+def save_slots(debate, slots: List[Slot]):
+    """Insert the engine's slots in one statement, once per user and room."""
 
-def _overall_skill(user: User) -> float:
+    seen = set()
+    rows = []
+    for slot in slots:
+        key = (slot.user_id, slot.room)
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append(
+            {
+                "debate_id": debate.id,
+                "user_id": slot.user_id,
+                "role": slot.role,
+                "room": slot.room,
+            }
+        )
+    if rows:
+        db.session.execute(insert(SpeakerSlot), rows)
+
+
+def _skill_for(user: Participant, style: str) -> float:
+    """Return a numeric skill level for a participant in the given style."""
+
+    return user.bp_skill if style == "BP" else user.opd_skill
+
+
+def _ranked(users: List[Participant], style: str) -> List[Participant]:
+    """``users`` from strongest to weakest in ``style``; ties keep their order."""
+    from app.logic.skill import SkillModel
+
+    return [users[i] for i in SkillModel.of(users).ranking(style)]
+
+
+def _overall_skill(user: Participant) -> float:
     """Generic skill value used when style is mixed."""
 
     bp = _skill_for(user, "BP")
@@ -91,7 +186,7 @@ def _compute_room_counts(total, settings):
     return numbers
 
 
-def _balance_preferred(rooms: List[List[User]]):
+def _balance_preferred(rooms: List[List[Participant]]):
     """Evenly distribute users who prefer judging across rooms.
 
     Swaps participants between rooms so that the number of users with
@@ -151,17 +246,172 @@ def _balance_preferred(rooms: List[List[User]]):
     return rooms
 
 
+def _spread_rooms(rooms: List[List[Participant]], history, passes=3):
+    """Swap interchangeable users between rooms so fewer of them met before.
+
+    Chairs stay put and users only trade places with someone of the same
+    judging/free speaking preference, so the balance of both is kept.
+    """
+    if not history or len(rooms) < 2:
+        return rooms
+
+    def cost(user, room, without):
+        return sum(history.penalty(user.id, w.id) for w in room if w is not without)
+
+    for _ in range(passes):
+        improved = False
+        for x, y in combinations(range(len(rooms)), 2):
+            for i in range(len(rooms[x])):
+                for k in range(len(rooms[y])):
+                    u, v = rooms[x][i], rooms[y][k]
+                    if is_chair(u) or is_chair(v):
+                        continue
+                    if (u.prefer_judging, u.prefer_free) != (v.prefer_judging, v.prefer_free):
+                        continue
+                    delta = (
+                        cost(v, rooms[x], u)
+                        + cost(u, rooms[y], v)
+                        - cost(u, rooms[x], u)
+                        - cost(v, rooms[y], v)
+                    )
+                    if delta < -1e-9:
+                        rooms[x][i], rooms[y][k] = v, u
+                        improved = True
+        if not improved:
+            break
+    return rooms
+
+
+def _spread_teams(teams: List[List[Participant]], history, keep_positions=True):
+    """Swap members between teams so fewer teammates were partners before.
+
+    With ``keep_positions`` only members at the same position trade places,
+    which keeps ProAm and first timer pairings intact.
+    """
+    if not history:
+        return teams
+    teams = [list(t) for t in teams]
+
+    def cost(team):
+        return history.group_penalty([u.id for u in team])
+
+    improved = True
+    while improved:
+        improved = False
+        for i, j in combinations(range(len(teams)), 2):
+            for p in range(len(teams[i])):
+                for q in [p] if keep_positions else range(len(teams[j])):
+                    if q >= len(teams[j]):
+                        continue
+                    before = cost(teams[i]) + cost(teams[j])
+                    teams[i][p], teams[j][q] = teams[j][q], teams[i][p]
+                    if cost(teams[i]) + cost(teams[j]) < before - 1e-9:
+                        improved = True
+                    else:
+                        teams[i][p], teams[j][q] = teams[j][q], teams[i][p]
+    return teams
+
+
+def _place_chairs(pool, levels, style, rooms, fallback=True):
+    """One chair per room as a min-cost matching of candidates to rooms.
+
+    A chair costs the squared distance between their skill and the room's
+    level (``levels``, None if rooms don't differ) in standard deviations,
+    so the strongest chairs head the strongest rooms. Chairs preferring to
+    judge are picked first, those preferring to speak freely last. Without
+    enough chairs the rest is made up from the same candidates
+    ``select_chair`` would fall back to, at a prohibitive cost, and the
+    result is flagged unsafe; with ``fallback`` False it is None instead.
+    Returns ``(chairs per room, unsafe)``, None for a room nobody can head.
+    """
+    import numpy as np
+
+    from app.logic.matching import AVOID, linear_sum_assignment
+
+    candidates = [u for u in pool if is_chair(u)]
+    unsafe = len(candidates) < rooms
+    if unsafe:
+        if not fallback:
+            return None, True
+        stand_ins = [u for u in pool if is_wing(u)]
+        stand_ins += [u for u in pool if not is_chair(u) and not is_wing(u)
+                      and not is_first(u) and not is_suspended(u)]
+        candidates += stand_ins[: rooms - len(candidates)]
+
+    cost = np.zeros((len(candidates), rooms))
+    if levels is not None:
+        skills = np.array([_skill_for(u, style) for u in pool])
+        spread = skills.std() or 1.0
+        own = np.array([_skill_for(u, style) for u in candidates])
+        cost += ((own[:, None] - np.array(levels)[None, :]) / spread) ** 2
+    for row, u in enumerate(candidates):
+        if not is_chair(u):
+            cost[row] += AVOID
+        if getattr(u, "prefer_judging", False):
+            cost[row] -= 1.0
+        if getattr(u, "prefer_free", False):
+            cost[row] += 1.0
+
+    picked = [None] * rooms
+    for row, col in zip(*linear_sum_assignment(cost)):
+        picked[col] = candidates[row]
+    return picked, unsafe
+
+
+def _place_trainees(pool, rooms, counts, settings, levels, style):
+    """``(room index, trainee)`` pairs, at most one trainee per OPD room.
+
+    ``select_chair`` lets a trainee chair an OPD room of at least eight
+    with a chair as expert wing, which every room already has from
+    ``_place_chairs``. Trainees preferring to judge go first and, when
+    rooms differ in level, to the weakest rooms.
+    """
+    import numpy as np
+
+    from app.logic.matching import linear_sum_assignment
+
+    trainees = [u for u in pool if is_trainee(u)]
+    eligible = [
+        idx
+        for idx, (spec, cnt) in enumerate(zip(settings, counts))
+        if spec[0] == "OPD" and cnt >= 8 and any(is_chair(u) for u in rooms[idx])
+    ]
+    if not trainees or not eligible:
+        return []
+
+    cost = np.zeros((len(trainees), len(eligible)))
+    if levels is not None:
+        room_levels = np.array([levels[idx] for idx in eligible])
+        cost += (room_levels - room_levels.min()) / ((np.ptp(room_levels) or 1.0))
+    for row, u in enumerate(trainees):
+        if getattr(u, "prefer_judging", False):
+            cost[row] -= 1.0
+        if getattr(u, "prefer_free", False):
+            cost[row] += 1.0
+    return [
+        (eligible[col], trainees[row])
+        for row, col in zip(*linear_sum_assignment(cost))
+    ]
+
+
 def _allocate_by_mode(
-    users: List[User],
+    users: List[Participant],
     counts: List[int],
     settings: List[Tuple[str, int, int]],
     mode: str,
-) -> Tuple[List[List[User]], bool, str]:
-    """Return per-room user lists based on the assignment mode."""
+    history=None,
+) -> Tuple[List[List[Participant]], bool, str]:
+    """Return per-room user lists based on the assignment mode.
+
+    Except in "True random" mode every room is headed by one chair placed
+    by ``_place_chairs``; everybody else fills the remaining seats, so each
+    user lands in exactly one room. In "Random" mode users who met before
+    are spread over the rooms using ``history`` (a ``CooccurrenceIndex``).
+    """
     pool = list(users)
     unsafe = False
 
-    rooms: List[List[User]] = [[] for _ in counts]
+    rooms: List[List[Participant]] = [[] for _ in counts]
 
     if mode == "True random":
         random.shuffle(pool)
@@ -171,95 +421,112 @@ def _allocate_by_mode(
         rooms = _balance_preferred(rooms)
         return rooms, unsafe, ""
 
-    if mode == "Random":
-        chairs = [u for u in pool if getattr(u, "judge_skill", "") == "Chair"]
-        #might be a bit of a hybrid thing, where the other scenario can only happen in OPD mode
-        if len(chairs) < len(counts):
-            return [], True, "Not enough Chair judges"
-        random.shuffle(chairs)
-        for idx in range(len(counts)):
-            chair = chairs.pop()
-            rooms[idx].append(chair)
-            pool.remove(chair)
-        random.shuffle(pool)
-        for idx, cnt in enumerate(counts):
-            need = cnt - 1
-            rooms[idx].extend(pool[:need])
-            pool = pool[need:]
-        rooms = _balance_preferred(rooms)
-
-        return rooms, unsafe, ""
-
     # determine skill metric
     has_bp = any(spec[0] == "BP" for spec in settings)
     style = "BP" if has_bp else "OPD"
 
-    if mode == "Skill based":
-        ranked = sorted(pool, key=lambda u: _skill_for(u, style), reverse=True)
-        start_idx = 0
-        for idx, cnt in enumerate(counts):
-            rooms[idx] = ranked[start_idx : start_idx + cnt]
-            start_idx += cnt
-
-        # ensure a Chair judge in every room
-        for idx, room in enumerate(rooms):
-            if not any(is_chair(u) for u in room):
-                chair = next(
-                    (
-                        u
-                        for u in pool
-                        if is_chair(u) and u not in room
-                    ),
-                    None,
-                )
-                if chair:
-                    room[0], _ = chair, room[0]
-                    pool.remove(chair)
-                else:
-                    unsafe = True
-        rooms = _balance_preferred(rooms)
-        return rooms, unsafe, ""
+    # Skill based rooms are tiers of the ranking, ProAm rooms all get a
+    # similar mix; chairs are matched to these levels. Random has none.
+    levels = None
+    if mode in ("Skill based", "ProAm"):
+        pool = _ranked(pool, style)
+        skills = [_skill_for(u, style) for u in pool]
+        if mode == "ProAm":
+            levels = [sum(skills) / len(skills)] * len(counts)
+        else:
+            levels, start_idx = [], 0
+            for cnt in counts:
+                tier = skills[start_idx : start_idx + cnt]
+                levels.append(sum(tier) / len(tier))
+                start_idx += cnt
+    else:
+        random.shuffle(pool)
+
+    chairs, unsafe = _place_chairs(pool, levels, style, len(counts), fallback=mode != "Random")
+    if chairs is None:
+        #might be a bit of a hybrid thing, where the other scenario can only happen in OPD mode
+        return [], True, "Not enough Chair judges"
+    for idx, chair in enumerate(chairs):
+        if chair is not None:
+            rooms[idx].append(chair)
+    for idx, trainee in _place_trainees(pool, rooms, counts, settings, levels, style):
+        rooms[idx].append(trainee)
 
+    seated = {u.id for room in rooms for u in room}
+    rest = [u for u in pool if u.id not in seated]
+    free = [cnt - len(room) for cnt, room in zip(counts, rooms)]
     if mode == "ProAm":
-        ranked = sorted(pool, key=lambda u: _skill_for(u, style), reverse=True)
-        direction = 1
-        index = 0
-        for u in ranked:
-            rooms[index].append(u)
-            index += direction
-            if index >= len(rooms):
-                index = len(rooms) - 1
-                direction = -1
-            elif index < 0:
-                index = 0
-                direction = 1
-        # ensure Chair judges present
-        for idx, room in enumerate(rooms):
-            if not any(is_chair(u) for u in room):
-                chair = next(
-                    (
-                        u
-                        for u in pool
-                        if is_chair(u) and u not in room
-                    ),
-                    None,
-                )
-                if chair:
-                    room[0], _ = chair, room[0]
-                    pool.remove(chair)
-                else:
-                    unsafe = True
-        rooms = _balance_preferred(rooms)
-        return rooms, unsafe, ""
+        # snake draft over the ranking, skipping rooms that are full
+        order = list(range(len(counts)))
+        snake = order + order[::-1]
+        turn = 0
+        for u in rest:
+            while not free[snake[turn % len(snake)]]:
+                turn += 1
+            idx = snake[turn % len(snake)]
+            rooms[idx].append(u)
+            free[idx] -= 1
+            turn += 1
+    else:
+        # the ranking for Skill based, shuffled for everything else
+        for idx, need in enumerate(free):
+            rooms[idx].extend(rest[:need])
+            rest = rest[need:]
 
-    random.shuffle(pool)
-    for idx, cnt in enumerate(counts):
-        rooms[idx] = pool[:cnt]
-        pool = pool[cnt:]
     rooms = _balance_preferred(rooms)
+    if mode == "Random":
+        rooms = _spread_rooms(rooms, history)
     return rooms, unsafe, ""
 
 
+def _allocate_by_language(
+    users: List[Participant],
+    counts: List[int],
+    settings: List[Tuple[str, int, int]],
+    mode: str,
+    history=None,
+):
+    """``_allocate_by_mode`` per room language.
+
+    Picks a language for every room (see ``app.logic.languages``), splits the
+    users accordingly and allocates each language's rooms on their own.
+    Returns ``(rooms, unsafe, msg, room_languages)``; the room languages are
+    None when the rooms are mixed because no split fits, and a single shared
+    language needs no split at all.
+    """
+    masks = [u.languages for u in users]
+    shared = languages.common_language(masks)
+    if shared is not None:
+        rooms, unsafe, msg = _allocate_by_mode(users, counts, settings, mode, history)
+        return rooms, unsafe, msg, [shared] * len(counts)
+
+    chair_masks = [u.languages for u in users if is_chair(u)]
+    langs = languages.room_languages(counts, masks, chair_masks)
+    groups = langs and languages.split_by_language(users, counts, langs, is_chair)
+    if groups:
+        rooms = [None] * len(counts)
+        unsafe = False
+        for lang, group in groups.items():
+            idxs = [i for i, l in enumerate(langs) if l == lang]
+            group_rooms, group_unsafe, msg = _allocate_by_mode(
+                group,
+                [counts[i] for i in idxs],
+                [settings[i] for i in idxs],
+                mode,
+                history,
+            )
+            if msg:
+                break
+            unsafe = unsafe or group_unsafe
+            for i, room in zip(idxs, group_rooms):
+                rooms[i] = room
+        else:
+            return rooms, unsafe, "", langs
+
+    rooms, unsafe, msg = _allocate_by_mode(users, counts, settings, mode, history)
+    return rooms, unsafe, msg, None
+
+
 #checks if there is an eligible trainee and activates training_mode if that is the case (impacts selection of the first wing judge, who then should be of chair status), otherwise chair selection as usually: preferred first, chair status second, wing status third, neither suspended nor first timer fourth, not suspended last
 
 def select_chair(pool, style):
@@ -427,64 +694,40 @@ def assign_opd_single_room_true_random(debate, users, room=1):
     random.shuffle(pool)  # randomness
 
     if len(pool) < 7:
-        return False, "Need at least 7 participants (including a chair)."
+        return False, "Need at least 7 participants (including a chair).", []
 
     # If True random mode, skip chair/wing preference logic and assign purely
     # based on shuffled order
     roles = ["Gov"] * 3 + ["Opp"] * 3
     assignments = []
     chair_user = pool.pop(0)
-    assignments.append(
-        SpeakerSlot(
-            debate_id=debate.id,
-            user_id=chair_user.id,
-            role="Judge-Chair",
-            room=room,
-        )
-    )
+    assignments.append(Slot(chair_user.id, "Judge-Chair", room))
 
     main_speakers = pool[:6]
     for u, side in zip(main_speakers, roles):
-        assignments.append(
-            SpeakerSlot(debate_id=debate.id, user_id=u.id, role=side, room=room)
-        )
+        assignments.append(Slot(u.id, side, room))
     pool = pool[6:]
 
     if pool:
         wing_user = pool.pop(0)
-        assignments.append(
-            SpeakerSlot(
-                debate_id=debate.id,
-                user_id=wing_user.id,
-                role="Judge-Wing",
-                room=room,
-            )
-        )
+        assignments.append(Slot(wing_user.id, "Judge-Wing", room))
 
     free_speakers = pool[:3]
     for idx, u in enumerate(free_speakers, start=1):
-        assignments.append(
-            SpeakerSlot(
-                debate_id=debate.id, user_id=u.id, role=f"Free-{idx}", room=room
-            )
-        )
+        assignments.append(Slot(u.id, f"Free-{idx}", room))
     pool = pool[3:]
 
     for u in pool:
-        assignments.append(
-            SpeakerSlot(debate_id=debate.id, user_id=u.id, role="Judge-Wing", room=room)
-        )
+        assignments.append(Slot(u.id, "Judge-Wing", room))
 
     if integrity_check_opd(assignments):
-        db.session.bulk_save_objects(assignments)
-        db.session.commit()
-        return True, f"Room {room}: OPD assignment complete."
+        return True, f"Room {room}: OPD assignment complete.", assignments
 
     else:
-        return False, "Integrity Error"
+        return False, "Integrity Error", []
 
 
-def assign_opd_single_room(debate, users, room=1, mode="Random"):
+def assign_opd_single_room(debate, users, room=1, mode="Random", history=None):
     """
     OPD single-room assignment:
       1. Chair judge
@@ -498,7 +741,7 @@ def assign_opd_single_room(debate, users, room=1, mode="Random"):
     random.shuffle(pool)  # randomness
 
     if len(pool) < 7:
-        return False, "Need at least 7 participants (including a chair)."
+        return False, "Need at least 7 participants (including a chair).", []
 
     roles = ["Gov"] * 3 + ["Opp"] * 3
 
@@ -511,34 +754,20 @@ def assign_opd_single_room(debate, users, room=1, mode="Random"):
     chair_user, training_mode = select_chair(pool, "OPD")
 
     if not chair_user:
-        return False, "No eligible Chair judge"
+        return False, "No eligible Chair judge", []
 
     # chair_user is removed from all sets at once
     preferred, pref_free, others, pool = remove_user(
         chair_user, preferred, pref_free, others, pool
     )
 
-    assignments = [
-        SpeakerSlot(
-            debate_id=debate.id,
-            user_id=chair_user.id,
-            role="Judge-Chair",
-            room=room,
-        )
-    ]
+    assignments = [Slot(chair_user.id, "Judge-Chair", room)]
 
     # the first wing judge always exists for a pool of at least eight participants but the chair has already been removed, so 7 is the magic number here
     if len(pool) > 6:
         wing_user = select_first_wing(preferred, pref_free, others, training_mode)
         if wing_user:
-            assignments.append(
-                SpeakerSlot(
-                    debate_id=debate.id,
-                    user_id=wing_user.id,
-                    role="Judge-Wing",
-                    room=room,
-                )
-            )
+            assignments.append(Slot(wing_user.id, "Judge-Wing", room))
 
         preferred, pref_free, others, pool = remove_user(
             wing_user, preferred, pref_free, others, pool
@@ -552,14 +781,7 @@ def assign_opd_single_room(debate, users, room=1, mode="Random"):
         preferred, pref_free, others, pool = remove_user(
             j, preferred, pref_free, others, pool
         )
-        assignments.append(
-            SpeakerSlot(
-                debate_id=debate.id,
-                user_id=j.id,
-                role="Judge-Wing",
-                room=room,
-            )
-        )
+        assignments.append(Slot(j.id, "Judge-Wing", room))
 
     # ---------- 3. SIX MAIN SPEAKERS ---------------------------------------
 
@@ -570,7 +792,7 @@ def assign_opd_single_room(debate, users, room=1, mode="Random"):
         others.append(pref_free.pop(0))
 
     if mode == "ProAm":
-        ranked = sorted(others, key=lambda u: _skill_for(u, "OPD"), reverse=True)
+        ranked = _ranked(others, "OPD")
         main_speakers = []
         while len(main_speakers) < 6 and ranked:
             if ranked:
@@ -578,11 +800,11 @@ def assign_opd_single_room(debate, users, room=1, mode="Random"):
             if ranked and len(main_speakers) < 6:
                 main_speakers.append(ranked.pop())
     else:
-        main_speakers = others[:6]
+        # sides are formed so fewer speakers meet a previous partner again
+        gov, opp = _spread_teams([others[:3], others[3:6]], history, keep_positions=False)
+        main_speakers = gov + opp
         for u, side in zip(main_speakers, roles):
-            assignments.append(
-                SpeakerSlot(debate_id=debate.id, user_id=u.id, role=side, room=room)
-            )
+            assignments.append(Slot(u.id, side, room))
 
         for u in main_speakers:
             preferred, pref_free, others, pool = remove_user(
@@ -599,27 +821,21 @@ def assign_opd_single_room(debate, users, room=1, mode="Random"):
     free_speakers = set(free_speakers)
 
     for idx, u in enumerate(free_speakers, start=1):
-        assignments.append(
-            SpeakerSlot(
-                debate_id=debate.id, user_id=u.id, role=f"Free-{idx}", room=room
-            )
-        )
+        assignments.append(Slot(u.id, f"Free-{idx}", room))
         preferred, pref_free, others, pool = remove_user(
             u, preferred, pref_free, others, pool
         )
 
-    # ---------- COMMIT ------------------------------------------------------
+    # ---------- RESULT ------------------------------------------------------
 
     if integrity_check_opd(assignments):
-        db.session.bulk_save_objects(assignments)
-        db.session.commit()
-        return True, f"Room {room}: OPD assignment complete."
+        return True, f"Room {room}: OPD assignment complete.", assignments
 
     else:
-        return False, "Integrity Error"
+        return False, "Integrity Error", []
 
 
-def assign_bp_single_room(debate, users, room=1, mode="Random"):
+def assign_bp_single_room(debate, users, room=1, mode="Random", history=None):
     """
     Assigns speakers for BP format with ProAm constraint.
     1. Chair judge first (prefer 'Chair', fallback to Wing/non-First-Timer)
@@ -635,44 +851,24 @@ def assign_bp_single_room(debate, users, room=1, mode="Random"):
 
     if mode == "True random":
         if len(pool) < 9:
-            return False, "Not enough eligible debaters for BP."
+            return False, "Not enough eligible debaters for BP.", []
 
         chair_user = pool.pop(0)
-        slots = [
-            SpeakerSlot(
-                debate_id=debate.id,
-                user_id=chair_user.id,
-                role="Judge-Chair",
-                room=room,
-            )
-        ]
+        slots = [Slot(chair_user.id, "Judge-Chair", room)]
 
         speakers = pool[:8]
         for user, role in zip(speakers, bp_roles):
-            slots.append(
-                SpeakerSlot(debate_id=debate.id, user_id=user.id, role=role, room=room)
-            )
+            slots.append(Slot(user.id, role, room))
         pool = pool[8:]
 
         wings_assigned = 0
         for u in pool:
             if wings_assigned >= 3:
                 break
-            slots.append(
-                SpeakerSlot(
-                    debate_id=debate.id, user_id=u.id, role="Judge-Wing", room=room
-                )
-            )
+            slots.append(Slot(u.id, "Judge-Wing", room))
             wings_assigned += 1
 
-        for slot in slots:
-            exists = SpeakerSlot.query.filter_by(
-                debate_id=debate.id, user_id=slot.user_id, room=room
-            ).first()
-            if not exists:
-                db.session.add(slot)
-        db.session.commit()
-        return True, "BP speaker assignment complete."
+        return True, "BP speaker assignment complete.", slots
 
     # --- 1. Assign judges ---
 
@@ -684,25 +880,21 @@ def assign_bp_single_room(debate, users, room=1, mode="Random"):
     #training mode isn't really used in BP so that is ignored
     chair_user, training_mode = select_chair(pool, "BP")
     if not chair_user:
-        return False, "No eligible Chair judge"
+        return False, "No eligible Chair judge", []
     
     #there is no pref_free set in BP which is why an empty list is passed
     remove_user(chair_user, preferred, [], others, pool)
-    slots = [
-        SpeakerSlot(
-            debate_id=debate.id, user_id=chair_user.id, role="Judge-Chair", room=room
-        )
-    ]
+    slots = [Slot(chair_user.id, "Judge-Chair", room)]
 
     wings = select_wings(preferred, pool, "BP")
     for u in wings:
         remove_user(u, preferred, [], others, pool)
-        slots.append( SpeakerSlot( debate_id=debate.id, user_id=u.id, role="Judge-Wing", room=room))
+        slots.append(Slot(u.id, "Judge-Wing", room))
 
     # --- 2. Assign 8 speakers ---
     speakers = []
     if mode == "ProAm":
-        ranked = sorted(others, key=lambda u: _skill_for(u, "BP"), reverse=True)
+        ranked = _ranked(others, "BP")
         while len(speakers) < 8 and ranked:
             if ranked:
                 speakers.append(ranked.pop(0))
@@ -719,29 +911,23 @@ def assign_bp_single_room(debate, users, room=1, mode="Random"):
             speakers.append(first_timers.pop(0))
     # Final check
     if len(speakers) < 8:
-        return False, "Not enough eligible debaters for BP."
+        return False, "Not enough eligible debaters for BP.", []
 
-    # Now, group into 4 teams of 2, with ProAm enforced where possible
+    # Now, group into 4 teams of 2, with ProAm enforced where possible and
+    # as few repeat partners as the pairing allows
+    teams = _spread_teams([speakers[i : i + 2] for i in range(0, 8, 2)], history)
+    speakers = [u for team in teams for u in team]
     for user, role in zip(speakers, bp_roles):
-        slots.append(
-            SpeakerSlot(debate_id=debate.id, user_id=user.id, role=role, room=room)
-        )
+        slots.append(Slot(user.id, role, room))
     # Remove these users from pool
     for u in speakers:
         remove_user(u, preferred, [], others, pool)
 
-    # --- Commit (guaranteeing no duplicate SpeakerSlot) ---
-    for slot in slots:
-        exists = SpeakerSlot.query.filter_by(
-            debate_id=debate.id, user_id=slot.user_id, room=room
-        ).first()
-        if not exists:
-            db.session.add(slot)
-    db.session.commit()
-    return True, "BP speaker assignment complete."
+    # duplicates are dropped by save_slots
+    return True, "BP speaker assignment complete.", slots
 
 
-def fallback_heuristic(debate, users):
+def fallback_heuristic(debate, users, history=None):
     if len(users) <= 7:
         if debate.assignment_mode == "True random":
             debate.style = "OPD"
@@ -749,27 +935,27 @@ def fallback_heuristic(debate, users):
         else:
             debate.style = "OPD"
             return assign_opd_single_room(
-                debate, users, room=1, mode=debate.assignment_mode
+                debate, users, room=1, mode=debate.assignment_mode, history=history
             )
     elif len(users) <= 9:
         debate.style = "BP"
         return assign_bp_single_room(
-            debate, users, room=1, mode=debate.assignment_mode
+            debate, users, room=1, mode=debate.assignment_mode, history=history
         )
     else:
         mid = len(users) // 2
         if debate.assignment_mode == "True random":
-            ok1, msg1 = assign_opd_single_room_true_random(
+            ok1, msg1, slots1 = assign_opd_single_room_true_random(
                 debate, users[:mid], room=1
             )
         else:
-            ok1, msg1 = assign_opd_single_room(
-                debate, users[:mid], room=1, mode=debate.assignment_mode
+            ok1, msg1, slots1 = assign_opd_single_room(
+                debate, users[:mid], room=1, mode=debate.assignment_mode, history=history
             )
-        ok2, msg2 = assign_bp_single_room(
-            debate, users[mid:], room=2, mode=debate.assignment_mode
+        ok2, msg2, slots2 = assign_bp_single_room(
+            debate, users[mid:], room=2, mode=debate.assignment_mode, history=history
         )
-        return ok1 and ok2, f"Dynamic: {msg1}; {msg2}"
+        return ok1 and ok2, f"Dynamic: {msg1}; {msg2}", slots1 + slots2
 
 
 def infer_debate_style(letters):
@@ -783,14 +969,26 @@ def infer_debate_style(letters):
         return "Dynamic"
         
 def assign_dynamic(debate, users, scenario=None):
-    """Assign speakers using a selected scenario."""
+    """Assign speakers using a selected scenario.
+
+    ``users`` is the participant table from ``load_participants`` (``User``
+    rows are detached first). The rooms are planned in memory; the slots of
+    every room that passed are inserted at once and committed together with
+    the debate.
+    """
 
     users = list(users)
+    if not all(isinstance(u, Participant) for u in users):
+        users = participants_from(users)
     random.shuffle(users)
+    history = CooccurrenceIndex.load([u.id for u in users])
     
     # Fallback to old heuristic if no scenario is provided
     if not scenario:
-        return fallback_heuristic(debate, users)
+        ok, msg, slots = fallback_heuristic(debate, users, history=history)
+        save_slots(debate, slots)
+        db.session.commit()
+        return ok, msg
 
     room_types = {"O": ("OPD", 7, 12), "B": ("BP", 9, 11)}
     #special case of 13 participants, which is a larger than usual OPD room
@@ -809,8 +1007,8 @@ def assign_dynamic(debate, users, scenario=None):
         return False, "Participant count doesn't fit the selected scenario"
 
     #try to ensure that there is a user of chair skill in each room
-    rooms, unsafe, msg = _allocate_by_mode(
-        users, counts, settings, debate.assignment_mode
+    rooms, unsafe, msg, room_langs = _allocate_by_language(
+        users, counts, settings, debate.assignment_mode, history=history
     )
     if msg:
         return False, msg
@@ -820,23 +1018,35 @@ def assign_dynamic(debate, users, scenario=None):
     print("DEBUG")
     print(debate.rooms)
     messages = []
+    slots = []
     success = True
     for i, (room_users, spec) in enumerate(zip(rooms, settings), start=1):
         if spec[0] == "OPD":
-            ok, msg = assign_opd_single_room(
-                debate, room_users, room=i, mode=debate.assignment_mode
+            ok, msg, room_slots = assign_opd_single_room(
+                debate, room_users, room=i, mode=debate.assignment_mode, history=history
             )
         else:
-            ok, msg = assign_bp_single_room(
-                debate, room_users, room=i, mode=debate.assignment_mode
+            ok, msg, room_slots = assign_bp_single_room(
+                debate, room_users, room=i, mode=debate.assignment_mode, history=history
             )
         success = success and ok
         messages.append(msg)
+        slots.extend(room_slots)
 
     if unsafe:
         messages.append("Fallback Chairs were used")
+    if room_langs is None:
+        messages.append("No language split fits, rooms are mixed-language")
+    elif len(set(room_langs)) > 1:
+        messages.append(
+            "Languages: "
+            + ", ".join(
+                f"Room {i} {languages.LANGUAGES[l]}" for i, l in enumerate(room_langs, start=1)
+            )
+        )
 
+    save_slots(debate, slots)
     if success:
-        debate.assignment_complete = True
-        db.session.commit()
+        lifecycle.transition(debate, lifecycle.ASSIGNED)
+    db.session.commit()
     return success, " | ".join(messages)
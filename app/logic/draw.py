@@ -0,0 +1,264 @@
+"""Power-paired BP draws for tournaments.
+
+Teams are ranked by team points (3/2/1/0 for a first to fourth place in
+``BpRank``) and grouped four to a room from the top, so every room holds
+one bracket, topped up from the next bracket down where a bracket does not
+fill its rooms (pull-ups). Which team of a bracket goes to which of its
+rooms and positions is an assignment problem, solved with
+:func:`app.logic.matching.linear_sum_assignment` on a teams × (room,
+position) cost matrix:
+
+* ``BRACKET_WEIGHT * (points - room level)²`` keeps every team in its
+  bracket; the room level is the mean points of the four teams the plain
+  ranking puts there, so any other mix of rooms costs more.
+* A team's position count so far is added for each position, which
+  minimizes the sum of squared position counts: OG/OO/CG/CO rotate.
+
+Brackets joined by pull-ups are solved on their own, so a round is a few
+small matrices instead of one of all teams. Swing teams are drawn below
+every real team.
+"""
+
+import random
+from collections import namedtuple
+
+from sqlalchemy import case, func, insert, select
+
+from app.extensions import db
+from app.logic import lifecycle
+from app.models import (
+    BpRank,
+    Debate,
+    DrawPosition,
+    OpdResult,
+    SpeakerSlot,
+    TournamentAdjudicator,
+    TournamentTeam,
+    User,
+)
+
+POSITIONS = ("OG", "OO", "CG", "CO")
+TEAM_POINTS = {1: 3, 2: 2, 3: 1, 4: 0}
+
+# Ranking of a team after the rounds drawn so far
+Standing = namedtuple("Standing", "team_id points speaks positions")
+
+
+class DrawError(Exception):
+    """Raised when the next round cannot be drawn."""
+
+
+def standings(tournament):
+    """``{team id: Standing}`` for every team of ``tournament``.
+
+    Team points come from the ``BpRank`` of each room, speaker totals are
+    the sums of the ``OpdResult`` points finalize recorded for the team's
+    speakers, and ``positions`` counts the rounds in OG/OO/CG/CO.
+    """
+    teams = {t.id: Standing(t.id, 0, 0.0, (0, 0, 0, 0)) for t in tournament.teams}
+    points = case(
+        *((BpRank.rank == rank, pts) for rank, pts in TEAM_POINTS.items()), else_=0
+    )
+    rows = db.session.execute(
+        select(DrawPosition.team_id, DrawPosition.position, func.count(), func.sum(points))
+        .outerjoin(
+            BpRank,
+            (BpRank.debate_id == DrawPosition.debate_id)
+            & (BpRank.team == DrawPosition.position),
+        )
+        .where(DrawPosition.tournament_id == tournament.id)
+        .group_by(DrawPosition.team_id, DrawPosition.position)
+    )
+    for team_id, position, rounds, pts in rows:
+        team = teams[team_id]
+        counts = list(team.positions)
+        counts[POSITIONS.index(position)] += rounds
+        teams[team_id] = team._replace(points=team.points + (pts or 0), positions=tuple(counts))
+
+    speaks = db.session.execute(
+        select(DrawPosition.team_id, func.sum(OpdResult.points))
+        .join(SpeakerSlot, SpeakerSlot.debate_id == DrawPosition.debate_id)
+        .join(
+            OpdResult,
+            (OpdResult.debate_id == SpeakerSlot.debate_id)
+            & (OpdResult.user_id == SpeakerSlot.user_id),
+        )
+        .where(
+            DrawPosition.tournament_id == tournament.id,
+            SpeakerSlot.role == DrawPosition.position,
+        )
+        .group_by(DrawPosition.team_id)
+    )
+    for team_id, total in speaks:
+        teams[team_id] = teams[team_id]._replace(speaks=total or 0.0)
+    return teams
+
+
+def ranking(tournament, table=None):
+    """Teams that are not swings, best first by points, then speaker totals."""
+    table = table if table is not None else standings(tournament)
+    ranked = [t for t in tournament.teams if not t.swing]
+    ranked.sort(key=lambda t: (-table[t.id].points, -table[t.id].speaks, t.name))
+    return ranked
+
+
+def draw_round(teams, rng=random):
+    """Rooms for one round as tuples of four team ids in OG, OO, CG, CO order.
+
+    ``teams`` are ``(Standing, swing)`` pairs, a multiple of four, best
+    room first. Ties are broken at random with ``rng``.
+    """
+    import numpy as np
+
+    from app.logic.matching import linear_sum_assignment
+
+    if len(teams) % 4:
+        raise DrawError("A BP draw needs a multiple of four teams.")
+    teams = list(teams)
+    rng.shuffle(teams)
+    # swings form the lowest bracket
+    teams.sort(key=lambda entry: (entry[1], -entry[0].points))
+    level = np.array([-1.0 if swing else float(s.points) for s, swing in teams])
+    history = np.array([s.positions for s, _ in teams], dtype=float)
+    room_level = level.reshape(-1, 4).mean(axis=1)
+    # more than any difference in position costs of a whole bracket
+    bracket_weight = 2.0 * (history.sum() + len(teams)) + 1.0
+
+    rooms = [[None] * 4 for _ in range(len(teams) // 4)]
+    start = 0
+    while start < len(teams):
+        # extend the block while a bracket runs across a room boundary
+        end = start + 4
+        while end < len(teams) and level[end - 1] == level[end]:
+            end += 4
+        block = slice(start, end)
+        slot_rooms = np.repeat(np.arange(start // 4, end // 4), 4)
+        slot_positions = np.tile(np.arange(4), (end - start) // 4)
+        cost = bracket_weight * (level[block, None] - room_level[None, slot_rooms]) ** 2
+        cost += history[block][:, slot_positions]
+        for row, col in zip(*linear_sum_assignment(cost)):
+            rooms[slot_rooms[col]][slot_positions[col]] = teams[start + row][0].team_id
+        start = end
+    return [tuple(room) for room in rooms]
+
+
+def add_swing_teams(tournament):
+    """Add swing teams until the teams fill whole rooms; returns how many."""
+    missing = -len(tournament.teams) % 4
+    taken = {t.name for t in tournament.teams}
+    number = 0
+    for _ in range(missing):
+        number += 1
+        while f"Swing {number}" in taken:
+            number += 1
+        tournament.teams.append(TournamentTeam(name=f"Swing {number}", swing=True))
+    return missing
+
+
+def current_round(tournament):
+    return db.session.scalar(
+        select(func.max(DrawPosition.round)).where(DrawPosition.tournament_id == tournament.id)
+    ) or 0
+
+
+def generate_round(tournament, rng=random):
+    """Draw the next round of ``tournament`` and create its room debates.
+
+    Each room becomes an active BP :class:`Debate` in the assigned state
+    with the teams' speakers in their positions and adjudicators as judges:
+    the strongest chairs in the top rooms, the rest as wings. The caller
+    commits. Raises :class:`DrawError` if the tournament is over or the
+    previous round still has rooms to finalize.
+    """
+    number = current_round(tournament) + 1
+    if number > tournament.rounds:
+        raise DrawError(f"All {tournament.rounds} rounds have been drawn.")
+    if number > 1:
+        open_rooms = db.session.scalar(
+            select(func.count())
+            .select_from(DrawPosition)
+            .join(Debate, Debate.id == DrawPosition.debate_id)
+            .where(
+                DrawPosition.tournament_id == tournament.id,
+                DrawPosition.round == number - 1,
+                DrawPosition.position == POSITIONS[0],
+                Debate.state != lifecycle.FINALIZED,
+            )
+        )
+        if open_rooms:
+            raise DrawError(f"Round {number - 1} still has {open_rooms} room(s) to finalize.")
+    if len(tournament.teams) < 4:
+        raise DrawError("A tournament needs at least four teams.")
+
+    add_swing_teams(tournament)
+    db.session.flush()
+    table = standings(tournament)
+    draw = draw_round([(table[t.id], t.swing) for t in tournament.teams], rng)
+
+    # one INSERT for every room of the round, rows returned in room order
+    debates = db.session.scalars(
+        insert(Debate).returning(Debate, sort_by_parameter_order=True),
+        [
+            dict(
+                lifecycle.FLAGS[lifecycle.ASSIGNED],
+                title=f"{tournament.title} - Round {number}, Room {room}",
+                style="BP",
+                rooms=1,
+                finalized_rooms=0,
+                state=lifecycle.ASSIGNED,
+                active=True,
+            )
+            for room in range(1, len(draw) + 1)
+        ],
+    ).all()
+
+    teams = {t.id: t for t in tournament.teams}
+    positions, slots = [], []
+    for room, (debate, team_ids) in enumerate(zip(debates, draw), start=1):
+        for position, team_id in zip(POSITIONS, team_ids):
+            positions.append(
+                {
+                    "debate_id": debate.id,
+                    "position": position,
+                    "team_id": team_id,
+                    "tournament_id": tournament.id,
+                    "round": number,
+                    "room": room,
+                }
+            )
+            team = teams[team_id]
+            for user_id in {team.speaker_1_id, team.speaker_2_id} - {None}:
+                slots.append(
+                    {"debate_id": debate.id, "user_id": user_id, "role": position, "room": 1}
+                )
+    slots += _judge_slots(tournament, debates)
+    db.session.execute(insert(DrawPosition), positions)
+    if slots:
+        db.session.execute(insert(SpeakerSlot), slots)
+    return number, debates
+
+
+_JUDGE_ORDER = {"Chair": 0, "Trainee": 1, "Wing": 2, "Newbie": 3}
+
+
+def _judge_slots(tournament, debates):
+    """Chairs for the rooms from the top down, the rest dealt out as wings."""
+    speaking = {
+        uid
+        for t in tournament.teams
+        for uid in (t.speaker_1_id, t.speaker_2_id)
+        if uid is not None
+    }
+    judges = db.session.scalars(
+        select(User)
+        .join(TournamentAdjudicator, TournamentAdjudicator.user_id == User.id)
+        .where(TournamentAdjudicator.tournament_id == tournament.id)
+    ).all()
+    judges = [u for u in judges if u.id not in speaking]
+    judges.sort(key=lambda u: (_JUDGE_ORDER.get(u.judge_skill, 4), -(u.elo_rating or 0), u.id))
+    slots = []
+    for idx, user in enumerate(judges):
+        debate = debates[idx % len(debates)]
+        role = "Judge-Chair" if idx < len(debates) else "Judge-Wing"
+        slots.append({"debate_id": debate.id, "user_id": user.id, "role": role, "room": 1})
+    return slots
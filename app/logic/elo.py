@@ -1,15 +1,23 @@
 from typing import List, Dict, Tuple
-from openskill.models import PlackettLuce, PlackettLuceRating
+from functools import lru_cache
 from app.models import SpeakerSlot
 
 DEFAULT_MU = 1000.0
 DEFAULT_SIGMA = DEFAULT_MU / 3.0
 
-pl_model = PlackettLuce(mu=DEFAULT_MU, sigma=DEFAULT_SIGMA)
+
+@lru_cache(maxsize=1)
+def _pl_model():
+    # openskill is only needed when a BP debate is finalized, keep it out of startup
+    from openskill.models import PlackettLuce
+
+    return PlackettLuce(mu=DEFAULT_MU, sigma=DEFAULT_SIGMA)
 
 
 def compute_bp_elo(slots: List[SpeakerSlot], ranks: Dict[str, int]) -> List[Tuple[SpeakerSlot, float, float]]:
     """Return list of (slot, old_elo, new_elo) after rating update."""
+    from openskill.models import PlackettLuceRating
+
     teams: Dict[str, List[SpeakerSlot]] = {}
     for slot in slots:
         team = slot.role.split('-')[0]
@@ -27,7 +35,7 @@ def compute_bp_elo(slots: List[SpeakerSlot], ranks: Dict[str, int]) -> List[Tupl
         team_ratings.append(rating_team)
 
     ranks_list = [ranks.get(team, 4) for team in ordered_teams]
-    new_ratings = pl_model.rate(team_ratings, ranks=ranks_list)
+    new_ratings = _pl_model().rate(team_ratings, ranks=ranks_list)
 
     updates: List[Tuple[SpeakerSlot, float, float]] = []
     for team_idx, team in enumerate(ordered_teams):
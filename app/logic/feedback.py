@@ -0,0 +1,104 @@
+"""Chair feedback on wing judges and the judge levels it moves.
+
+The chair rates every other judge of the room on the scoring page. Ratings
+are stored as ``JudgeFeedback`` rows as soon as the page is saved, so they
+survive a change of device, and are applied when the room is finalized:
+:data:`TRANSITIONS` maps ``(rating, judge_skill)`` to the new
+``judge_skill``, and :func:`apply` moves all judges of a room with one
+``UPDATE ... SET judge_skill = CASE ...``.
+
+Positive feedback moves a judge up one step (Cant judge -> Newbie -> Wing),
+negative feedback one step down (Wing -> Newbie -> Suspended). Chairs and
+suspended judges are never moved by feedback.
+"""
+
+from sqlalchemy import case, delete, select, update
+
+from app.extensions import db
+from app.models import JudgeFeedback, User
+
+POSITIVE = "positive"
+NEUTRAL = "neutral"
+NEGATIVE = "negative"
+RATINGS = (POSITIVE, NEUTRAL, NEGATIVE)
+
+TRANSITIONS = {
+    (POSITIVE, "Cant judge"): "Newbie",
+    (POSITIVE, "Newbie"): "Wing",
+    (NEGATIVE, "Newbie"): "Suspended",
+    (NEGATIVE, "Wing"): "Newbie",
+}
+
+
+def next_skill(judge_skill, rating):
+    """The judge level after ``rating``; unchanged if no transition applies."""
+    return TRANSITIONS.get((rating, judge_skill), judge_skill)
+
+
+def ratings(debate_id, judge_ids):
+    """``{judge id: rating}`` stored for the judges in the debate."""
+    rows = db.session.execute(
+        select(JudgeFeedback.judge_id, JudgeFeedback.rating).where(
+            JudgeFeedback.debate_id == debate_id,
+            JudgeFeedback.judge_id.in_(judge_ids),
+        )
+    )
+    return dict(rows.all())
+
+
+def save(debate_id, given_by_id, values):
+    """Replace the ratings of the judges in ``values`` (judge id -> rating).
+
+    Judges rated ``None`` or with an unknown rating lose their rating.
+    Doesn't commit.
+    """
+    if not values:
+        return
+    db.session.execute(
+        delete(JudgeFeedback).where(
+            JudgeFeedback.debate_id == debate_id,
+            JudgeFeedback.judge_id.in_(list(values)),
+        )
+    )
+    db.session.add_all(
+        JudgeFeedback(
+            debate_id=debate_id, judge_id=judge_id, given_by_id=given_by_id, rating=rating
+        )
+        for judge_id, rating in values.items()
+        if rating in RATINGS
+    )
+
+
+def apply(debate_id, judge_ids):
+    """Move the rated judges along :data:`TRANSITIONS` in one UPDATE.
+
+    Returns the ids of the users whose ``judge_skill`` changed. Bulk updates
+    bypass the session, so the caller drops them from caches. Doesn't
+    commit.
+    """
+    if not judge_ids:
+        return []
+    rating = (
+        select(JudgeFeedback.rating)
+        .where(JudgeFeedback.debate_id == debate_id, JudgeFeedback.judge_id == User.id)
+        .scalar_subquery()
+    )
+    new_skill = case(
+        *(
+            ((rating == given) & (User.judge_skill == skill), to)
+            for (given, skill), to in TRANSITIONS.items()
+        ),
+        else_=User.judge_skill,
+    )
+    rated = select(JudgeFeedback.judge_id).where(
+        JudgeFeedback.debate_id == debate_id,
+        JudgeFeedback.judge_id.in_(judge_ids),
+    )
+    stmt = (
+        update(User)
+        .where(User.id.in_(rated), new_skill != User.judge_skill)
+        .values(judge_skill=new_skill)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(db.session.scalars(stmt))
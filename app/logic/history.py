@@ -0,0 +1,162 @@
+"""Who already met whom: a decayed pairwise co-occurrence index.
+
+Every finalized room adds its pairs to ``PairHistory``:
+
+* ``team`` - two speakers on the same team (BP team or OPD side),
+* ``opponent`` - two speakers on different teams,
+* ``judge`` - a judge and a speaker they judged.
+
+Meetings fade with a half-life of ``HALF_LIFE_DAYS``. Instead of decaying
+every row over time, a meeting on day ``t`` adds ``2 ** ((t - EPOCH) / H)``
+and readers divide by the same factor for today, so recording is a plain
+additive upsert and old rows never need rewriting.
+
+:class:`CooccurrenceIndex` loads the pairs of one group of participants in a
+single query and answers ``penalty(a, b)`` with a dict lookup, which is what
+the assignment engine uses to avoid repeat partners, opponents and chairs.
+"""
+
+from datetime import date
+from itertools import combinations
+
+from sqlalchemy import case, select
+
+from app.extensions import db
+from app.models import PairHistory
+from app.utils import dialect_insert
+
+EPOCH = date(2020, 1, 1)
+HALF_LIFE_DAYS = 180.0
+
+TEAM = "team"
+OPPONENT = "opponent"
+JUDGE = "judge"
+
+# How much a past meeting of each kind counts against meeting again
+PENALTY = {TEAM: 3.0, JUDGE: 2.0, OPPONENT: 1.0}
+
+
+def _scale(day):
+    return 2.0 ** ((day - EPOCH).days / HALF_LIFE_DAYS)
+
+
+def _key(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def room_pairs(slots):
+    """``(user_a, user_b, kind)`` for every pair in one room's slots."""
+    judges = [s.user_id for s in slots if s.role.startswith("Judge")]
+    speakers = [s for s in slots if not s.role.startswith("Judge")]
+
+    def team(slot):
+        # free speakers in OPD speak for themselves
+        return slot.role if slot.role.startswith("Free") else slot.role.split("-")[0]
+
+    pairs = set()
+    for x, y in combinations(speakers, 2):
+        if x.user_id != y.user_id:
+            kind = TEAM if team(x) == team(y) else OPPONENT
+            pairs.add(_key(x.user_id, y.user_id) + (kind,))
+    for judge in judges:
+        for sp in speakers:
+            if judge != sp.user_id:
+                pairs.add(_key(judge, sp.user_id) + (JUDGE,))
+    return sorted(pairs)
+
+
+def record_room(debate_id, slots, day=None):
+    """Add the meetings of one finalized room; doesn't commit.
+
+    A pair already counted for ``debate_id`` is left alone, so finalizing a
+    room twice doesn't count it twice.
+    """
+    pairs = room_pairs(slots)
+    if not pairs:
+        return
+    step = _scale(day or date.today())
+    rows = [
+        {"user_a": a, "user_b": b, "kind": kind, "weight": step, "last_debate_id": debate_id}
+        for a, b, kind in pairs
+    ]
+
+    dialect = db.session.get_bind().dialect.name
+    insert = dialect_insert(dialect)
+    if insert is None:
+        _record_portably(rows)
+        return
+
+    stmt = insert(PairHistory).values(rows)
+    if dialect in ("mysql", "mariadb"):
+        new = stmt.inserted
+        # MySQL assigns left to right: compare before last_debate_id changes
+        stmt = stmt.on_duplicate_key_update(
+            weight=case(
+                (PairHistory.last_debate_id == new.last_debate_id, PairHistory.weight),
+                else_=PairHistory.weight + new.weight,
+            ),
+            last_debate_id=new.last_debate_id,
+        )
+    else:
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_a", "user_b", "kind"],
+            set_={
+                "weight": PairHistory.weight + new.weight,
+                "last_debate_id": new.last_debate_id,
+            },
+            where=PairHistory.last_debate_id.is_distinct_from(new.last_debate_id),
+        )
+    db.session.execute(stmt)
+
+
+def _record_portably(rows):
+    """Read-modify-write fallback for databases without an upsert."""
+    for row in rows:
+        pair = db.session.get(PairHistory, (row["user_a"], row["user_b"], row["kind"]))
+        if pair is None:
+            db.session.add(PairHistory(**row))
+        elif pair.last_debate_id != row["last_debate_id"]:
+            pair.weight += row["weight"]
+            pair.last_debate_id = row["last_debate_id"]
+
+
+class CooccurrenceIndex:
+    """Decayed meetings between the members of one group of users."""
+
+    def __init__(self, rows=(), day=None):
+        decay = 1.0 / _scale(day or date.today())
+        self._kinds = {}
+        self._penalty = {}
+        for a, b, kind, weight in rows:
+            count = weight * decay
+            self._kinds[(a, b, kind)] = count
+            self._penalty[(a, b)] = self._penalty.get((a, b), 0.0) + PENALTY.get(kind, 1.0) * count
+
+    @classmethod
+    def load(cls, user_ids, day=None):
+        """Everything known about the pairs within ``user_ids``, in one query."""
+        user_ids = list(user_ids)
+        if len(user_ids) < 2:
+            return cls(day=day)
+        rows = db.session.execute(
+            select(
+                PairHistory.user_a, PairHistory.user_b, PairHistory.kind, PairHistory.weight
+            ).where(PairHistory.user_a.in_(user_ids), PairHistory.user_b.in_(user_ids))
+        )
+        return cls(rows, day=day)
+
+    def __bool__(self):
+        return bool(self._penalty)
+
+    def count(self, a, b, kind):
+        """Decayed number of meetings of ``kind`` between ``a`` and ``b``."""
+        return self._kinds.get(_key(a, b) + (kind,), 0.0)
+
+    def penalty(self, a, b):
+        """Weighted decayed meetings of ``a`` and ``b`` of any kind."""
+        return self._penalty.get(_key(a, b), 0.0)
+
+    def group_penalty(self, ids):
+        """Sum of the penalties of all pairs in ``ids``."""
+        return sum(self.penalty(a, b) for a, b in combinations(ids, 2))
@@ -0,0 +1,126 @@
+"""Room languages for assignment.
+
+Users carry their languages as a bitmask (``User.language_mask``, bit ``i``
+is ``LANGUAGES[i]``); 0 means unknown and is treated as speaking every
+language. Planning a night happens in two steps:
+
+1. :func:`room_languages` picks a language per room. A choice is feasible
+   by Hall's condition, checked from per-mask counts alone: for every set
+   ``S`` of languages, the users who speak nothing outside ``S`` must fit
+   into the rooms held in a language of ``S``, and those rooms must find
+   as many chairs speaking one of them.
+2. :func:`split_by_language` places every user with a bipartite matching
+   (Kuhn's augmenting paths) of users to room seats, seating a chair first
+   in each room, and returns the users per language.
+
+If everyone shares a language there is nothing to plan and both return
+None, as they do when no split fits; the engine then forms mixed rooms.
+"""
+
+from collections import Counter
+from itertools import product
+
+from app.models import LANGUAGES
+
+ALL = (1 << len(LANGUAGES)) - 1
+
+
+def _speaks(mask):
+    return mask or ALL
+
+
+def common_language(masks):
+    """Index of the first language everybody speaks, or None."""
+    shared = ALL
+    for mask in masks:
+        shared &= _speaks(mask)
+    if not shared:
+        return None
+    return next(i for i in range(len(LANGUAGES)) if shared & (1 << i))
+
+
+def feasible(counts, langs, masks, chair_masks=()):
+    """Hall's condition for seating ``masks`` in rooms of ``counts`` held in
+    ``langs`` (language indexes), with one of ``chair_masks`` per room."""
+    demand = Counter(_speaks(m) for m in masks)
+    chairs = Counter(_speaks(m) for m in chair_masks)
+    for subset in range(1, ALL + 1):
+        capacity = sum(c for c, lang in zip(counts, langs) if subset & (1 << lang))
+        confined = sum(n for mask, n in demand.items() if mask & ~subset == 0)
+        if confined > capacity:
+            return False
+        if chair_masks:
+            rooms = sum(1 for lang in langs if subset & (1 << lang))
+            if rooms > sum(n for mask, n in chairs.items() if mask & subset):
+                return False
+    return True
+
+
+def room_languages(counts, masks, chair_masks=()):
+    """A feasible language index per room, preferring common languages.
+
+    None if everybody shares a language or if no choice is feasible; see
+    :func:`common_language` to tell the two apart.
+    """
+    if common_language(masks) is not None:
+        return None
+    spoken = Counter(
+        i for m in masks for i in range(len(LANGUAGES)) if _speaks(m) & (1 << i)
+    )
+    order = sorted(range(len(LANGUAGES)), key=lambda i: -spoken[i])
+    # rather without a chair speaking the room language than mixed rooms
+    for chairs in (chair_masks, ()):
+        for langs in product(order, repeat=len(counts)):
+            if feasible(counts, langs, masks, chairs):
+                return list(langs)
+    return None
+
+
+def _match(users, seats, accepts):
+    """Kuhn's algorithm; ``seat -> user index`` or None if not everyone fits."""
+    holder = [None] * len(seats)
+
+    def seat(u, seen):
+        for s, room in enumerate(seats):
+            if s in seen or not accepts(users[u], room):
+                continue
+            seen.add(s)
+            if holder[s] is None or seat(holder[s], seen):
+                holder[s] = u
+                return True
+        return False
+
+    for u in range(len(users)):
+        if not seat(u, set()):
+            return None
+    return holder
+
+
+def split_by_language(users, counts, langs, is_chair):
+    """Users per language so each room of ``langs`` can be filled.
+
+    Returns ``{language index: [users]}`` holding ``counts`` of every room of
+    that language and, if possible, a chair per room; None if no seating
+    works. ``users`` are participants with a ``languages`` bitmask.
+    """
+    chairs = [u for u in users if is_chair(u)]
+    others = [u for u in users if not is_chair(u)]
+
+    def accepts(user, seat):
+        lang, chair_seat = seat
+        return _speaks(user.languages) & (1 << lang) and (is_chair(user) or not chair_seat)
+
+    for with_chairs in (True, False):
+        seats = []
+        for count, lang in zip(counts, langs):
+            seats.append((lang, with_chairs))
+            seats.extend((lang, False) for _ in range(count - 1))
+        # chairs first, so they take the chair seats before anyone else
+        ordered = chairs + others
+        holder = _match(ordered, seats, accepts)
+        if holder is not None:
+            groups = {}
+            for (lang, _), u in zip(seats, holder):
+                groups.setdefault(lang, []).append(ordered[u])
+            return groups
+    return None
@@ -0,0 +1,200 @@
+"""Debate lifecycle and the cached "current debate" pointer.
+
+A debate moves through::
+
+    created -> voting -> closed -> assigned -> running -> finalized
+                  ^        |  ^
+                  +--------+  +-- runoff (second round on a tie)
+
+``Debate.state`` is the source of truth. :func:`transition` checks the move
+against :data:`TRANSITIONS`, writes the state and keeps the legacy columns
+(``voting_open``, ``second_voting_open``, ``assignment_complete``,
+``active``) in line, so code and templates reading those keep working.
+
+Hooks registered with :func:`on_enter` run after the transaction that made
+the transition commits, so they never announce a state that was rolled
+back. They receive a :class:`Transition` and must not touch the session.
+
+The current debate is the single active one. Its id is cached per process
+for ``CURRENT_DEBATE_TTL`` seconds and dropped whenever a commit changes a
+debate's state or active flag, so hot endpoints resolve it without
+scanning the debate table.
+"""
+
+import time
+from collections import defaultdict, namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Debate
+
+CREATED = "created"
+VOTING = "voting"
+RUNOFF = "runoff"
+CLOSED = "closed"
+ASSIGNED = "assigned"
+RUNNING = "running"
+FINALIZED = "finalized"
+STATES = (CREATED, VOTING, RUNOFF, CLOSED, ASSIGNED, RUNNING, FINALIZED)
+
+TRANSITIONS = {
+    CREATED: {VOTING},
+    VOTING: {CLOSED},
+    RUNOFF: {CLOSED},
+    CLOSED: {VOTING, RUNOFF, ASSIGNED},
+    # assignment can be re-run; every finalized room but the last keeps it running
+    ASSIGNED: {ASSIGNED, RUNNING, FINALIZED},
+    RUNNING: {RUNNING, FINALIZED},
+    FINALIZED: set(),
+}
+
+# Legacy columns implied by each state
+_VOTING_CLOSED = {
+    "voting_open": False,
+    "second_voting_open": False,
+    "assignment_complete": False,
+}
+_ASSIGNED = dict(_VOTING_CLOSED, assignment_complete=True)
+FLAGS = {
+    CREATED: _VOTING_CLOSED,
+    VOTING: dict(_VOTING_CLOSED, voting_open=True),
+    RUNOFF: dict(_VOTING_CLOSED, voting_open=True, second_voting_open=True),
+    CLOSED: _VOTING_CLOSED,
+    ASSIGNED: _ASSIGNED,
+    RUNNING: _ASSIGNED,
+    FINALIZED: dict(_ASSIGNED, active=False),
+}
+
+Transition = namedtuple("Transition", "debate_id old new")
+
+
+class LifecycleError(Exception):
+    """Raised for a transition the lifecycle does not allow."""
+
+
+_hooks = defaultdict(list)
+
+
+def on_enter(*states):
+    """Decorator registering ``fn(transition)`` for when a debate enters ``states``."""
+
+    def decorator(fn):
+        for state in states:
+            _hooks[state].append(fn)
+        return fn
+
+    return decorator
+
+
+def can_transition(debate, new_state):
+    return new_state in TRANSITIONS.get(debate.state, ())
+
+
+def transition(debate, new_state):
+    """Move ``debate`` to ``new_state``; the caller commits.
+
+    Raises :class:`LifecycleError` if the move is not allowed.
+    """
+    old = debate.state
+    if not can_transition(debate, new_state):
+        raise LifecycleError(f'"{debate.title}" cannot go from {old} to {new_state}.')
+    debate.state = new_state
+    for column, value in FLAGS[new_state].items():
+        setattr(debate, column, value)
+    db.session.info.setdefault("lifecycle_transitions", []).append(
+        Transition(debate.id, old, new_state)
+    )
+    return old
+
+
+# -- current debate pointer ------------------------------------------------------
+
+
+def _pointer():
+    return current_app.extensions.setdefault("current_debate", {})
+
+
+def invalidate():
+    _pointer().clear()
+
+
+def _cached_id():
+    entry = _pointer().get("id")
+    if entry is not None and entry[0] >= time.monotonic():
+        return True, entry[1]
+    return False, None
+
+
+def _store(debate_id):
+    ttl = current_app.config.get("CURRENT_DEBATE_TTL", 5)
+    if ttl > 0:
+        _pointer()["id"] = (time.monotonic() + ttl, debate_id)
+    return debate_id
+
+
+def current_debate_id():
+    """Id of the single active debate, or None if there is none or several."""
+    hit, debate_id = _cached_id()
+    if hit:
+        return debate_id
+    ids = db.session.scalars(
+        select(Debate.id).where(Debate.active.is_(True)).limit(2)
+    ).all()
+    return _store(ids[0] if len(ids) == 1 else None)
+
+
+def current_debate(debates=None):
+    """The current :class:`Debate`, or None.
+
+    Pass ``debates`` when the caller loads every debate anyway; the debate is
+    then picked from the list and a cold pointer is filled without a query.
+    Otherwise it is loaded by primary key.
+    """
+    if debates is None:
+        debate_id = current_debate_id()
+        return db.session.get(Debate, debate_id) if debate_id is not None else None
+    hit, debate_id = _cached_id()
+    if not hit:
+        active = [d.id for d in debates if d.active]
+        debate_id = _store(active[0] if len(active) == 1 else None)
+    return next((d for d in debates if d.id == debate_id), None)
+
+
+# -- session events ----------------------------------------------------------------
+
+
+def _changes_pointer(obj):
+    if not isinstance(obj, Debate):
+        return False
+    attrs = inspect(obj).attrs
+    return attrs.active.history.has_changes() or attrs.state.history.has_changes()
+
+
+@event.listens_for(Session, "before_flush")
+def _note_debate_changes(session, flush_context, instances):
+    if any(isinstance(o, Debate) for o in list(session.new) + list(session.deleted)) or any(
+        _changes_pointer(o) for o in session.dirty
+    ):
+        session.info["lifecycle_invalidate"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    changes = session.info.pop("lifecycle_transitions", [])
+    stale = session.info.pop("lifecycle_invalidate", False)
+    if not has_app_context():
+        return
+    if changes or stale:
+        invalidate()
+    for change in changes:
+        for hook in _hooks[change.new]:
+            hook(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("lifecycle_transitions", None)
+    session.info.pop("lifecycle_invalidate", None)
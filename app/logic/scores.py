@@ -0,0 +1,85 @@
+"""OPD score cells, written one (speaker, judge) cell at a time.
+
+The judging page autosaves only the cells that changed. They are written
+with ``INSERT ... ON CONFLICT (debate_id, speaker_id, judge_id) DO
+UPDATE``, so a save never deletes and re-inserts the room's matrix, and a
+cell sent twice over a flaky connection is simply written twice. An empty
+cell deletes just that score.
+"""
+
+from sqlalchemy import delete, tuple_
+
+from app.extensions import db
+from app.models import Score
+from app.utils import dialect_insert
+
+MIN_SCORE = 0
+MAX_SCORE = 100
+
+
+class ScoreError(ValueError):
+    """Raised for a cell that is not a valid score."""
+
+
+def parse_value(value):
+    """A score from form or JSON input; None for an empty cell."""
+    if value is None or value == "":
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ScoreError(f"{value!r} is not a score.") from None
+    if not MIN_SCORE <= number <= MAX_SCORE:
+        raise ScoreError(f"Scores go from {MIN_SCORE} to {MAX_SCORE}.")
+    return number
+
+
+def save_cells(debate_id, cells):
+    """Write ``{(speaker id, judge id): value or None}``; doesn't commit."""
+    rows = [
+        {"debate_id": debate_id, "speaker_id": s, "judge_id": j, "value": v}
+        for (s, j), v in cells.items()
+        if v is not None
+    ]
+    cleared = [key for key, value in cells.items() if value is None]
+    if cleared:
+        db.session.execute(
+            delete(Score).where(
+                Score.debate_id == debate_id,
+                tuple_(Score.speaker_id, Score.judge_id).in_(cleared),
+            )
+        )
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    insert = dialect_insert(dialect)
+    if insert is None:
+        _save_portably(rows)
+        return
+    stmt = insert(Score).values(rows)
+    if dialect in ("mysql", "mariadb"):
+        stmt = stmt.on_duplicate_key_update(value=stmt.inserted.value)
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["debate_id", "speaker_id", "judge_id"],
+            set_={"value": stmt.excluded.value},
+        )
+    db.session.execute(stmt)
+
+
+def _save_portably(rows):
+    """Read-modify-write fallback for databases without an upsert."""
+    for row in rows:
+        score = Score.query.filter_by(
+            debate_id=row["debate_id"], speaker_id=row["speaker_id"], judge_id=row["judge_id"]
+        ).first()
+        if score is None:
+            db.session.add(Score(**row))
+        else:
+            score.value = row["value"]
+
+
+def room_channel(debate_id, room):
+    """Socket.IO room of everyone watching one room's score matrix."""
+    return f"scores:{debate_id}:{room}"
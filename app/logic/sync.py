@@ -0,0 +1,153 @@
+"""Idempotent sync of the judging changes a chair queued offline.
+
+The judging pages keep every change as an operation with an id the client
+generates (``crypto.randomUUID()``) in ``localStorage`` and send the whole
+queue in one request once they are online. :func:`apply_ops` applies the
+operations it has not seen before and records their ids in ``ClientOp``,
+so a batch resent after a lost response changes nothing. Within a batch,
+the last operation on a score cell, team or judge wins.
+
+Every operation carries ``id`` and ``kind``:
+
+* ``score`` - ``speaker_id``, ``judge_id`` (user ids) and ``value``;
+  ``None`` clears the cell,
+* ``rank`` - ``team`` (OG, OO, CG or CO) and ``rank`` 1-4 or ``None``,
+* ``feedback`` - ``judge_id`` and ``rating`` (see :mod:`app.logic.feedback`).
+
+Rejected operations are acknowledged too: sending them again would not
+make them valid.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import delete, select
+
+from app.extensions import db
+from app.logic import feedback
+from app.logic.scores import ScoreError, parse_value, save_cells
+from app.models import BpRank, ClientOp
+from app.utils import dialect_insert
+
+TEAMS = ("OG", "OO", "CG", "CO")
+MAX_OP_ID = 64
+MAX_OPS = 500
+
+SyncResult = namedtuple("SyncResult", "applied duplicates rejected cells")
+
+
+class SyncError(ValueError):
+    """Raised for a batch that cannot be synced at all."""
+
+
+def _parse(op, speaker_ids, judge_ids, chair_id):
+    """``(kind, key, value)`` of a valid operation; raises ScoreError."""
+    kind = op.get("kind")
+    try:
+        if kind == "score":
+            key = (int(op["speaker_id"]), int(op["judge_id"]))
+            if key[0] not in speaker_ids or key[1] not in judge_ids:
+                raise ScoreError("This cell is not part of your room.")
+            return kind, key, parse_value(op.get("value"))
+        if kind == "rank":
+            team = op.get("team")
+            if team not in TEAMS:
+                raise ScoreError(f"{team!r} is not a team.")
+            rank = op.get("rank")
+            rank = None if rank in (None, "") else int(rank)
+            if rank is not None and not 1 <= rank <= 4:
+                raise ScoreError("Ranks go from 1 to 4.")
+            return kind, team, rank
+        if kind == "feedback":
+            judge_id = int(op["judge_id"])
+            if judge_id not in judge_ids or judge_id == chair_id:
+                raise ScoreError("This judge is not a wing of your room.")
+            rating = op.get("rating")
+            if rating is not None and rating not in feedback.RATINGS:
+                raise ScoreError(f"{rating!r} is not a rating.")
+            return kind, judge_id, rating
+    except ScoreError:
+        raise
+    except (KeyError, TypeError, ValueError):
+        raise ScoreError("Invalid operation.") from None
+    raise ScoreError(f"Unknown operation {kind!r}.")
+
+
+def apply_ops(debate_id, user_id, speaker_ids, judge_ids, ops):
+    """Apply the new operations of ``ops`` for the chair ``user_id``.
+
+    ``speaker_ids`` and ``judge_ids`` are the users of the chair's room.
+    Returns a :class:`SyncResult` with the applied and duplicate ids,
+    ``(id, message)`` for rejected operations and the score cells written.
+    Doesn't commit.
+    """
+    if not isinstance(ops, list):
+        raise SyncError("Expected a list of operations.")
+    if len(ops) > MAX_OPS:
+        raise SyncError(f"Send at most {MAX_OPS} operations at a time.")
+
+    ids = [op.get("id") if isinstance(op, dict) else None for op in ops]
+    valid_ids = [i for i in ids if isinstance(i, str) and 0 < len(i) <= MAX_OP_ID]
+    seen = set()
+    if valid_ids:
+        seen = set(
+            db.session.scalars(
+                select(ClientOp.op_id).where(
+                    ClientOp.user_id == user_id, ClientOp.op_id.in_(valid_ids)
+                )
+            )
+        )
+
+    applied, duplicates, rejected = [], [], []
+    changes = {"score": {}, "rank": {}, "feedback": {}}
+    kinds = {}
+    for op_id, op in zip(ids, ops):
+        if not isinstance(op_id, str) or not 0 < len(op_id) <= MAX_OP_ID:
+            rejected.append((op_id, "Operations need an id."))
+            continue
+        if op_id in seen or op_id in kinds:
+            duplicates.append(op_id)
+            continue
+        try:
+            if not isinstance(op, dict):
+                raise ScoreError("Invalid operation.")
+            kind, key, value = _parse(op, speaker_ids, judge_ids, user_id)
+        except ScoreError as exc:
+            rejected.append((op_id, str(exc)))
+            continue
+        changes[kind][key] = value
+        kinds[op_id] = kind
+        applied.append(op_id)
+
+    save_cells(debate_id, changes["score"])
+    if changes["rank"]:
+        db.session.execute(
+            delete(BpRank).where(
+                BpRank.debate_id == debate_id, BpRank.team.in_(list(changes["rank"]))
+            )
+        )
+        db.session.add_all(
+            BpRank(debate_id=debate_id, team=team, rank=rank)
+            for team, rank in changes["rank"].items()
+            if rank is not None
+        )
+    feedback.save(debate_id, user_id, changes["feedback"])
+    _record(user_id, debate_id, kinds)
+    return SyncResult(applied, duplicates, rejected, changes["score"])
+
+
+def _record(user_id, debate_id, kinds):
+    """Remember the applied operation ids; a concurrent resend is ignored."""
+    if not kinds:
+        return
+    rows = [
+        {"user_id": user_id, "op_id": op_id, "debate_id": debate_id, "kind": kind}
+        for op_id, kind in kinds.items()
+    ]
+    dialect = db.session.get_bind().dialect.name
+    insert = dialect_insert(dialect)
+    if insert is None:
+        db.session.add_all(ClientOp(**row) for row in rows)
+    elif dialect in ("mysql", "mariadb"):
+        db.session.execute(insert(ClientOp).values(rows).prefix_with("IGNORE"))
+    else:
+        db.session.execute(insert(ClientOp).values(rows).on_conflict_do_nothing())
@@ -0,0 +1,147 @@
+"""Parse topic lists for bulk import.
+
+Supported formats:
+
+CSV
+    A header row with a ``text`` (or ``topic``/``motion``) column and an
+    optional ``factsheet`` column; without a header the first column is the
+    topic and the second the factsheet.
+JSON
+    A list of strings or of ``{"text": ..., "factsheet": ...}`` objects,
+    optionally wrapped as ``{"topics": [...]}``.
+Markdown
+    Every heading starts a topic, the text below it up to the next heading is
+    its factsheet. A file without headings is read as a bullet list of topics.
+"""
+
+import csv
+import io
+import json
+import re
+from typing import Dict, List, Optional
+
+MAX_TEXT_LENGTH = 240  # Topic.text column size
+FORMATS = ("csv", "json", "markdown")
+
+_TEXT_COLUMNS = ("text", "topic", "motion")
+_HEADING = re.compile(r"^#{1,6}\s+(.*\S)\s*$")
+_BULLET = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(.*\S)\s*$")
+
+
+class TopicImportError(ValueError):
+    """Raised for input that cannot be imported; the message is user facing."""
+
+
+def detect_format(filename: Optional[str], content: str) -> str:
+    """Guess the format from the file extension, falling back to the content."""
+    ext = (filename or "").rsplit(".", 1)[-1].lower() if filename and "." in filename else ""
+    if ext == "csv":
+        return "csv"
+    if ext == "json":
+        return "json"
+    if ext in ("md", "markdown", "txt"):
+        return "markdown"
+    stripped = content.lstrip()
+    if stripped.startswith(("[", "{")):
+        return "json"
+    if stripped.startswith("#") or _BULLET.match(stripped.split("\n", 1)[0] if stripped else ""):
+        return "markdown"
+    return "csv"
+
+
+def _parse_csv(content: str) -> List[Dict[str, Optional[str]]]:
+    rows = list(csv.reader(io.StringIO(content)))
+    rows = [r for r in rows if any(cell.strip() for cell in r)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    text_idx = next((header.index(c) for c in _TEXT_COLUMNS if c in header), None)
+    if text_idx is not None:
+        fact_idx = header.index("factsheet") if "factsheet" in header else None
+        rows = rows[1:]
+    else:
+        text_idx, fact_idx = 0, 1
+    topics = []
+    for row in rows:
+        text = row[text_idx] if text_idx < len(row) else ""
+        factsheet = row[fact_idx] if fact_idx is not None and fact_idx < len(row) else None
+        topics.append({"text": text, "factsheet": factsheet})
+    return topics
+
+
+def _parse_json(content: str) -> List[Dict[str, Optional[str]]]:
+    try:
+        data = json.loads(content)
+    except ValueError as exc:
+        raise TopicImportError(f"Invalid JSON: {exc}") from exc
+    if isinstance(data, dict):
+        data = data.get("topics")
+    if not isinstance(data, list):
+        raise TopicImportError('JSON must be a list of topics or {"topics": [...]}.')
+    topics = []
+    for idx, item in enumerate(data, start=1):
+        if isinstance(item, str):
+            topics.append({"text": item, "factsheet": None})
+        elif isinstance(item, dict) and isinstance(item.get("text"), str):
+            factsheet = item.get("factsheet")
+            if factsheet is not None and not isinstance(factsheet, str):
+                raise TopicImportError(f"Topic {idx}: factsheet must be text.")
+            topics.append({"text": item["text"], "factsheet": factsheet})
+        else:
+            raise TopicImportError(f'Topic {idx}: expected a string or an object with "text".')
+    return topics
+
+
+def _parse_markdown(content: str) -> List[Dict[str, Optional[str]]]:
+    lines = content.splitlines()
+    if not any(_HEADING.match(line) for line in lines):
+        return [
+            {"text": m.group(1), "factsheet": None}
+            for m in (_BULLET.match(line) for line in lines)
+            if m
+        ]
+    topics = []
+    body: List[str] = []
+    for line in lines:
+        heading = _HEADING.match(line)
+        if heading:
+            if topics:
+                topics[-1]["factsheet"] = "\n".join(body)
+            topics.append({"text": heading.group(1), "factsheet": None})
+            body = []
+        elif topics:
+            body.append(line)
+    if topics:
+        topics[-1]["factsheet"] = "\n".join(body)
+    return topics
+
+
+_PARSERS = {"csv": _parse_csv, "json": _parse_json, "markdown": _parse_markdown}
+
+
+def parse_topics(content: str, fmt: str) -> List[Dict[str, Optional[str]]]:
+    """Parse and validate ``content``; returns ``[{"text", "factsheet"}, ...]``.
+
+    Whitespace is trimmed, empty factsheets become None and topics repeated
+    within the input are kept once. Raises :class:`TopicImportError`.
+    """
+    if fmt not in _PARSERS:
+        raise TopicImportError(f"Unknown format {fmt!r}.")
+    topics = []
+    seen = set()
+    for idx, topic in enumerate(_PARSERS[fmt](content), start=1):
+        text = " ".join((topic["text"] or "").split())
+        if not text:
+            raise TopicImportError(f"Topic {idx} is empty.")
+        if len(text) > MAX_TEXT_LENGTH:
+            raise TopicImportError(
+                f"Topic {idx} is longer than {MAX_TEXT_LENGTH} characters."
+            )
+        if text.lower() in seen:
+            continue
+        seen.add(text.lower())
+        factsheet = (topic["factsheet"] or "").strip() or None
+        topics.append({"text": text, "factsheet": factsheet})
+    if not topics:
+        raise TopicImportError("No topics found.")
+    return topics
@@ -0,0 +1,231 @@
+# app/mail.py
+"""Outgoing mail: a persistent outbox drained by a background worker.
+
+Request handlers only insert an ``OutboundEmail`` row and return. A worker
+started lazily per process picks up due rows, delivers them over pooled SMTP
+connections and reschedules failures with exponential backoff.
+"""
+
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from flask import current_app
+
+from .extensions import db
+from .models import OutboundEmail
+
+_wakeup = threading.Event()
+
+
+class SMTPConnectionPool:
+    """Keep up to ``size`` authenticated SMTP sessions open for reuse.
+
+    Connections idle for longer than ``idle_timeout`` seconds are closed
+    instead of being handed out again, so a quiet worker does not hold
+    sessions the server has long timed out.
+    """
+
+    def __init__(self, config, size=1, idle_timeout=30):
+        self.config = config
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle = []  # (released_at, smtp)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        cfg = self.config
+        host = cfg.get("MAIL_SERVER", "localhost")
+        port = cfg.get("MAIL_PORT", 25)
+        timeout = cfg.get("MAIL_TIMEOUT", 10)
+        if cfg.get("MAIL_USE_SSL", False):
+            smtp = smtplib.SMTP_SSL(host, port, timeout=timeout)
+        else:
+            smtp = smtplib.SMTP(host, port, timeout=timeout)
+        if cfg.get("MAIL_USE_TLS", False):
+            smtp.starttls()
+        if cfg.get("MAIL_USERNAME"):
+            smtp.login(cfg.get("MAIL_USERNAME"), cfg.get("MAIL_PASSWORD"))
+        return smtp
+
+    @staticmethod
+    def _close(smtp):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def _take_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                released_at, smtp = self._idle.pop()
+                if now - released_at <= self.idle_timeout:
+                    return smtp
+                self._close(smtp)
+        return None
+
+    def _release(self, smtp):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((time.monotonic(), smtp))
+                return
+        self._close(smtp)
+
+    @contextmanager
+    def connection(self):
+        """Yield a live connection; broken ones are discarded, not returned."""
+        smtp = self._take_idle() or self._connect()
+        try:
+            yield smtp
+        except smtplib.SMTPServerDisconnected:
+            smtp.close()
+            raise
+        except smtplib.SMTPException:
+            # the server rejected this message but the session is still usable
+            self._release(smtp)
+            raise
+        except OSError:
+            smtp.close()
+            raise
+        self._release(smtp)
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, smtp in idle:
+            self._close(smtp)
+
+
+def _pool():
+    pool = current_app.extensions.get("mail_pool")
+    if pool is None:
+        pool = SMTPConnectionPool(
+            current_app.config,
+            size=current_app.config.get("MAIL_POOL_SIZE", 1),
+            idle_timeout=current_app.config.get("MAIL_IDLE_TIMEOUT", 30),
+        )
+        current_app.extensions["mail_pool"] = pool
+    return pool
+
+
+def _send(pool, email):
+    try:
+        with pool.connection() as smtp:
+            smtp.send_message(email)
+    except smtplib.SMTPServerDisconnected:
+        # a pooled session may have been dropped by the server, retry once
+        with pool.connection() as smtp:
+            smtp.send_message(email)
+
+
+def _backoff(attempts):
+    base = current_app.config.get("MAIL_RETRY_BASE", 30)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def enqueue_email(to, subject, body):
+    """Store a message in the outbox and nudge the worker; never blocks on SMTP."""
+    msg = OutboundEmail(recipient=to, subject=subject, body=body)
+    db.session.add(msg)
+    db.session.commit()
+    if current_app.config.get("MAIL_WORKER_ENABLED", True):
+        start_worker(current_app._get_current_object())
+        _wakeup.set()
+    return msg
+
+
+def _claim(msg_id, now):
+    """Atomically lease a due message so concurrent workers never double-send."""
+    lease = timedelta(seconds=current_app.config.get("MAIL_LEASE_SECONDS", 300))
+    claimed = (
+        OutboundEmail.query.filter(
+            OutboundEmail.id == msg_id,
+            OutboundEmail.status == "pending",
+            OutboundEmail.next_attempt_at <= now,
+        ).update(
+            {
+                OutboundEmail.next_attempt_at: now + lease,
+                OutboundEmail.attempts: OutboundEmail.attempts + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.session.commit()
+    return claimed == 1
+
+
+def deliver_pending(limit=50):
+    """Send every due message in the outbox. Returns the number delivered."""
+    now = datetime.utcnow()
+    due_ids = [
+        row.id
+        for row in db.session.query(OutboundEmail.id)
+        .filter(OutboundEmail.status == "pending", OutboundEmail.next_attempt_at <= now)
+        .order_by(OutboundEmail.id)
+        .limit(limit)
+    ]
+    if not due_ids:
+        return 0
+
+    sender = current_app.config.get("MAIL_DEFAULT_SENDER")
+    max_attempts = current_app.config.get("MAIL_MAX_ATTEMPTS", 5)
+    pool = _pool()
+    sent = 0
+    for msg_id in due_ids:
+        if not _claim(msg_id, now):
+            continue
+        msg = db.session.get(OutboundEmail, msg_id)
+        email = EmailMessage()
+        email["Subject"] = msg.subject
+        email["From"] = sender
+        email["To"] = msg.recipient
+        email.set_content(msg.body)
+        try:
+            _send(pool, email)
+        except (smtplib.SMTPException, OSError) as exc:
+            msg.last_error = str(exc)
+            if msg.attempts >= max_attempts:
+                msg.status = "failed"
+                current_app.logger.error(
+                    "Giving up on mail %s to %s: %s", msg.id, msg.recipient, exc
+                )
+            else:
+                msg.next_attempt_at = datetime.utcnow() + _backoff(msg.attempts)
+        else:
+            msg.status = "sent"
+            msg.sent_at = datetime.utcnow()
+            msg.last_error = None
+            sent += 1
+        db.session.commit()
+    return sent
+
+
+def _worker_loop(app):
+    interval = app.config.get("MAIL_POLL_INTERVAL", 5)
+    while True:
+        with app.app_context():
+            try:
+                deliver_pending()
+            except Exception:
+                app.logger.exception("Mail worker iteration failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        woken = _wakeup.wait(timeout=interval)
+        _wakeup.clear()
+        if not woken:
+            with app.app_context():
+                _pool().close_idle()
+
+
+def start_worker(app):
+    """Start the outbox worker for this process once."""
+    if app.extensions.get("mail_worker"):
+        return
+    from app import socketio
+
+    app.extensions["mail_worker"] = socketio.start_background_task(_worker_loop, app)
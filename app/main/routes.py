@@ -1,12 +1,21 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, Response
 from flask_login import login_required, current_user
 from sqlalchemy.orm import joinedload
-from app.models import Debate, Topic, Vote
+from app.models import Debate, Topic
 from app.models import Debate, SpeakerSlot, User
 from app.extensions import db
-from app import socketio
-from datetime import datetime, timedelta
-from app.utils import compute_winning_topic
+from app.logic import lifecycle
+from app import live
+from app.utils import (
+    cast_vote,
+    check_in,
+    compute_winning_topic,
+    participation,
+    round_topics,
+    vote_counts,
+    vote_status,
+    voting_topics,
+)
 
 
 from . import main_bp
@@ -28,8 +37,7 @@ def dashboard():
 
     # Get all debates, newest first
     debates = Debate.query.order_by(Debate.id.desc()).all()
-    open_debates = [d for d in debates if d.active]
-    current_debate = open_debates[0] if len(open_debates) == 1 else None
+    current_debate = lifecycle.current_debate(debates)
 
     # Initialize vote statistics and user role
     vote_percent = votes_cast = votes_total = user_role = None
@@ -38,28 +46,12 @@ def dashboard():
     is_first_timer = is_first(current_user)
 
     winning_topic = None
+    joined = None
     if current_debate:
-        if current_debate.second_voting_open:
-            topic_ids = current_debate.second_topic_ids()
-            round_num = 2
-        else:
-            topic_ids = [t.id for t in current_debate.topics]
-            round_num = 1
-        votes = Vote.query.filter(
-            Vote.topic_id.in_(topic_ids), Vote.round == round_num
-        ).all()
-        voter_ids = set(v.user_id for v in votes)
-        votes_cast = len(voter_ids)
-
-        now = datetime.utcnow()
-        ten_minutes_ago = now - timedelta(minutes=10)
-
+        joined = participation(current_debate.id, current_user.id)
         # Count only users who are recently active or have voted
-        active_user_ids = set(
-            u.id for u in User.query.filter(User.last_seen >= ten_minutes_ago).all()
-        )
-        eligible_user_ids = active_user_ids.union(voter_ids)
-        votes_total = len(eligible_user_ids)
+        counts = vote_counts(current_debate)
+        votes_cast, votes_total = counts["voted_users"], counts["total_users"]
         vote_percent = int((votes_cast / votes_total) * 100) if votes_total else 0
 
         # Find this user's speaker role (if assigned)
@@ -104,110 +96,15 @@ def dashboard():
             current_debate.second_voting_open if current_debate else False
         ),
         winning_topic=winning_topic,
-        prefers_free=current_user.prefer_free,
-        prefers_judging=current_user.prefer_judging,
+        prefers_free=bool(joined and joined.prefer_free),
+        prefers_judging=bool(joined and joined.prefer_judging),
     )
 
 
 @main_bp.route("/dashboard/debates_json")
 @login_required
 def dashboard_debates_json():
-    debates = Debate.query.order_by(Debate.id.asc()).all()
-    open_debates = [d for d in debates if d.active]
-    current_debate = open_debates[0] if len(open_debates) == 1 else None
-
-    active_debates = [
-        d
-        for d in debates
-        if d.active and (not current_debate or d.id != current_debate.id)
-    ]
-    past_debates = [d for d in debates if not d.active and d.assignment_complete]
-    upcoming_debates = [
-        d for d in debates if not d.active and not d.assignment_complete
-    ]
-
-    def serialize(d):
-        return (
-            {
-                "id": d.id,
-                "title": d.title,
-                "style": d.style,
-                "active": d.active,
-                "second_voting_open": d.second_voting_open,
-            }
-            if d
-            else None
-        )
-
-    def serialize_current(d):
-        if not d:
-            return None
-        if d.second_voting_open:
-            topic_ids = d.second_topic_ids()
-            round_num = 2
-        else:
-            topic_ids = [t.id for t in d.topics]
-            round_num = 1
-        votes = Vote.query.filter(
-            Vote.topic_id.in_(topic_ids), Vote.round == round_num
-        ).all()
-        voter_ids = set(v.user_id for v in votes)
-        votes_cast = len(voter_ids)
-
-        now = datetime.utcnow()
-        ten_minutes_ago = now - timedelta(minutes=10)
-        active_user_ids = set(
-            u.id for u in User.query.filter(User.last_seen >= ten_minutes_ago).all()
-        )
-        eligible_user_ids = active_user_ids.union(voter_ids)
-        votes_total = len(eligible_user_ids)
-        vote_percent = int((votes_cast / votes_total) * 100) if votes_total else 0
-
-        slot = SpeakerSlot.query.filter_by(
-            debate_id=d.id, user_id=current_user.id
-        ).first()
-        user_role = (
-            (f"{slot.role} in Room {slot.room}" if slot and slot.room else slot.role)
-            if slot
-            else None
-        )
-
-        is_judge_chair = slot.role == "Judge-Chair" if slot else False
-        winner = compute_winning_topic(d)
-
-        return {
-            "id": d.id,
-            "title": d.title,
-            "style": d.style,
-            "active": d.active,
-            "voting_open": d.voting_open,
-            "second_voting_open": d.second_voting_open,
-            "assignment_complete": d.assignment_complete,
-            "user_role": user_role,
-            "is_first_timer": is_first(current_user),
-            "is_judge_chair": is_judge_chair,
-            "vote_percent": vote_percent,
-            "votes_cast": votes_cast,
-            "votes_total": votes_total,
-            "winner_topic": (
-                {
-                    "id": winner.id,
-                    "text": winner.text,
-                    "factsheet": winner.factsheet,
-                }
-                if winner
-                else None
-            ),
-        }
-
-    return jsonify(
-        {
-            "current_debate": serialize_current(current_debate),
-            "active_debates": [serialize(d) for d in active_debates],
-            "past_debates": [serialize(d) for d in past_debates],
-            "upcoming_debates": [serialize(d) for d in upcoming_debates],
-        }
-    )
+    return jsonify(live.dashboard_state(current_user))
 
 
 @main_bp.route("/debate/<int:debate_id>", methods=["GET", "POST"])
@@ -217,115 +114,24 @@ def debate_view(debate_id):
         return redirect(url_for("auth.survey"))
 
     debate = Debate.query.options(joinedload(Debate.speakerslots)).get_or_404(debate_id)
-    topics = debate.second_topics() if debate.second_voting_open else debate.topics
+    topics = round_topics(debate)
 
     # voting logic
     if request.method == "POST" and debate.voting_open:
         topic_id = int(request.form.get("topic_id"))
-        round_num = 2 if debate.second_voting_open else 1
-        existing_vote = Vote.query.filter_by(
-            user_id=current_user.id, topic_id=topic_id, round=round_num
-        ).first()
-        user_votes_in_debate = (
-            Vote.query.join(Topic)
-            .filter(
-                Vote.user_id == current_user.id,
-                Topic.debate_id == debate_id,
-                Vote.round == round_num,
-            )
-            .count()
-        )
-        max_votes = 1 if debate.second_voting_open else 2
-        if existing_vote:
-            flash("You have already voted for this topic.", "warning")
-        elif user_votes_in_debate >= max_votes:
-            if debate.second_voting_open:
-                flash("You can only vote for one topic in this round.", "danger")
-            else:
-                flash("You can only vote for up to 2 topics per debate.", "danger")
-        else:
-            # Bump debate_count if this is their first vote in this debate
-
-            if user_votes_in_debate == 0 and round_num == 1:
-                if current_user.debate_count is None:
-                    current_user.debate_count = 0
-                current_user.debate_count += 1
-                prev_skill = getattr(current_user, "debate_skill", "")
-                # if this is the user's third debate overall, they graduate to Newbie status and are more eligible for wing judge selection
-                prev_judge_skill = getattr(current_user, "judge_skill", "")
-                if prev_judge_skill == "Cant judge" and current_user.debate_count == 3:
-                    current_user.judge_skill = "Newbie"
-                # experience level of user is upgraded to Beginner with the fifth debate
-                if prev_skill == "First Timer" and current_user.debate_count >= 5:
-                    current_user.debate_skill = "Beginner"
-                # TODO count debates where the user judged? maybe with a 0.5 factor?
-                # generally requires a debates_judged variable which should be initialized through the difference of debate_count and existing scores for this user ignoring BP debates
-                # probably best as an admin functionality that is executed once for all users in order to avoid re-evaluating this with every new debate
-                elif prev_skill == "Beginner" and current_user.debate_count >= 15:
-                    current_user.debate_skill = "Intermediate"
-                # step to advanced would make more sense to implement with a dependency on actual scores
-            vote = Vote(user_id=current_user.id, topic_id=topic_id, round=round_num)
-            db.session.add(vote)
-            db.session.commit()
-
-            # -- live vote update start --
-            now = datetime.utcnow()
-            ten_minutes_ago = now - timedelta(minutes=10)
-
-            active_user_ids = set(
-                u.id for u in User.query.filter(User.last_seen >= ten_minutes_ago).all()
-            )
-            voted_user_ids = set(
-                row[0]
-                for row in db.session.query(Vote.user_id)
-                .join(Topic)
-                .filter(Topic.debate_id == debate_id, Vote.round == round_num)
-                .distinct()
-                .all()
-            )
-            eligible_user_ids = active_user_ids.union(voted_user_ids)
-            total_users = len(eligible_user_ids)
-            voted_users = len(voted_user_ids)
-
-            socketio.emit(
-                "vote_update",
-                {
-                    "debate_id": debate_id,
-                    "vote_data": {
-                        "total_users": total_users,
-                        "voted_users": voted_users,
-                    },
-                },
-            )
-            # -- live vote update end --
-
-            flash("Your vote has been cast!", "success")
+        success, message, category = cast_vote(debate, current_user, topic_id)
+        if success:
+            live.broadcast_vote_update(debate)
+            live.push_vote_status(debate, current_user.id)
+        flash(message, category)
         return redirect(url_for("main.debate_view", debate_id=debate_id))
 
     # Prepare user vote info for template
-    round_num = 2 if debate.second_voting_open else 1
-    topic_ids = (
-        debate.second_topic_ids()
-        if debate.second_voting_open
-        else [t.id for t in debate.topics]
-    )
-    user_votes = [
-        v.topic_id
-        for v in Vote.query.filter(
-            Vote.user_id == current_user.id,
-            Vote.round == round_num,
-            Vote.topic_id.in_(topic_ids),
-        ).all()
-    ]
-    limit = 1 if debate.second_voting_open else 2
-    votes_left = limit - len(user_votes)
-
     return render_template(
         "main/debate.html",
         debate=debate,
         topics=topics,
-        user_votes=user_votes,
-        votes_left=votes_left,
+        **vote_status(debate, current_user.id),
     )
 
 
@@ -355,45 +161,41 @@ def debate_assignments(debate_id):
 @login_required
 def debate_topics_json(debate_id):
     debate = Debate.query.get_or_404(debate_id)
-    topic_list = debate.second_topics() if debate.second_voting_open else debate.topics
-    topics = [
-        {"id": t.id, "text": t.text, "factsheet": t.factsheet} for t in topic_list
-    ]
-    return jsonify({"topics": topics})
+    return jsonify({"topics": voting_topics(debate)})
+
+
+FACTSHEET_MAX_AGE = 365 * 24 * 3600
+
+
+@main_bp.route("/factsheet/<string:digest>")
+@login_required
+def factsheet(digest):
+    """Serve a factsheet by its content hash.
+
+    A changed factsheet gets a new hash and therefore a new URL, so responses
+    never go stale and browsers may keep them for good.
+    """
+    if len(digest) != 64:
+        abort(404)
+    headers = {"Cache-Control": f"private, max-age={FACTSHEET_MAX_AGE}, immutable"}
+    if request.if_none_match.contains_weak(digest):
+        response = Response(status=304, headers=headers)
+    else:
+        text = db.session.scalar(
+            db.select(Topic.factsheet).where(Topic.factsheet_hash == digest).limit(1)
+        )
+        if text is None:
+            abort(404)
+        response = Response(text, mimetype="text/plain", headers=headers)
+    response.set_etag(digest)
+    return response
 
 
 @main_bp.route("/debate/<int:debate_id>/assignments_json")
 @login_required
 def debate_assignments_json(debate_id):
     debate = Debate.query.get_or_404(debate_id)
-    slots = SpeakerSlot.query.filter_by(debate_id=debate_id).all()
-    assignments = [
-        {
-            "role": s.role,
-            "room": s.room,
-            "user_id": s.user_id,
-            "name": f"{s.user.first_name} {s.user.last_name}",
-            "prefer_free": s.user.prefer_free,
-            "prefer_judging": s.user.prefer_judging,
-        }
-        for s in slots
-    ]
-
-    slots_by_room = {}
-    for s in slots:
-        slots_by_room.setdefault(s.room, []).append(s)
-
-    room_styles = {}
-    for room, room_slots in slots_by_room.items():
-        roles = {sl.role for sl in room_slots}
-        if roles.intersection({"OG", "OO", "CG", "CO"}):
-            room_styles[room] = "BP"
-        elif roles.intersection({"Gov", "Opp"}):
-            room_styles[room] = "OPD"
-        else:
-            room_styles[room] = debate.style
-
-    return jsonify({"assignments": assignments, "room_styles": room_styles})
+    return jsonify(live.assignments_state(debate))
 
 
 @main_bp.route("/debate/<int:debate_id>/join", methods=["POST"])
@@ -411,6 +213,7 @@ def debate_join(debate_id):
             400,
         )
 
+    joined = check_in(debate_id, current_user.id)
     rooms = sorted({s.room for s in debate.speakerslots}) or [1]
 
     def judge_room_counts():
@@ -436,7 +239,7 @@ def debate_join(debate_id):
                 )
                 db.session.add(slot)
                 db.session.commit()
-                socketio.emit("assignments_ready", {"debate_id": debate_id})
+                live.broadcast_assignments(debate_id)
                 return jsonify({"success": True, "role": "Judge-Wing", "room": room})
         return None
 
@@ -460,7 +263,7 @@ def debate_join(debate_id):
                     )
                     db.session.add(slot)
                     db.session.commit()
-                    socketio.emit("assignments_ready", {"debate_id": debate_id})
+                    live.broadcast_assignments(debate_id)
                     return jsonify({"success": True, "role": role, "room": room})
         return None
 
@@ -473,7 +276,7 @@ def debate_join(debate_id):
                 return result
 
     # Step 2 and 3: Respect judging preference or fill speakers first
-    if current_user.prefer_judging and current_user.judge_skill in ("Wing", "Chair"):
+    if joined.prefer_judging and current_user.judge_skill in ("Wing", "Chair"):
         result = assign_judge()
         if result:
             return result
@@ -489,6 +292,8 @@ def debate_join(debate_id):
             if result:
                 return result
 
+    # still checked in for the next assignment
+    db.session.commit()
     return (
         jsonify(
             {"success": False, "message": "No available slot or judging permission."}
@@ -501,24 +306,7 @@ def debate_join(debate_id):
 @login_required
 def debate_vote_status_json(debate_id):
     debate = Debate.query.get_or_404(debate_id)
-    if debate.second_voting_open:
-        round_num = 2
-        topic_ids = debate.second_topic_ids()
-        limit = 1
-    else:
-        round_num = 1
-        topic_ids = [t.id for t in debate.topics]
-        limit = 2
-    user_votes = [
-        v.topic_id
-        for v in Vote.query.filter(
-            Vote.user_id == current_user.id,
-            Vote.round == round_num,
-            Vote.topic_id.in_(topic_ids),
-        ).all()
-    ]
-    votes_left = limit - len(user_votes)
-    return jsonify({"user_votes": user_votes, "votes_left": votes_left})
+    return jsonify(vote_status(debate, current_user.id))
 
 
 @main_bp.route("/debate/<int:debate_id>/graphic")
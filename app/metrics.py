@@ -0,0 +1,312 @@
+# app/metrics.py
+"""In-process metrics exposed in the Prometheus text format at ``/metrics``.
+
+Counters, gauges and histograms are plain Python numbers behind a lock, so
+updating one costs a dict lookup and an addition and is safe under eventlet
+(where the lock is green) as well as under real threads.
+
+Every worker process keeps its own numbers. With ``METRICS_DIR`` set each
+process writes a snapshot to ``<METRICS_DIR>/<pid>.json`` at most every
+``METRICS_FLUSH_INTERVAL`` seconds and ``/metrics`` sums the snapshots of all
+live workers, so any uWSGI worker can answer a scrape for the whole app.
+"""
+
+import glob
+import hmac
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, request
+
+from .profiling import current_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, label_values):
+        if len(label_values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}")
+        return tuple(str(v) for v in label_values)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), self._copy(v)] for k, v in self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount=1):
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        key = self._key(label_values)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][idx] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @staticmethod
+    def _copy(value):
+        return {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def timed(self, f):
+        """Decorator recording the duration of every call of ``f``."""
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with self.time():
+                return f(*args, **kwargs)
+
+        return wrapper
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def snapshot(self):
+        return {
+            name: {"type": m.type, "help": m.help, "labels": list(m.labels),
+                   "buckets": list(getattr(m, "buckets", ())), "samples": m.snapshot()}
+            for name, m in self.metrics.items()
+        }
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "dcs_request_duration_seconds", "Time spent handling a request.", ["endpoint"]
+)
+DB_QUERIES = registry.counter(
+    "dcs_db_queries_total", "SQL statements executed while handling requests.", ["endpoint"]
+)
+DB_TIME = registry.counter(
+    "dcs_db_query_seconds_total", "Time spent in SQL while handling requests.", ["endpoint"]
+)
+SOCKET_EMITS = registry.counter(
+    "dcs_socketio_emits_total", "Socket.IO events emitted by the server.", ["event"]
+)
+SOCKET_CLIENTS = registry.gauge(
+    "dcs_socketio_connected_clients", "Socket.IO clients currently connected."
+)
+ASSIGN_DURATION = registry.histogram(
+    "dcs_assign_duration_seconds", "Duration of a run_assign request.", buckets=JOB_BUCKETS
+)
+FINALIZE_DURATION = registry.histogram(
+    "dcs_finalize_duration_seconds", "Duration of finalizing one room.", buckets=JOB_BUCKETS
+)
+
+
+# -- cross-process aggregation ------------------------------------------------
+
+_last_flush = 0.0
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def flush(directory):
+    """Write this process' snapshot to ``directory`` atomically."""
+    global _last_flush
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"pid": os.getpid(), "metrics": registry.snapshot()}, fh)
+    os.replace(tmp, path)
+    _last_flush = time.monotonic()
+
+
+def maybe_flush():
+    directory = current_app.config.get("METRICS_DIR")
+    if not directory:
+        return
+    if time.monotonic() - _last_flush >= current_app.config.get("METRICS_FLUSH_INTERVAL", 5):
+        flush(directory)
+
+
+def _merge(total, snapshot):
+    for name, metric in snapshot.items():
+        target = total.setdefault(name, dict(metric, samples={}))
+        for labels, value in metric["samples"]:
+            key = tuple(labels)
+            if metric["type"] == "histogram":
+                entry = target["samples"].setdefault(
+                    key, {"buckets": [0] * len(value["buckets"]), "sum": 0.0, "count": 0}
+                )
+                entry["buckets"] = [a + b for a, b in zip(entry["buckets"], value["buckets"])]
+                entry["sum"] += value["sum"]
+                entry["count"] += value["count"]
+            else:
+                target["samples"][key] = target["samples"].get(key, 0) + value
+
+
+def collect():
+    """Metrics of every live worker (or just this process without METRICS_DIR)."""
+    directory = current_app.config.get("METRICS_DIR")
+    if not directory:
+        total = {}
+        _merge(total, registry.snapshot())
+        return total
+
+    flush(directory)
+    total = {}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(data.get("pid", 0)):
+            os.remove(path)
+            continue
+        _merge(total, data["metrics"])
+    return total
+
+
+def scraper_allowed():
+    """True if the request carries ``METRICS_TOKEN`` or comes from ``METRICS_ALLOWED_IPS``.
+
+    ``remote_addr`` is only what the WSGI server saw, so behind a local proxy
+    every request looks local; the allowlist should name the scraper, not
+    the loopback address, unless nothing else can reach the app.
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(given.encode(), token.encode()):
+            return True
+    return request.remote_addr in current_app.config.get("METRICS_ALLOWED_IPS", ())
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render(metrics):
+    """Render merged metrics in the Prometheus text exposition format."""
+    lines = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labels = metric["labels"]
+        for key, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels, key)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["buckets"], value["buckets"]):
+                cumulative += count
+                le = ("le", "+Inf" if math.isinf(bound) else repr(float(bound)))
+                lines.append(f"{name}_bucket{_format_labels(labels, key, le)} {cumulative}")
+            lines.append(
+                f"{name}_bucket{_format_labels(labels, key, ('le', '+Inf'))} {value['count']}"
+            )
+            lines.append(f"{name}_sum{_format_labels(labels, key)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels, key)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+# -- Flask integration ----------------------------------------------------------
+
+
+def _record_request(response):
+    stats = current_stats()
+    if stats is not None:
+        endpoint = request.endpoint or "unmatched"
+        REQUEST_LATENCY.observe(stats.elapsed, endpoint)
+        DB_QUERIES.inc(endpoint, amount=stats.queries)
+        DB_TIME.inc(endpoint, amount=stats.sql_time)
+    maybe_flush()
+    return response
+
+
+def init_app(app):
+    """Record request metrics; must run after :func:`app.profiling.init_app`."""
+    app.after_request(_record_request)
@@ -2,8 +2,10 @@
 
 from .extensions import db
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from enum import Enum
 from datetime import datetime
+import hashlib
 
 
 class JoinTimeEnum(db.Enum):
@@ -53,7 +55,27 @@ class PendingUser(db.Model):
     last_name = db.Column(db.String(80))
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(256), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+# Languages rooms can be held in; bit i of User.language_mask is LANGUAGES[i]
+LANGUAGES = ("German", "English")
+_LANGUAGE_NAMES = {
+    "german": 0,
+    "deutsch": 0,
+    "english": 1,
+    "englisch": 1,
+}
+
+
+def language_mask(languages):
+    """Bitmask of the known languages in a comma separated list."""
+    mask = 0
+    for name in (languages or "").split(","):
+        bit = _LANGUAGE_NAMES.get(name.strip().lower())
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
 
 
 # User model: represents app users (debaters, admins, etc.)
@@ -71,10 +93,10 @@ class User(UserMixin, db.Model):
     languages = db.Column(
         db.String(64), nullable=True
     )  # comma separated list of languages
+    # LANGUAGES bits of ``languages``, kept in sync below; 0 means unknown
+    language_mask = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     debate_skill = db.Column(db.String(24), nullable=True)
     judge_skill = db.Column(db.String(16), nullable=True)
-    prefer_judging = db.Column(db.Boolean, default=False)
-    prefer_free = db.Column(db.Boolean, default=False)
     debate_count = db.Column(db.Integer, default=0)
     last_seen = db.Column(db.DateTime, default=datetime.utcnow)
     elo_rating = db.Column(db.Integer, default=1000)
@@ -87,6 +109,11 @@ class User(UserMixin, db.Model):
     opd_results = db.relationship("OpdResult", backref="user", lazy="dynamic")
     elo_logs = db.relationship("EloLog", backref="user", lazy="dynamic")
 
+    @validates("languages")
+    def _update_language_mask(self, key, value):
+        self.language_mask = language_mask(value)
+        return value
+
     def get_slot_for_debate(self, debate_id):
         return SpeakerSlot.query.filter_by(debate_id=debate_id, user_id=self.id).first()
 
@@ -130,6 +157,12 @@ class User(UserMixin, db.Model):
         return f"<User {self.first_name} {self.last_name}>"
 
 
+# Case-insensitive prefix search and name ordering in the admin user list
+db.Index("ix_user_first_name_lower", db.func.lower(User.first_name))
+db.Index("ix_user_last_name_lower", db.func.lower(User.last_name))
+db.Index("ix_user_email_lower", db.func.lower(User.email))
+
+
 # Debate model: stores debate event details
 class Debate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -147,8 +180,15 @@ class Debate(db.Model):
     )
     voting_open = db.Column(db.Boolean, default=True)
     second_voting_open = db.Column(db.Boolean, default=False)
-    second_voting_topics = db.Column(db.String, nullable=True)
     active = db.Column(db.Boolean, default=False)
+    # Lifecycle state, see app.logic.lifecycle. The default matches the
+    # voting_open default above; the admin UI creates debates as "created".
+    state = db.Column(
+        db.String(16), nullable=False, default="voting", server_default="voting", index=True
+    )
+    # Distinct users with at least one vote in this debate, bumped on their
+    # first vote and recounted when votes are deleted (see utils.recount_voters)
+    voter_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # Relationship: which topics belong to this debate?
     topics = db.relationship(
@@ -161,25 +201,43 @@ class Debate(db.Model):
 
     assignment_complete = db.Column(db.Boolean, default=False)
 
-    def second_topic_ids(self):
-        if not self.second_voting_topics:
-            return []
-        return [int(tid) for tid in self.second_voting_topics.split(",") if tid]
-
-    def second_topics(self):
-        ids = set(self.second_topic_ids())
-        return [t for t in self.topics if t.id in ids]
+    # Topics tied for first place, up for the second voting round
+    runoff_entries = db.relationship(
+        "RunoffTopic", backref="debate", cascade="all, delete-orphan"
+    )
+    participations = db.relationship(
+        "Participation", backref="debate", cascade="all, delete-orphan"
+    )
+    judge_feedback = db.relationship(
+        "JudgeFeedback", backref="debate", cascade="all, delete-orphan"
+    )
+    client_ops = db.relationship(
+        "ClientOp", backref="debate", cascade="all, delete-orphan"
+    )
 
     def __repr__(self):
         return f"<Debate {self.title} ({self.style})>"
 
 
+def factsheet_hash(factsheet):
+    """Content hash identifying a factsheet, or None if there is none."""
+    if not factsheet:
+        return None
+    return hashlib.sha256(factsheet.encode("utf-8")).hexdigest()
+
+
 # Topic model: a possible motion for a debate
 class Topic(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(240), nullable=False)
-    factsheet = db.Column(db.Text, nullable=True)
-    debate_id = db.Column(db.Integer, db.ForeignKey("debate.id"), nullable=False)
+    # Deferred: listings only need the hash, the text is served by
+    # ``main.factsheet`` and loaded when accessed.
+    factsheet = db.deferred(db.Column(db.Text, nullable=True))
+    # kept in sync by ``@validates``; Core INSERTs must set it themselves
+    factsheet_hash = db.Column(db.String(64), nullable=True, index=True)
+    debate_id = db.Column(
+        db.Integer, db.ForeignKey("debate.id"), nullable=False, index=True
+    )
 
     # Relationship: back to debate
     debate = db.relationship("Debate", back_populates="topics")
@@ -189,15 +247,52 @@ class Topic(db.Model):
         "Vote", back_populates="topic", cascade="all, delete-orphan"
     )
 
+    runoff_entries = db.relationship(
+        "RunoffTopic", backref="topic", cascade="all, delete-orphan"
+    )
+
+    @validates("factsheet")
+    def _update_factsheet_hash(self, key, value):
+        self.factsheet_hash = factsheet_hash(value)
+        return value
+
     def __repr__(self):
         return f"<Topic {self.text[:30]}...>"
 
 
+# RunoffTopic: a topic in a debate's second voting round (a first-round tie)
+class RunoffTopic(db.Model):
+    debate_id = db.Column(db.Integer, db.ForeignKey("debate.id"), primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey("topic.id"), primary_key=True)
+
+    def __repr__(self):
+        return f"<RunoffTopic {self.debate_id}:{self.topic_id}>"
+
+
+# LibraryTopic: a reusable motion that can be copied into any debate
+class LibraryTopic(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.String(240), nullable=False, unique=True)
+    factsheet = db.Column(db.Text, nullable=True)
+    factsheet_hash = db.Column(db.String(64), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @validates("factsheet")
+    def _update_factsheet_hash(self, key, value):
+        self.factsheet_hash = factsheet_hash(value)
+        return value
+
+    def __repr__(self):
+        return f"<LibraryTopic {self.text[:30]}...>"
+
+
 # Vote model: represents a user's vote for a topic
 class Vote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    topic_id = db.Column(db.Integer, db.ForeignKey("topic.id"), nullable=False)
+    topic_id = db.Column(
+        db.Integer, db.ForeignKey("topic.id"), nullable=False, index=True
+    )
     round = db.Column(db.Integer, default=1)
 
     # Relationships
@@ -215,6 +310,20 @@ class Vote(db.Model):
         return f"<Vote user={self.user_id} topic={self.topic_id}>"
 
 
+# Participation: a user taking part in a debate, with their preferences for
+# it. Checked in with the first vote or when joining late; preferences can be
+# set before that. The assignment pool is the checked-in rows of a debate.
+class Participation(db.Model):
+    debate_id = db.Column(db.Integer, db.ForeignKey("debate.id"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    prefer_judging = db.Column(db.Boolean, nullable=False, default=False)
+    prefer_free = db.Column(db.Boolean, nullable=False, default=False)
+    checked_in_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Participation debate={self.debate_id} user={self.user_id}>"
+
+
 JOIN_SKILL = {
     "first": "First Timer",
     "<2m": "Beginner",
@@ -255,6 +364,47 @@ class SpeakerSlot(db.Model):
     )
 
 
+# PairHistory: how often two users met in a room, per kind ("team",
+# "opponent", "judge"), decayed over time; see app.logic.history
+class PairHistory(db.Model):
+    user_a = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)  # smaller id
+    user_b = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    kind = db.Column(db.String(8), primary_key=True)
+    # decayed count scaled to app.logic.history.EPOCH, see there
+    weight = db.Column(db.Float, nullable=False, default=0.0)
+    last_debate_id = db.Column(db.Integer, nullable=True)
+    __table_args__ = (db.Index("ix_pair_history_user_b", "user_b"),)
+
+    def __repr__(self):
+        return f"<PairHistory {self.user_a}-{self.user_b} {self.kind}>"
+
+
+# JudgeFeedback: a chair's rating of a wing judge in one debate, applied to
+# judge_skill when the room is finalized; see app.logic.feedback
+class JudgeFeedback(db.Model):
+    debate_id = db.Column(db.Integer, db.ForeignKey("debate.id"), primary_key=True)
+    judge_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    given_by_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    rating = db.Column(db.String(8), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<JudgeFeedback debate={self.debate_id} judge={self.judge_id} {self.rating}>"
+
+
+# ClientOp: an operation a judging page queued offline, by the id the
+# client gave it, so a resent sync batch is applied once; see app.logic.sync
+class ClientOp(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    op_id = db.Column(db.String(64), primary_key=True)
+    debate_id = db.Column(db.Integer, db.ForeignKey("debate.id"), nullable=False)
+    kind = db.Column(db.String(16), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ClientOp {self.user_id}:{self.op_id} {self.kind}>"
+
+
 class Score(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     debate_id = db.Column(db.Integer, db.ForeignKey("debate.id"), nullable=False)
@@ -294,3 +444,104 @@ class EloLog(db.Model):
     __table_args__ = (
         db.UniqueConstraint("debate_id", "user_id", name="elo_log_unique"),
     )
+
+
+# Tournament: fixed BP teams over several power-paired rounds. Every room of
+# a round is its own BP Debate, so judging and finalize work unchanged and
+# results land in BpRank/OpdResult; see app.logic.draw
+class Tournament(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(140), nullable=False)
+    rounds = db.Column(db.Integer, nullable=False, default=5)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    teams = db.relationship(
+        "TournamentTeam",
+        backref="tournament",
+        cascade="all, delete-orphan",
+        order_by="TournamentTeam.id",
+    )
+    adjudicators = db.relationship(
+        "TournamentAdjudicator", backref="tournament", cascade="all, delete-orphan"
+    )
+
+    def __repr__(self):
+        return f"<Tournament {self.title}>"
+
+
+class TournamentTeam(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey("tournament.id"), nullable=False)
+    name = db.Column(db.String(80), nullable=False)
+    speaker_1_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    speaker_2_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    # made up on the day to even out the draw; drawn last, not ranked
+    swing = db.Column(db.Boolean, nullable=False, default=False)
+
+    speaker_1 = db.relationship("User", foreign_keys=[speaker_1_id])
+    speaker_2 = db.relationship("User", foreign_keys=[speaker_2_id])
+    __table_args__ = (
+        db.UniqueConstraint("tournament_id", "name", name="tournament_team_name_uc"),
+    )
+
+    def __repr__(self):
+        return f"<TournamentTeam {self.name}>"
+
+
+class TournamentAdjudicator(db.Model):
+    tournament_id = db.Column(db.Integer, db.ForeignKey("tournament.id"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+
+    user = db.relationship("User")
+
+
+# DrawPosition: which team holds which BP position in a tournament room
+class DrawPosition(db.Model):
+    debate_id = db.Column(db.Integer, db.ForeignKey("debate.id"), primary_key=True)
+    position = db.Column(db.String(2), primary_key=True)  # "OG", "OO", "CG", "CO"
+    team_id = db.Column(db.Integer, db.ForeignKey("tournament_team.id"), nullable=False)
+    tournament_id = db.Column(db.Integer, db.ForeignKey("tournament.id"), nullable=False)
+    round = db.Column(db.Integer, nullable=False)
+    room = db.Column(db.Integer, nullable=False)
+
+    debate = db.relationship(
+        "Debate", backref=db.backref("draw_positions", cascade="all, delete-orphan")
+    )
+    team = db.relationship("TournamentTeam")
+    __table_args__ = (
+        db.Index("ix_draw_position_tournament_round", "tournament_id", "round"),
+        db.Index("ix_draw_position_team_id", "team_id"),
+    )
+
+
+# Outbox for mails sent by request handlers; delivered by app.mail's worker
+class OutboundEmail(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(16), default="pending")  # pending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    # also used as a lease while a worker is delivering the message
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    __table_args__ = (
+        db.Index("ix_outbound_email_due", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.recipient} {self.status}>"
+
+
+class SocketConnection(db.Model):
+    """An open Socket.IO connection, shared by all worker processes."""
+
+    sid = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    # refreshed by the worker holding the connection, see app.presence
+    seen_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<SocketConnection {self.sid} user={self.user_id}>"
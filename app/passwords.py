@@ -0,0 +1,83 @@
+# app/passwords.py
+"""Password hashing that does not stall the event loop.
+
+scrypt/pbkdf2 run for tens of milliseconds and hold the calling thread. Under
+eventlet (see start.py) that thread is the hub, so every socket waits. The
+helpers here hand the work to native OS threads instead and bound how many
+hashes run at once so a login wave cannot saturate every core.
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+def _eventlet_patched():
+    # only look at an already imported eventlet: importing it here, possibly
+    # from a request thread, leaves that thread impossible to join
+    patcher = sys.modules.get("eventlet.patcher")
+    return patcher is not None and patcher.is_monkey_patched("thread")
+
+
+class HashPool:
+    """Run CPU-bound hashing on at most ``size`` native threads."""
+
+    def __init__(self, size):
+        self.size = size
+        if _eventlet_patched():
+            # threading is green here, so this semaphore only parks the
+            # calling green thread; the hash itself runs in eventlet's
+            # native thread pool
+            self._slots = threading.BoundedSemaphore(size)
+            self._executor = None
+        else:
+            self._slots = None
+            self._executor = ThreadPoolExecutor(
+                max_workers=size, thread_name_prefix="pwhash"
+            )
+
+    def run(self, fn, *args):
+        if self._executor is not None:
+            return self._executor.submit(fn, *args).result()
+        from eventlet import tpool
+
+        with self._slots:
+            return tpool.execute(fn, *args)
+
+
+def _pool():
+    pool = current_app.extensions.get("password_pool")
+    if pool is None:
+        pool = HashPool(current_app.config.get("PASSWORD_HASH_WORKERS", 2))
+        current_app.extensions["password_pool"] = pool
+    return pool
+
+
+def _method():
+    return current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+
+
+def hash_password(password):
+    """Hash ``password`` with the configured method on the hashing pool."""
+    return _pool().run(generate_password_hash, password, _method())
+
+
+def verify_password(pwhash, password):
+    """Check ``password`` against ``pwhash`` on the hashing pool."""
+    return _pool().run(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    # Werkzeug expands short names ("scrypt") to their full parameter string,
+    # the cheapest way to get that string is to hash an empty password once
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def needs_rehash(pwhash):
+    """True if ``pwhash`` was created with other work factors than configured."""
+    return pwhash.split("$", 1)[0] != _pool().run(_method_prefix, _method())
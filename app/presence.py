@@ -0,0 +1,86 @@
+# app/presence.py
+"""Which user holds which Socket.IO connection.
+
+Every authenticated socket is stored as a ``SocketConnection`` row when it
+connects and deleted when it disconnects, so all worker processes count the
+same set of users with an open dashboard. It replaces the "seen in the last
+ten minutes" guess for vote totals.
+
+A worker that dies cannot delete its rows. Each process therefore refreshes
+``seen_at`` of the connections it holds (see :func:`app.live.start_presence_worker`)
+and rows nobody refreshed for ``PRESENCE_TTL`` seconds no longer count.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from .extensions import db
+from .models import SocketConnection
+
+
+def user_room(user_id):
+    """Socket.IO room every connection of ``user_id`` joins."""
+    return f"user:{user_id}"
+
+
+def _cutoff():
+    return datetime.utcnow() - timedelta(seconds=current_app.config["PRESENCE_TTL"])
+
+
+class Presence:
+    """Connections held by this process, mirrored in ``socket_connection``."""
+
+    def __init__(self):
+        self._sids = {}
+        self._lock = threading.Lock()
+
+    def add(self, sid, user_id):
+        with self._lock:
+            self._sids[sid] = user_id
+        db.session.merge(SocketConnection(sid=sid, user_id=user_id, seen_at=datetime.utcnow()))
+        db.session.commit()
+
+    def remove(self, sid):
+        """Forget ``sid``; returns its user id or None."""
+        with self._lock:
+            user_id = self._sids.pop(sid, None)
+        if user_id is not None:
+            SocketConnection.query.filter_by(sid=sid).delete(synchronize_session=False)
+            db.session.commit()
+        return user_id
+
+    def heartbeat(self):
+        """Refresh this process's rows and drop the ones nobody refreshed."""
+        with self._lock:
+            sids = list(self._sids)
+        if sids:
+            SocketConnection.query.filter(SocketConnection.sid.in_(sids)).update(
+                {SocketConnection.seen_at: datetime.utcnow()}, synchronize_session=False
+            )
+        SocketConnection.query.filter(SocketConnection.seen_at < _cutoff()).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+    def __len__(self):
+        return len(self._sids)
+
+
+def registry():
+    """The per-app :class:`Presence` of this process."""
+    presence = current_app.extensions.get("socket_presence")
+    if presence is None:
+        presence = current_app.extensions.setdefault("socket_presence", Presence())
+    return presence
+
+
+def online_user_ids():
+    """Users with an open connection to any worker."""
+    rows = (
+        db.session.query(SocketConnection.user_id)
+        .filter(SocketConnection.seen_at >= _cutoff())
+        .distinct()
+    )
+    return {user_id for user_id, in rows}
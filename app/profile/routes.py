@@ -3,6 +3,8 @@ from flask_login import login_required, current_user
 from app.extensions import db
 from app.models import OpdResult, Debate, EloLog, SpeakerSlot, BpRank, User
 from app.debate.routes import infer_room_style
+from app.logic import lifecycle
+from app.utils import participation
 from sqlalchemy.sql import func
 from sqlalchemy.orm import joinedload
 from . import profile_bp
@@ -117,24 +119,32 @@ def view():
     )
 
 
+def _set_preference(flag):
+    """Store a preference flag on the user's participation in a debate.
+
+    The debate is ``debate_id`` from the JSON body, else the current one.
+    """
+    data = request.get_json() or {}
+    debate_id = data.get("debate_id") or lifecycle.current_debate_id()
+    if debate_id is None:
+        return jsonify({"success": False, "message": "No current debate."}), 400
+    debate = db.get_or_404(Debate, debate_id)
+    row = participation(debate.id, current_user.id, create=True)
+    setattr(row, flag, bool(data.get(flag)))
+    db.session.commit()
+    return jsonify({flag: getattr(row, flag)})
+
+
 @profile_bp.route("/profile/prefer_free", methods=["POST"])
 @login_required
 def prefer_free():
-    data = request.get_json() or {}
-    pref = bool(data.get("prefer_free"))
-    current_user.prefer_free = pref
-    db.session.commit()
-    return jsonify({"prefer_free": current_user.prefer_free})
+    return _set_preference("prefer_free")
 
 
 @profile_bp.route("/profile/prefer_judging", methods=["POST"])
 @login_required
 def prefer_judging():
-    data = request.get_json() or {}
-    pref = bool(data.get("prefer_judging"))
-    current_user.prefer_judging = pref
-    db.session.commit()
-    return jsonify({"prefer_judging": current_user.prefer_judging})
+    return _set_preference("prefer_judging")
 
 
 @profile_bp.route("/profile/debate/<int:debate_id>/results")
@@ -0,0 +1,144 @@
+# app/profiling.py
+"""SQL query counting and request timing.
+
+Every statement run while a request is being handled is counted and timed
+through SQLAlchemy engine events. After the request:
+
+- ``Server-Timing`` headers are added in debug mode (or with
+  ``SERVER_TIMING``), so the browser dev tools show app and SQL time;
+- requests over ``REQUEST_QUERY_BUDGET`` queries or ``REQUEST_TIME_BUDGET_MS``
+  are logged with their endpoint, single statements over ``SLOW_QUERY_MS``
+  with their SQL.
+
+Tests use :func:`count_queries` / :func:`assert_max_queries` to pin the
+number of queries an endpoint may issue.
+"""
+
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+
+
+class RequestStats:
+    """Queries and SQL time of the request in flight, kept on ``g``."""
+
+    __slots__ = ("started", "queries", "sql_time")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_stats():
+    """Return the :class:`RequestStats` of the current request or None."""
+    if not has_request_context():
+        return None
+    return g.get("_request_stats")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    stats = current_stats()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.sql_time += duration
+    slow_ms = current_app.config.get("SLOW_QUERY_MS", 100)
+    if slow_ms and duration * 1000 > slow_ms:
+        current_app.logger.warning(
+            "Slow query in %s (%.1f ms): %s", request.endpoint, duration * 1000, statement
+        )
+
+
+def _start_request():
+    g._request_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = g.pop("_request_stats", None)
+    if stats is None:
+        return response
+    elapsed_ms = stats.elapsed * 1000
+    sql_ms = stats.sql_time * 1000
+    config = current_app.config
+
+    if current_app.debug or config.get("SERVER_TIMING", False):
+        response.headers.add(
+            "Server-Timing", f'db;dur={sql_ms:.1f};desc="{stats.queries} queries"'
+        )
+        response.headers.add("Server-Timing", f"app;dur={elapsed_ms:.1f}")
+
+    query_budget = config.get("REQUEST_QUERY_BUDGET", 30)
+    time_budget = config.get("REQUEST_TIME_BUDGET_MS", 500)
+    if (query_budget and stats.queries > query_budget) or (
+        time_budget and elapsed_ms > time_budget
+    ):
+        current_app.logger.warning(
+            "Slow request %s %s (%s): %.1f ms, %d queries, %.1f ms SQL",
+            request.method,
+            request.path,
+            request.endpoint,
+            elapsed_ms,
+            stats.queries,
+            sql_ms,
+        )
+    return response
+
+
+def init_app(app):
+    """Hook the request timers and the engine's query events into ``app``."""
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement run inside the block, from any thread.
+
+    Needs an application context::
+
+        with count_queries() as statements:
+            client.get("/dashboard/debates_json")
+        assert len(statements) <= 6
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail if the block runs more than ``limit`` statements; lists them if so."""
+    with count_queries() as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = "\n".join(f"{i}. {s}" for i, s in enumerate(statements, 1))
+        raise AssertionError(
+            f"{len(statements)} queries executed, expected at most {limit}:\n{listing}"
+        )
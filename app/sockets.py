@@ -0,0 +1,53 @@
+# app/sockets.py
+"""Socket.IO server object and connection bookkeeping."""
+
+from flask import current_app, has_app_context, request
+from flask_login import current_user
+from flask_socketio import SocketIO as BaseSocketIO, join_room
+
+from . import live, metrics, presence
+
+
+class SocketIO(BaseSocketIO):
+    """``SocketIO`` that counts every server-side emit per event name.
+
+    Broadcasts made inside an app context are numbered and logged for
+    reconnecting clients, see :mod:`app.live`.
+    """
+
+    def emit(self, event, *args, **kwargs):
+        metrics.SOCKET_EMITS.inc(event)
+        if (
+            args
+            and isinstance(args[0], dict)
+            and kwargs.get("to") is None
+            and kwargs.get("room") is None
+            and has_app_context()
+        ):
+            args = (live.record(event, args[0]),) + args[1:]
+        return super().emit(event, *args, **kwargs)
+
+
+def _on_connect(auth=None):
+    # Flask-Login reads the user from the session cookie of the handshake
+    if not current_user.is_authenticated:
+        return False
+    join_room(presence.user_room(current_user.id))
+    presence.registry().add(request.sid, current_user.id)
+    live.start_presence_worker(current_app._get_current_object())
+    metrics.SOCKET_CLIENTS.inc()
+    metrics.maybe_flush()
+    live.on_connect(auth)
+
+
+def _on_disconnect(*args):
+    if presence.registry().remove(request.sid) is None:
+        return
+    metrics.SOCKET_CLIENTS.dec()
+    metrics.maybe_flush()
+
+
+def register_handlers(socketio):
+    socketio.on_event("connect", _on_connect)
+    socketio.on_event("disconnect", _on_disconnect)
+    live.register_handlers(socketio)
@@ -0,0 +1,112 @@
+# app/startup.py
+"""Startup profiling, enabled with ``STARTUP_PROFILE=1``.
+
+Imported first by the ``app`` package and kept to the standard library so the
+import hook sees flask, SQLAlchemy and friends being loaded. The report is
+written to stderr once ``create_app`` is done.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+ENABLED = os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true")
+TOP_IMPORTS = 15
+
+
+class _ImportTimer(MetaPathFinder):
+    """Wrap every module loader to record the module's own import time."""
+
+    def __init__(self):
+        self.self_times = {}
+        self._stack = []
+        self._busy = False
+
+    def find_spec(self, name, path=None, target=None):
+        if self._busy:
+            return None
+        self._busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._busy = False
+        loader = spec.loader
+        # builtin and frozen importers are shared classes, leave them alone
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        exec_module = loader.exec_module
+        timer = self
+
+        def timed_exec_module(module):
+            start = time.perf_counter()
+            timer._stack.append(0.0)
+            try:
+                exec_module(module)
+            finally:
+                children = timer._stack.pop()
+                total = time.perf_counter() - start
+                timer.self_times[name] = total - children
+                if timer._stack:
+                    timer._stack[-1] += total
+
+        try:
+            loader.exec_module = timed_exec_module
+        except AttributeError:
+            pass
+        return spec
+
+    def top(self, count):
+        return sorted(self.self_times.items(), key=lambda item: -item[1])[:count]
+
+
+class StartupProfile:
+    """Collect wall time per startup step and the slowest module imports."""
+
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        if not self.enabled:
+            yield
+            return
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        yield
+        self.steps.append(
+            (name, time.perf_counter() - start, len(sys.modules) - modules_before)
+        )
+
+    def add(self, name, seconds, modules=0):
+        if self.enabled:
+            self.steps.append((name, seconds, modules))
+
+    def report(self, stream=None):
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        total = sum(seconds for _, seconds, _ in self.steps)
+        print("Startup profile (ms, new modules):", file=stream)
+        for name, seconds, modules in self.steps:
+            print(f"  {seconds * 1000:8.1f}  {modules:4d}  {name}", file=stream)
+        print(f"  {total * 1000:8.1f}        total", file=stream)
+        if import_timer is not None and import_timer.self_times:
+            print(f"Slowest imports (ms, self time, top {TOP_IMPORTS}):", file=stream)
+            for name, seconds in import_timer.top(TOP_IMPORTS):
+                print(f"  {seconds * 1000:8.1f}  {name}", file=stream)
+
+
+import_timer = None
+if ENABLED:
+    import_timer = _ImportTimer()
+    sys.meta_path.insert(0, import_timer)
@@ -1,16 +1,19 @@
 document.addEventListener("DOMContentLoaded", function() {
   // Assume you have debate IDs as data attributes in your HTML
-  document.querySelectorAll('[data-debate-id]').forEach(function(debateElem) {
-    const debateId = debateElem.getAttribute('data-debate-id');
-    // 1. Initial fetch (AJAX, only once)
-    fetch(`/admin/debate/${debateId}/vote_stats`)
-      .then(res => res.json())
-      .then(data => updateProgressBar(debateId, data));
-  });
+  const debateIds = Array.from(document.querySelectorAll('[data-debate-id]'))
+    .map(el => parseInt(el.getAttribute('data-debate-id'), 10));
 
-  // 2. Setup WebSocket for live updates
   const socket = io();
 
+  // 1. Current numbers over the socket, again after every reconnect
+  socket.on('connect', function() {
+    if (!debateIds.length) return;
+    socket.emit('vote_stats', { debate_ids: debateIds }, function(stats) {
+      Object.entries(stats || {}).forEach(([debateId, data]) => updateProgressBar(debateId, data));
+    });
+  });
+
+  // 2. Live updates
   socket.on('vote_update', function(msg) {
     const debateId = msg.debate_id;
     const data = msg.vote_data;
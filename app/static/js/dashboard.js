@@ -1,69 +1,129 @@
-const socket = io();
+// The server sends a snapshot of the dashboard on connect and events after
+// that; a reconnect resumes from the last `seq` seen (see app/live.py).
+// Events carry the state that changed and are applied here; a new snapshot
+// is only requested after a gap in `seq` or when the current debate changed.
+const live = {
+  epoch: null, seq: null, current: null, topics: [], voteStatus: null, assignments: null
+};
+
+const socket = io({
+  auth: cb => cb({ snapshot: true, epoch: live.epoch, seq: live.seq })
+});
+
+socket.onAny((event, data) => {
+  if (!data || typeof data.seq !== 'number') return;
+  if (live.seq !== null && data.seq > live.seq + 1) refreshSoon();
+  live.seq = data.seq;
+});
+
+function applySnapshot(state) {
+  if (!state) return;
+  live.epoch = state.epoch;
+  live.seq = state.seq;
+  live.topics = state.topics;
+  live.voteStatus = state.vote_status;
+  live.assignments = state.assignments;
+  live.current = state.current_debate;
+  updateDebateLists(state);
+  updateCurrentDebate(state.current_debate);
+}
+
+socket.on('snapshot', applySnapshot);
+
+// Ask for a fresh snapshot; changes announced while one is on its way
+// trigger another one afterwards.
+let refreshing = false;
+let refreshAgain = false;
+function refresh() {
+  if (refreshing) {
+    refreshAgain = true;
+    return;
+  }
+  refreshing = true;
+  socket.emit('snapshot', null, state => {
+    refreshing = false;
+    applySnapshot(state);
+    if (refreshAgain) {
+      refreshAgain = false;
+      refresh();
+    }
+  });
+}
+
+// Spread the snapshot requests of all open dashboards over a few seconds.
+const REFRESH_JITTER_MS = 3000;
+let refreshTimer = null;
+function refreshSoon() {
+  if (refreshTimer) return;
+  refreshTimer = setTimeout(() => {
+    refreshTimer = null;
+    refresh();
+  }, Math.random() * REFRESH_JITTER_MS);
+}
 
 function populateVoteBox() {
-  const debateId = window.currentDebateId;
-  if (!debateId) return;
-  Promise.all([
-    fetch(`/debate/${debateId}/topics_json`).then(r => r.json()),
-    fetch(`/debate/${debateId}/vote_status_json`).then(r => r.json())
-  ]).then(([topics, status]) => {
-    const cont = document.getElementById('voteBoxContainer');
-    if (!cont) return;
-    cont.innerHTML = '';
-    const list = document.createElement('ul');
-    topics.topics.forEach(t => {
-      const li = document.createElement('li');
-      const span = document.createElement('span');
-      span.textContent = t.text + ' ';
-      li.appendChild(span);
-      if (t.factsheet) {
-        const details = document.createElement('details');
-        details.classList.add('d-inline-block', 'ms-2');
-        const summary = document.createElement('summary');
-        summary.textContent = 'Factsheet';
-        details.appendChild(summary);
-        const div = document.createElement('div');
-        div.classList.add('factsheet-content');
-        div.textContent = t.factsheet;
-        details.appendChild(div);
-        li.appendChild(details);
-      }
-      if (status.user_votes.includes(t.id)) {
-        const strong = document.createElement('strong');
-        strong.textContent = '\u2014 You voted';
-        li.appendChild(strong);
-      } else if (status.votes_left > 0) {
-        const btn = document.createElement('button');
-        btn.classList.add('btn', 'btn-primary', 'btn-sm');
-        btn.dataset.topicId = t.id;
-        btn.textContent = 'Vote';
-        li.appendChild(btn);
-      }
-      list.appendChild(li);
-    });
-    const p = document.createElement('p');
-    p.classList.add('mt-2');
-    p.textContent = `You have ${status.votes_left} vote${status.votes_left == 1 ? '' : 's'} left for this debate.`;
-    cont.appendChild(list);
-    cont.appendChild(p);
-    cont.style.display = 'block';
-
-    list.querySelectorAll('button[data-topic-id]').forEach(btn => {
-      btn.addEventListener('click', e => {
-        e.preventDefault();
-        castVote(btn.dataset.topicId);
-      });
+  const status = live.voteStatus;
+  if (!window.currentDebateId || !status) return;
+  const cont = document.getElementById('voteBoxContainer');
+  if (!cont) return;
+  cont.innerHTML = '';
+  const list = document.createElement('ul');
+  live.topics.forEach(t => {
+    const li = document.createElement('li');
+    const span = document.createElement('span');
+    span.textContent = t.text + ' ';
+    li.appendChild(span);
+    if (t.factsheet_hash) {
+      const details = document.createElement('details');
+      details.classList.add('d-inline-block', 'ms-2');
+      details.dataset.factsheetHash = t.factsheet_hash;
+      const summary = document.createElement('summary');
+      summary.textContent = 'Factsheet';
+      details.appendChild(summary);
+      const div = document.createElement('div');
+      div.classList.add('factsheet-content');
+      details.appendChild(div);
+      bindFactsheet(details);
+      li.appendChild(details);
+    }
+    if (status.user_votes.includes(t.id)) {
+      const strong = document.createElement('strong');
+      strong.textContent = '\u2014 You voted';
+      li.appendChild(strong);
+    } else if (status.votes_left > 0) {
+      const btn = document.createElement('button');
+      btn.classList.add('btn', 'btn-primary', 'btn-sm');
+      btn.dataset.topicId = t.id;
+      btn.textContent = 'Vote';
+      li.appendChild(btn);
+    }
+    list.appendChild(li);
+  });
+  const p = document.createElement('p');
+  p.classList.add('mt-2');
+  p.textContent = `You have ${status.votes_left} vote${status.votes_left == 1 ? '' : 's'} left for this debate.`;
+  cont.appendChild(list);
+  cont.appendChild(p);
+  cont.style.display = 'block';
+
+  list.querySelectorAll('button[data-topic-id]').forEach(btn => {
+    btn.addEventListener('click', e => {
+      e.preventDefault();
+      castVote(btn.dataset.topicId);
     });
   });
 }
 
 function castVote(topicId) {
-  const debateId = window.currentDebateId;
-  fetch(`/debate/${debateId}`, {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-    body: new URLSearchParams({ topic_id: topicId })
-  }).then(() => populateVoteBox());
+  const vote = { debate_id: window.currentDebateId, topic_id: topicId };
+  socket.emit('vote', vote, ack => {
+    if (!ack) return;
+    if (ack.user_votes) {
+      live.voteStatus = { user_votes: ack.user_votes, votes_left: ack.votes_left };
+    }
+    if (!ack.success) alert(ack.message);
+    populateVoteBox();
+  });
 }
 
 function createBadge(slot) {
@@ -177,100 +237,88 @@ function renderRoomGraphic(cont, data, room) {
 function populateGraphic() {
   const debateId = window.currentDebateId;
   const cont = document.getElementById('graphicContainer');
-  if (!debateId || !cont) return;
-
-  fetch(`/debate/${debateId}/assignments_json`)
-    .then(r => r.json())
-    .then(data => {
-      const rooms = [...new Set(data.assignments.map(a => a.room))].sort((a, b) => a - b);
-      const mySlot = data.assignments.find(a => a.user_id == window.currentUserId);
-      if (!currentRoom) {
-        currentRoom = mySlot ? mySlot.room : rooms[0];
-      }
-      cont.innerHTML = '';
-      if (rooms.length > 1) {
-        const select = document.createElement('select');
-        select.className = 'form-select mb-2';
-        rooms.forEach(r => {
-          const opt = document.createElement('option');
-          opt.value = r;
-          opt.textContent = `Room ${r} ${(data.room_styles && data.room_styles[r]) || window.currentDebateStyle}`;
-          if (r == currentRoom) opt.selected = true;
-          select.appendChild(opt);
-        });
-        select.addEventListener('change', () => {
-          currentRoom = parseInt(select.value, 10);
-          renderRoomGraphic(diagramCont, data, currentRoom);
-        });
-        cont.appendChild(select);
-      }
-
-      const diagramCont = document.createElement('div');
-      cont.appendChild(diagramCont);
+  const data = live.assignments;
+  if (!debateId || !cont || !data) return;
 
+  const rooms = [...new Set(data.assignments.map(a => a.room))].sort((a, b) => a - b);
+  const mySlot = data.assignments.find(a => a.user_id == window.currentUserId);
+  if (!currentRoom) {
+    currentRoom = mySlot ? mySlot.room : rooms[0];
+  }
+  cont.innerHTML = '';
+  if (rooms.length > 1) {
+    const select = document.createElement('select');
+    select.className = 'form-select mb-2';
+    rooms.forEach(r => {
+      const opt = document.createElement('option');
+      opt.value = r;
+      opt.textContent = `Room ${r} ${(data.room_styles && data.room_styles[r]) || window.currentDebateStyle}`;
+      if (r == currentRoom) opt.selected = true;
+      select.appendChild(opt);
+    });
+    select.addEventListener('change', () => {
+      currentRoom = parseInt(select.value, 10);
       renderRoomGraphic(diagramCont, data, currentRoom);
-      cont.style.display = 'block';
     });
+    cont.appendChild(select);
+  }
+
+  const diagramCont = document.createElement('div');
+  cont.appendChild(diagramCont);
+
+  renderRoomGraphic(diagramCont, data, currentRoom);
+  cont.style.display = 'block';
 }
 
 function updateJoinLaterAvailability() {
   const btn = document.getElementById('joinLaterBtn');
   if (!btn) return;
-  if (!(window.currentDebateId && window.assignmentsComplete && !window.userHasSlot)) {
+  const data = live.assignments;
+  if (!(window.currentDebateId && window.assignmentsComplete && !window.userHasSlot && data)) {
     btn.style.display = 'none';
     return;
   }
-  fetch(`/debate/${window.currentDebateId}/assignments_json`)
-    .then(r => r.json())
-    .then(data => {
-      const roomStyles = data.room_styles || {};
-      const rooms = [...new Set(data.assignments.map(a => a.room))];
-      let freeAvailable = false;
-      let wingAvailable = false;
-      rooms.forEach(room => {
-        const style = roomStyles[room] || window.currentDebateStyle;
-        const slots = data.assignments.filter(a => a.room == room);
-        const wingCount = slots.filter(s => s.role === 'Judge-Wing').length;
-        const freeCount = slots.filter(s => s.role.startsWith('Free')).length;
-        const maxWings = 3;
-        const maxFree = style === 'OPD' ? 3 : 0;
-        if (wingCount < maxWings) wingAvailable = true;
-        if (freeCount < maxFree) freeAvailable = true;
-      });
-      const canWing = ['Wing', 'Chair'].includes(window.userJudgeSkill);
-      const prefersJudge = window.preferJudging === true || window.preferJudging === 'true';
-      if (prefersJudge && freeAvailable && wingAvailable && canWing) {
-        btn.textContent = 'Join as Judge';
-      } else {
-        btn.textContent = 'Join Debate';
-      }
-      if (freeAvailable || (wingAvailable && canWing)) {
-        btn.disabled = false;
-        btn.classList.remove('disabled', 'btn-secondary');
-        btn.classList.add('btn-primary');
-        btn.style.display = 'inline-block';
-      } else {
-        btn.disabled = true;
-        btn.classList.add('disabled');
-        btn.classList.remove('btn-primary');
-        btn.classList.add('btn-secondary');
-        btn.style.display = 'inline-block';
-      }
-    });
+  const roomStyles = data.room_styles || {};
+  const rooms = [...new Set(data.assignments.map(a => a.room))];
+  let freeAvailable = false;
+  let wingAvailable = false;
+  rooms.forEach(room => {
+    const style = roomStyles[room] || window.currentDebateStyle;
+    const slots = data.assignments.filter(a => a.room == room);
+    const wingCount = slots.filter(s => s.role === 'Judge-Wing').length;
+    const freeCount = slots.filter(s => s.role.startsWith('Free')).length;
+    const maxWings = 3;
+    const maxFree = style === 'OPD' ? 3 : 0;
+    if (wingCount < maxWings) wingAvailable = true;
+    if (freeCount < maxFree) freeAvailable = true;
+  });
+  const canWing = ['Wing', 'Chair'].includes(window.userJudgeSkill);
+  const prefersJudge = window.preferJudging === true || window.preferJudging === 'true';
+  if (prefersJudge && freeAvailable && wingAvailable && canWing) {
+    btn.textContent = 'Join as Judge';
+  } else {
+    btn.textContent = 'Join Debate';
+  }
+  if (freeAvailable || (wingAvailable && canWing)) {
+    btn.disabled = false;
+    btn.classList.remove('disabled', 'btn-secondary');
+    btn.classList.add('btn-primary');
+    btn.style.display = 'inline-block';
+  } else {
+    btn.disabled = true;
+    btn.classList.add('disabled');
+    btn.classList.remove('btn-primary');
+    btn.classList.add('btn-secondary');
+    btn.style.display = 'inline-block';
+  }
 }
 
 document.addEventListener('DOMContentLoaded', () => {
-  if (window.currentDebateId && (window.votingOpen === true || window.votingOpen === 'true')) {
-    populateVoteBox();
-  } else {
+  // the vote box and room graphic are filled in from the snapshot
+  if (!(window.currentDebateId && (window.votingOpen === true || window.votingOpen === 'true'))) {
     const cont = document.getElementById('voteBoxContainer');
     if (cont) cont.style.display = 'none';
   }
-  if (window.currentDebateId &&
-      (window.assignmentsComplete === true || window.assignmentsComplete === 'true') &&
-      (window.userHasSlot === true || window.userHasSlot === 'true')) {
-    populateGraphic();
-  }
 
   const judgeBtn = document.getElementById('judgingButton');
   if (judgeBtn) {
@@ -289,7 +337,7 @@ document.addEventListener('DOMContentLoaded', () => {
       fetch('/profile/prefer_free', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ prefer_free: preferFreeSpeech.checked })
+        body: JSON.stringify({ debate_id: window.currentDebateId, prefer_free: preferFreeSpeech.checked })
       });
     });
   }
@@ -300,7 +348,7 @@ document.addEventListener('DOMContentLoaded', () => {
       fetch('/profile/prefer_judging', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ prefer_judging: preferCheck.checked })
+        body: JSON.stringify({ debate_id: window.currentDebateId, prefer_judging: preferCheck.checked })
       });
     });
   }
@@ -325,10 +373,18 @@ document.addEventListener('DOMContentLoaded', () => {
 socket.on('vote_update', data => {
   const currentDebateId = window.currentDebateId;
   if (!currentDebateId || data.debate_id !== currentDebateId) return;
+  applyVoteData(data.vote_data);
+});
 
-  const votedUsers = data.vote_data.voted_users;
-  const totalUsers = data.vote_data.total_users;
+function applyVoteData(voteData) {
+  const votedUsers = voteData.voted_users;
+  const totalUsers = voteData.total_users;
   const percent = totalUsers > 0 ? Math.round((votedUsers / totalUsers) * 100) : 0;
+  if (live.current) {
+    Object.assign(live.current, {
+      votes_cast: votedUsers, votes_total: totalUsers, vote_percent: percent
+    });
+  }
 
   const progressBar = document.querySelector('.progress-bar');
   if (progressBar) {
@@ -344,38 +400,53 @@ socket.on('vote_update', data => {
       el.textContent = percent + '%';
     }
   });
+}
+
+// sent to all of this user's tabs after they voted
+socket.on('vote_status', data => {
+  if (data.debate_id !== window.currentDebateId) return;
+  live.voteStatus = { user_votes: data.user_votes, votes_left: data.votes_left };
+  populateVoteBox();
 });
 
 socket.on('debate_status', data => {
-  if (data.debate_id !== window.currentDebateId) return;
-  const cont = document.getElementById('voteBoxContainer');
-  if (!cont) return;
+  if (data.debate_id !== window.currentDebateId || !live.current) return;
+  Object.assign(live.current, {
+    state: data.state,
+    voting_open: data.voting_open,
+    second_voting_open: data.second_voting_open
+  });
+  live.topics = data.topics;
   if (data.voting_open) {
-    cont.style.display = 'block';
-    populateVoteBox();
-  } else {
-    cont.style.display = 'none';
-  }
-  if (typeof data.second_voting_open !== 'undefined') {
-    window.secondVotingOpen = data.second_voting_open;
+    if (data.fresh_round) {
+      live.voteStatus = { user_votes: [], votes_left: data.second_voting_open ? 1 : 2 };
+    } else {
+      // a reopened round still holds this user's earlier votes
+      live.voteStatus = null;
+      refreshSoon();
+    }
   }
+  updateCurrentDebate(live.current);
+  applyVoteData(data.vote_data);
 });
 
+// the rooms are the same for everyone; find this user's slot in them
 socket.on('assignments_ready', data => {
-  if (data.debate_id !== window.currentDebateId) return;
-  fetch('/dashboard/debates_json')
-    .then(r => r.json())
-    .then(json => {
-      updateCurrentDebate(json.current_debate);
-      if (typeof updateDebateLists === 'function') {
-        updateDebateLists(json);
-      }
-      updateJoinLaterAvailability();
-    });
+  if (data.debate_id !== window.currentDebateId || !live.current) return;
+  live.assignments = data.assignments;
+  const slot = data.assignments.assignments.find(a => a.user_id == window.currentUserId);
+  Object.assign(live.current, {
+    state: data.state,
+    assignment_complete: data.assignment_complete,
+    user_role: slot ? (slot.room ? `${slot.role} in Room ${slot.room}` : slot.role) : null,
+    is_judge_chair: slot ? slot.role === 'Judge-Chair' : false
+  });
+  updateCurrentDebate(live.current);
 });
 
 socket.on('topic_list_update', data => {
   if (data.debate_id !== window.currentDebateId) return;
+  live.topics = data.topics;
   const voteBox = document.getElementById('voteBoxContainer');
   if (voteBox && (window.votingOpen === true || window.votingOpen === 'true')) {
     populateVoteBox();
@@ -384,6 +455,7 @@ socket.on('topic_list_update', data => {
 
 socket.on('winning_topic', data => {
   if (data.debate_id !== window.currentDebateId) return;
+  if (live.current) live.current.winner_topic = data.topic;
   const winEl = document.getElementById('winningTopic');
   const factEl = document.getElementById('winningFactsheet');
   if (winEl) {
@@ -391,8 +463,8 @@ socket.on('winning_topic', data => {
       winEl.textContent = `Winning topic: ${data.topic.text}`;
       winEl.style.display = 'block';
       if (factEl) {
-        if (data.topic.factsheet) {
-          factEl.textContent = data.topic.factsheet;
+        if (data.topic.factsheet_hash) {
+          showFactsheet(factEl, data.topic.factsheet_hash);
           factEl.style.display = 'block';
         } else {
           factEl.style.display = 'none';
@@ -458,8 +530,10 @@ function updateCurrentDebate(data) {
       winEl.textContent = `Winning topic: ${data.winner_topic.text}`;
       winEl.style.display = 'block';
       if (factEl) {
-        if (data.winner_topic.factsheet) {
-          factEl.textContent = data.winner_topic.factsheet;
+        if (data.winner_topic.factsheet_hash) {
+          if (factEl.dataset.factsheetHash !== data.winner_topic.factsheet_hash) {
+            showFactsheet(factEl, data.winner_topic.factsheet_hash);
+          }
           factEl.style.display = 'block';
         } else {
           factEl.style.display = 'none';
@@ -589,19 +663,12 @@ function updateDebateLists(data) {
   }
 }
 
-function fetchDebateLists() {
-  fetch('/dashboard/debates_json')
-    .then(r => r.json())
-    .then(data => {
-      updateDebateLists(data);
-      updateCurrentDebate(data.current_debate);
-    });
-}
-
-socket.on('debate_list_update', () => {
-  if (typeof fetchDebateLists === 'function') {
-    fetchDebateLists();
-  } else {
-    location.reload();
+socket.on('debate_list_update', data => {
+  const currentId = live.current ? live.current.id : null;
+  if (data.current_debate_id !== currentId) {
+    // another debate became the current one; its details depend on the user
+    refreshSoon();
+    return;
   }
+  updateDebateLists(Object.assign({ current_debate: live.current }, data));
 });
@@ -0,0 +1,47 @@
+// Factsheets are loaded on demand from /factsheet/<hash>. The URL changes
+// whenever the text does, so the browser caches responses for good; the map
+// only collapses concurrent requests for the same factsheet.
+const factsheetRequests = new Map();
+
+function loadFactsheet(hash) {
+  if (!factsheetRequests.has(hash)) {
+    const request = fetch(`/factsheet/${hash}`).then(r => {
+      if (!r.ok) throw new Error(`factsheet ${hash}: ${r.status}`);
+      return r.text();
+    });
+    request.catch(() => factsheetRequests.delete(hash));
+    factsheetRequests.set(hash, request);
+  }
+  return factsheetRequests.get(hash);
+}
+
+// Fill `el` with the factsheet `hash`.
+function showFactsheet(el, hash) {
+  el.textContent = 'Loading…';
+  el.dataset.factsheetHash = hash;
+  return loadFactsheet(hash)
+    .then(text => {
+      if (el.dataset.factsheetHash === hash) el.textContent = text;
+    })
+    .catch(() => {
+      el.textContent = 'Could not load the factsheet.';
+    });
+}
+
+// <details data-factsheet-hash="..."> loads its .factsheet-content when
+// first opened.
+function bindFactsheet(details) {
+  details.addEventListener('toggle', () => {
+    const content = details.querySelector('.factsheet-content');
+    if (!details.open || !content || content.dataset.factsheetHash) return;
+    showFactsheet(content, details.dataset.factsheetHash);
+  });
+}
+
+document.querySelectorAll('details[data-factsheet-hash]').forEach(bindFactsheet);
+
+// Factsheets shown right away, like the winning topic's, are rendered as a
+// hash only and fetched from the cached URL.
+document.querySelectorAll('.factsheet-content[data-factsheet-hash]').forEach(el => {
+  if (!el.textContent.trim()) showFactsheet(el, el.dataset.factsheetHash);
+});
@@ -0,0 +1,63 @@
+// Service worker for the judging pages (registered with scope /debate/).
+// The judging page of a debate is fetched from the network first and kept
+// in the cache, so a chair who loses the connection can still reload it
+// with its roster; scripts and styles are served from the cache and
+// refreshed in the background. Changes made offline are not sent from here:
+// judging.js keeps them in localStorage and syncs them in one request.
+const CACHE = 'judging-v1';
+const JUDGING_PAGE = /^\/debate\/\d+\/judging$/;
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(CACHE)
+      .then(cache => cache.add('/static/js/judging.js'))
+      .catch(() => {})
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+function networkFirst(request) {
+  return fetch(request)
+    .then(response => {
+      if (response.ok) {
+        const copy = response.clone();
+        caches.open(CACHE).then(cache => cache.put(request, copy));
+      }
+      return response;
+    })
+    .catch(() => caches.match(request, { ignoreSearch: true })
+      .then(cached => cached || Response.error()));
+}
+
+function staleWhileRevalidate(request) {
+  return caches.open(CACHE).then(cache => cache.match(request).then(cached => {
+    const update = fetch(request)
+      .then(response => {
+        // opaque responses from the CDNs are fine to replay
+        if (response.ok || response.type === 'opaque') cache.put(request, response.clone());
+        return response;
+      })
+      .catch(() => cached);
+    return cached || update;
+  }));
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+  if (request.mode === 'navigate' && url.origin === self.location.origin
+      && JUDGING_PAGE.test(url.pathname)) {
+    event.respondWith(networkFirst(request));
+  } else if (['script', 'style', 'font'].includes(request.destination)) {
+    event.respondWith(staleWhileRevalidate(request));
+  }
+});
@@ -0,0 +1,199 @@
+// Offline-first judging. Every change on the judging page (a score cell,
+// a wing's evaluation, the BP ranks) becomes an operation with its own id,
+// kept in localStorage until the server acknowledges it. The whole queue
+// goes to POST /debate/<id>/sync in one request shortly after an edit,
+// when the browser comes back online and when the page loads, so a reload
+// or a dropped connection never loses a ballot and reconnecting costs one
+// request. A newer change of the same cell replaces the queued one. Scores
+// saved from other devices arrive as `score_update` events.
+(function () {
+  const form = document.querySelector('form[data-judging-debate]');
+  if (!form) return;
+  const debateId = Number(form.dataset.judgingDebate);
+  const status = document.getElementById('autosave-status');
+  const storeKey = `judging-ops:${debateId}`;
+  const SAVE_DELAY_MS = 600;
+  const RETRY_MS = 5000;
+  let timer = null;
+  let syncing = false;
+  let stopped = false;
+
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register('/judging-sw.js', { scope: '/debate/' }).catch(() => {});
+  }
+
+  function setStatus(text) {
+    if (status) status.textContent = text;
+  }
+
+  function loadQueue() {
+    try {
+      return JSON.parse(localStorage.getItem(storeKey)) || [];
+    } catch (err) {
+      return [];
+    }
+  }
+
+  function storeQueue(ops) {
+    if (ops.length) localStorage.setItem(storeKey, JSON.stringify(ops));
+    else localStorage.removeItem(storeKey);
+  }
+
+  function newId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(16)}-${Math.random().toString(16).slice(2)}`;
+  }
+
+  // what an operation changes; a later operation on it replaces the queued one
+  function target(op) {
+    if (op.kind === 'score') return `score:${op.speaker_id}:${op.judge_id}`;
+    if (op.kind === 'rank') return `rank:${op.team}`;
+    return `feedback:${op.judge_id}`;
+  }
+
+  function enqueue(ops) {
+    const targets = new Set(ops.map(target));
+    const queue = loadQueue().filter(op => !targets.has(target(op)));
+    ops.forEach(op => queue.push(Object.assign({ id: newId() }, op)));
+    storeQueue(queue);
+    stopped = false;
+    schedule(SAVE_DELAY_MS);
+  }
+
+  function schedule(delay) {
+    if (timer) clearTimeout(timer);
+    timer = setTimeout(sync, delay);
+  }
+
+  function describeQueue() {
+    const count = loadQueue().length;
+    return count ? `${count} change(s) not saved yet` : 'All changes saved';
+  }
+
+  function sync() {
+    timer = null;
+    const queue = loadQueue();
+    if (syncing || stopped || queue.length === 0) return;
+    if (!navigator.onLine) {
+      setStatus(`Offline: ${describeQueue()}`);
+      return;
+    }
+    syncing = true;
+    setStatus('Saving…');
+    fetch(`/debate/${debateId}/sync`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ ops: queue })
+    })
+      .then(r => r.json().then(data => {
+        if (r.status === 403 || r.status === 409) {
+          // retrying will not help; keep the changes for the record
+          stopped = true;
+          throw new Error(data.message);
+        }
+        if (!r.ok) throw new Error(data.message || `status ${r.status}`);
+        const acked = new Set(data.acked);
+        storeQueue(loadQueue().filter(op => !acked.has(op.id)));
+        const problems = data.rejected.map(op => op.message);
+        setStatus(problems.length ? `Not saved: ${problems.join(' ')}` : describeQueue());
+      }))
+      .catch(err => {
+        setStatus(`${describeQueue()}${err && err.message ? ` (${err.message})` : ''}`);
+        if (!stopped) schedule(RETRY_MS);
+      })
+      .finally(() => {
+        syncing = false;
+        if (!timer && !stopped && loadQueue().length) schedule(SAVE_DELAY_MS);
+      });
+  }
+
+  function scoreInput(speakerId, judgeId) {
+    return form.querySelector(
+      `.score-input[data-speaker="${speakerId}"][data-judge="${judgeId}"]`
+    );
+  }
+
+  // show changes still in the queue, e.g. after reloading while offline
+  function restore() {
+    loadQueue().forEach(op => {
+      if (op.kind === 'score') {
+        const input = scoreInput(op.speaker_id, op.judge_id);
+        if (input) input.value = op.value === null ? '' : op.value;
+      } else if (op.kind === 'rank') {
+        const input = form.querySelector(`input[name="rank_${op.team}"]`);
+        if (input) input.value = op.rank === null ? '' : op.rank;
+      } else if (op.kind === 'feedback') {
+        const radio = form.querySelector(
+          `input[name="feedback_${op.judge_id}"][value="${op.rating}"]`
+        );
+        if (radio) radio.checked = true;
+      }
+    });
+    if (typeof window.updateScoreTotals === 'function') window.updateScoreTotals();
+    if (typeof window.checkRanks === 'function') window.checkRanks();
+  }
+
+  form.querySelectorAll('.score-input').forEach(input => {
+    input.addEventListener('input', () => {
+      enqueue([{
+        kind: 'score',
+        speaker_id: Number(input.dataset.speaker),
+        judge_id: Number(input.dataset.judge),
+        value: input.value === '' ? null : Number(input.value)
+      }]);
+    });
+  });
+
+  form.querySelectorAll('input[type="radio"][name^="feedback_"]').forEach(radio => {
+    radio.addEventListener('change', () => {
+      if (!radio.checked) return;
+      enqueue([{
+        kind: 'feedback',
+        judge_id: Number(radio.name.slice('feedback_'.length)),
+        rating: radio.value
+      }]);
+    });
+  });
+
+  function rankOps() {
+    return Array.from(form.querySelectorAll('.rank-input')).map(input => ({
+      kind: 'rank',
+      team: input.name.slice('rank_'.length),
+      rank: input.value === '' ? null : Number(input.value)
+    }));
+  }
+
+  // the Save button syncs the queue instead of posting the whole form
+  form.addEventListener('submit', event => {
+    event.preventDefault();
+    const ranks = rankOps();
+    if (ranks.length) enqueue(ranks);
+    schedule(0);
+  });
+
+  window.addEventListener('online', () => schedule(0));
+  window.addEventListener('offline', () => setStatus(`Offline: ${describeQueue()}`));
+
+  // the Socket.IO script may be missing when the page was loaded offline
+  const socket = window.judgingSocket || (typeof io === 'function' ? io() : null);
+  if (socket) socket.on('connect', () => {
+    socket.emit('watch_scores', { debate_id: debateId });
+    schedule(0);
+  });
+  if (socket) socket.on('score_update', data => {
+    if (data.debate_id !== debateId) return;
+    const queued = new Set(loadQueue().map(target));
+    data.scores.forEach(cell => {
+      const input = scoreInput(cell.speaker_id, cell.judge_id);
+      // never overwrite what is being typed or still waiting to be saved
+      if (!input || input === document.activeElement
+          || queued.has(`score:${cell.speaker_id}:${cell.judge_id}`)) return;
+      input.value = cell.value === null ? '' : cell.value;
+    });
+    if (typeof window.updateScoreTotals === 'function') window.updateScoreTotals();
+  });
+
+  restore();
+  setStatus(navigator.onLine ? describeQueue() : `Offline: ${describeQueue()}`);
+  schedule(0);
+})();
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+tournament_bp = Blueprint('tournament', __name__)
+
+from . import routes
@@ -0,0 +1,145 @@
+from flask import render_template, redirect, url_for, flash, request
+from flask_login import login_required
+from sqlalchemy import func, select
+
+from app.admin.routes import admin_required
+from app.extensions import db
+from app.logic.draw import POSITIONS, DrawError, generate_round, ranking, standings
+from app.models import (
+    Debate,
+    DrawPosition,
+    Tournament,
+    TournamentAdjudicator,
+    TournamentTeam,
+    User,
+)
+
+from . import tournament_bp
+
+
+def _user_by_email(email):
+    email = (email or "").strip().lower()
+    if not email:
+        return None
+    return User.query.filter(func.lower(User.email) == email).first()
+
+
+@tournament_bp.route("/admin/tournaments", methods=["GET", "POST"])
+@login_required
+@admin_required
+def tournaments():
+    if request.method == "POST":
+        title = request.form.get("title", "").strip()
+        rounds = request.form.get("rounds", 5, type=int)
+        if not title or not rounds or rounds < 1:
+            flash("Please fill all fields correctly.", "danger")
+            return redirect(url_for("tournament.tournaments"))
+        tournament = Tournament(title=title, rounds=rounds)
+        db.session.add(tournament)
+        db.session.commit()
+        flash("Tournament created!", "success")
+        return redirect(url_for("tournament.view", tournament_id=tournament.id))
+    items = Tournament.query.order_by(Tournament.id.desc()).all()
+    return render_template("tournament/list.html", tournaments=items)
+
+
+@tournament_bp.route("/admin/tournaments/<int:tournament_id>")
+@login_required
+@admin_required
+def view(tournament_id):
+    tournament = Tournament.query.get_or_404(tournament_id)
+    table = standings(tournament)
+    teams = {t.id: t for t in tournament.teams}
+
+    # the draw of every round: round -> [(room, debate, {position: team})]
+    rows = db.session.execute(
+        select(DrawPosition, Debate)
+        .join(Debate, Debate.id == DrawPosition.debate_id)
+        .where(DrawPosition.tournament_id == tournament.id)
+        .order_by(DrawPosition.round, DrawPosition.room)
+    )
+    rounds = {}
+    for position, debate in rows:
+        rooms = rounds.setdefault(position.round, {})
+        room = rooms.setdefault(position.room, (debate, {}))
+        room[1][position.position] = teams[position.team_id]
+
+    return render_template(
+        "tournament/view.html",
+        tournament=tournament,
+        table=table,
+        ranked=ranking(tournament, table),
+        swings=[t for t in tournament.teams if t.swing],
+        rounds=rounds,
+        positions=POSITIONS,
+    )
+
+
+@tournament_bp.route("/admin/tournaments/<int:tournament_id>/teams", methods=["POST"])
+@login_required
+@admin_required
+def add_team(tournament_id):
+    tournament = Tournament.query.get_or_404(tournament_id)
+    name = request.form.get("name", "").strip()
+    speakers = [_user_by_email(request.form.get(f"speaker_{i}")) for i in (1, 2)]
+    missing = [
+        request.form.get(f"speaker_{i}")
+        for i, user in zip((1, 2), speakers)
+        if request.form.get(f"speaker_{i}") and user is None
+    ]
+    if not name:
+        flash("Please give the team a name.", "danger")
+    elif any(t.name == name for t in tournament.teams):
+        flash(f'There already is a team "{name}".', "danger")
+    elif missing:
+        flash(f"No user with the email {', '.join(missing)}.", "danger")
+    else:
+        tournament.teams.append(
+            TournamentTeam(
+                name=name,
+                speaker_1_id=speakers[0].id if speakers[0] else None,
+                speaker_2_id=speakers[1].id if speakers[1] else None,
+                swing=bool(request.form.get("swing")),
+            )
+        )
+        db.session.commit()
+        flash(f'Team "{name}" added.', "success")
+    return redirect(url_for("tournament.view", tournament_id=tournament_id))
+
+
+@tournament_bp.route("/admin/tournaments/<int:tournament_id>/adjudicators", methods=["POST"])
+@login_required
+@admin_required
+def add_adjudicator(tournament_id):
+    tournament = Tournament.query.get_or_404(tournament_id)
+    user = _user_by_email(request.form.get("email"))
+    if user is None:
+        flash("No user with this email.", "danger")
+    elif any(a.user_id == user.id for a in tournament.adjudicators):
+        flash(f"{user.first_name} already adjudicates.", "info")
+    else:
+        tournament.adjudicators.append(TournamentAdjudicator(user_id=user.id))
+        db.session.commit()
+        flash(f"{user.first_name} added as adjudicator.", "success")
+    return redirect(url_for("tournament.view", tournament_id=tournament_id))
+
+
+@tournament_bp.route("/admin/tournaments/<int:tournament_id>/draw", methods=["POST"])
+@login_required
+@admin_required
+def draw(tournament_id):
+    tournament = Tournament.query.get_or_404(tournament_id)
+    swings = sum(t.swing for t in tournament.teams)
+    try:
+        number, debates = generate_round(tournament)
+    except DrawError as exc:
+        db.session.rollback()
+        flash(str(exc), "danger")
+        return redirect(url_for("tournament.view", tournament_id=tournament_id))
+    db.session.commit()
+    added = sum(t.swing for t in tournament.teams) - swings
+    message = f"Round {number} drawn in {len(debates)} rooms."
+    if added:
+        message += f" Added {added} swing team(s) to fill the rooms."
+    flash(message, "success")
+    return redirect(url_for("tournament.view", tournament_id=tournament_id))
@@ -0,0 +1,142 @@
+# app/user_cache.py
+
+import time
+from collections import namedtuple
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import User
+
+# Columns copied into the cached identity. Everything routes and templates read
+# off ``current_user`` on hot paths lives here; anything else (relationships,
+# helper methods) transparently falls back to the database row.
+#
+# Invalidation only reaches the process that flushed the change, so fields
+# that grant rights (``is_admin``, ``judge_skill``) are left out on purpose:
+# reading them loads the row, and a demotion takes effect on every worker at
+# once instead of after USER_CACHE_TTL.
+SNAPSHOT_FIELDS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "date_joined_choice",
+    "judge_choice",
+    "languages",
+    "debate_skill",
+    "debate_count",
+    "last_seen",
+    "elo_rating",
+    "elo_sigma",
+    "opd_skill",
+)
+
+UserSnapshot = namedtuple("UserSnapshot", SNAPSHOT_FIELDS)
+
+
+def _cache():
+    """Per-application map of user_id -> (expires_at, UserSnapshot)."""
+    return current_app.extensions.setdefault("user_cache", {})
+
+
+def snapshot_of(user):
+    """Build an immutable snapshot from a ``User`` row."""
+    return UserSnapshot(*(getattr(user, f) for f in SNAPSHOT_FIELDS))
+
+
+def get(user_id):
+    """Return the cached snapshot for ``user_id`` or None on a miss."""
+    cache = _cache()
+    entry = cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, snap = entry
+    if expires_at < time.monotonic():
+        cache.pop(user_id, None)
+        return None
+    return snap
+
+
+def put(snap):
+    ttl = current_app.config.get("USER_CACHE_TTL", 30)
+    if ttl > 0:
+        _cache()[snap.id] = (time.monotonic() + ttl, snap)
+    return snap
+
+
+def touch(user_id, **changes):
+    """Patch fields of a cached snapshot without resetting its expiry."""
+    cache = _cache()
+    entry = cache.get(user_id)
+    if entry is not None:
+        expires_at, snap = entry
+        cache[user_id] = (expires_at, snap._replace(**changes))
+
+
+def invalidate(user_id):
+    _cache().pop(user_id, None)
+
+
+def clear():
+    """Drop every cached identity, e.g. after a bulk UPDATE on the user table."""
+    _cache().clear()
+
+
+class CachedUser(UserMixin):
+    """``current_user`` stand-in backed by a :class:`UserSnapshot`.
+
+    Reads are served from the snapshot. The first write, or any read of an
+    attribute that is not part of the snapshot, loads the real row into the
+    session and from then on every access is delegated to it, so routes can
+    keep mutating ``current_user`` and committing as before.
+    """
+
+    def __init__(self, snap):
+        object.__setattr__(self, "_snapshot", snap)
+        object.__setattr__(self, "_row", None)
+
+    def _load(self):
+        row = self._row
+        if row is None:
+            row = db.session.get(User, self._snapshot.id)
+            object.__setattr__(self, "_row", row)
+        return row
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if self._row is None and name in UserSnapshot._fields:
+            return getattr(self._snapshot, name)
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __repr__(self):
+        return f"<User {self.first_name} {self.last_name}>"
+
+
+def load(user_id):
+    """Return a ``current_user`` object for ``user_id`` or None.
+
+    Hits the database only on a cache miss; the row is then snapshotted so the
+    following requests of the same user skip the SELECT.
+    """
+    snap = get(user_id)
+    if snap is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snap = put(snapshot_of(user))
+    return CachedUser(snap)
+
+
+@event.listens_for(Session, "before_flush")
+def _invalidate_flushed_users(session, flush_context, instances):
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            invalidate(obj.id)
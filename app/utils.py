@@ -1,36 +1,15 @@
-import smtplib
-from email.message import EmailMessage
 from itsdangerous import URLSafeTimedSerializer
 from flask import current_app
 import datetime
-from sqlalchemy import func
+from sqlalchemy import and_, delete, distinct, func, insert, select
 from .extensions import db
-from .models import Vote, User, Topic
+from .models import Debate, Participation, RunoffTopic, Vote, User, Topic
+from .presence import online_user_ids
+from .mail import enqueue_email
 
 def send_email(to, subject, body):
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = current_app.config.get("MAIL_DEFAULT_SENDER")
-    msg["To"] = to
-    msg.set_content(body)
-
-    host = current_app.config.get("MAIL_SERVER", "localhost")
-    port = current_app.config.get("MAIL_PORT", 25)
-    username = current_app.config.get("MAIL_USERNAME")
-    password = current_app.config.get("MAIL_PASSWORD")
-    use_tls = current_app.config.get("MAIL_USE_TLS", False)
-    use_ssl = current_app.config.get("MAIL_USE_SSL", False)
-
-    if use_ssl:
-        smtp = smtplib.SMTP_SSL(host, port)
-    else:
-        smtp = smtplib.SMTP(host, port)
-    if use_tls:
-        smtp.starttls()
-    if username:
-        smtp.login(username, password)
-    smtp.send_message(msg)
-    smtp.quit()
+    """Queue an email for background delivery (see app.mail)."""
+    return enqueue_email(to, subject, body)
 
 
 def generate_token(email, salt, expires_sec=3600):
@@ -51,20 +30,25 @@ def compute_winning_topic(debate):
     """Return the winning Topic for a debate or None."""
     if not debate or debate.voting_open or debate.second_voting_open:
         return None
-    if debate.second_voting_topics:
-        topic_ids = debate.second_topic_ids()
-        round_num = 2
-    else:
-        topic_ids = [t.id for t in debate.topics]
-        round_num = 1
-    if not topic_ids:
-        return None
+    # A runoff, if there was one, decides; its topics are listed even without votes
     counts = (
-        db.session.query(Vote.topic_id, func.count(Vote.id))
-        .filter(Vote.topic_id.in_(topic_ids), Vote.round == round_num)
-        .group_by(Vote.topic_id)
+        db.session.query(RunoffTopic.topic_id, func.count(Vote.id))
+        .outerjoin(
+            Vote, and_(Vote.topic_id == RunoffTopic.topic_id, Vote.round == 2)
+        )
+        .filter(RunoffTopic.debate_id == debate.id)
+        .group_by(RunoffTopic.topic_id)
         .all()
     )
+    if not counts:
+        counts = (
+            db.session.query(Vote.topic_id, func.count(Vote.id))
+            .join(Topic, Topic.id == Vote.topic_id)
+            .filter(Topic.debate_id == debate.id, Vote.round == 1)
+            .group_by(Vote.topic_id)
+            .all()
+        )
+    counts = [c for c in counts if c[1]]
     if not counts:
         return None
     max_votes = max(c[1] for c in counts)
@@ -78,11 +62,231 @@ def compute_winning_topic(debate):
     return None
 
 
-def reset_prefer_free():
-    """Reset the prefer_judging flag for all users."""
-    User.query.update({User.prefer_free: False}, synchronize_session=False)
+def runoff_topic_ids(debate_id):
+    """SELECT of the ids of the topics in the debate's runoff."""
+    return select(RunoffTopic.topic_id).where(RunoffTopic.debate_id == debate_id)
+
+
+def round_topic_ids(debate):
+    """SELECT of the ids of the topics voted on in the current round."""
+    if debate.second_voting_open:
+        return runoff_topic_ids(debate.id)
+    return select(Topic.id).where(Topic.debate_id == debate.id)
+
+
+def round_topics(debate):
+    """Topics voted on in the current round, in creation order."""
+    return Topic.query.filter(Topic.id.in_(round_topic_ids(debate))).order_by(Topic.id).all()
+
+
+def round_voter_ids(debate):
+    """Set of users with a vote in the current round."""
+    round_num = 2 if debate.second_voting_open else 1
+    return set(
+        db.session.scalars(
+            select(Vote.user_id)
+            .distinct()
+            .where(Vote.topic_id.in_(round_topic_ids(debate)), Vote.round == round_num)
+        )
+    )
+
+
+def round_user_votes(debate, user_id):
+    """Ids of the topics ``user_id`` voted for in the current round."""
+    round_num = 2 if debate.second_voting_open else 1
+    return list(
+        db.session.scalars(
+            select(Vote.topic_id).where(
+                Vote.user_id == user_id,
+                Vote.round == round_num,
+                Vote.topic_id.in_(round_topic_ids(debate)),
+            )
+        )
+    )
+
+
+def tied_topic_ids(debate_id):
+    """Ids of the topics sharing the most first-round votes if more than one does."""
+    counts = (
+        db.session.query(Topic.id, func.count(Vote.id))
+        .outerjoin(Vote, and_(Vote.topic_id == Topic.id, Vote.round == 1))
+        .filter(Topic.debate_id == debate_id)
+        .group_by(Topic.id)
+        .all()
+    )
+    if not counts:
+        return []
+    max_votes = max(c for _, c in counts)
+    tied = [tid for tid, c in counts if c == max_votes]
+    return tied if len(tied) > 1 else []
+
+
+def set_runoff(debate_id, topic_ids):
+    """Replace the debate's runoff topics; an empty list clears the runoff."""
+    db.session.execute(delete(RunoffTopic).where(RunoffTopic.debate_id == debate_id))
+    if topic_ids:
+        db.session.execute(
+            insert(RunoffTopic).values(
+                [{"debate_id": debate_id, "topic_id": tid} for tid in topic_ids]
+            )
+        )
+
+
+def voting_topics(debate):
+    """Topics currently up for vote as dicts, in the shape of ``topics_json``.
+
+    Factsheets are referenced by hash and fetched from ``main.factsheet``.
+    """
+    query = db.session.query(Topic.id, Topic.text, Topic.factsheet_hash).filter(
+        Topic.id.in_(round_topic_ids(debate))
+    )
+    return [
+        {"id": tid, "text": text, "factsheet_hash": digest}
+        for tid, text, digest in query.order_by(Topic.id)
+    ]
+
+
+def vote_counts(debate):
+    """Voters in the current round against everyone expected to vote.
+
+    Users connected over Socket.IO count towards the total, as do all voters.
+    Shaped like the ``vote_data`` of a ``vote_update`` event.
+    """
+    voter_ids = round_voter_ids(debate)
+    online_ids = online_user_ids()
+    return {"total_users": len(online_ids | voter_ids), "voted_users": len(voter_ids)}
+
+
+def vote_status(debate, user_id):
+    """The user's votes in the current round and how many are left."""
+    limit = 1 if debate.second_voting_open else 2
+    user_votes = round_user_votes(debate, user_id)
+    return {"user_votes": user_votes, "votes_left": limit - len(user_votes)}
+
+
+def cast_vote(debate, user, topic_id):
+    """Record ``user``'s vote for ``topic_id`` in the debate's current round.
+
+    Returns ``(success, message, category)`` with a flash category for the
+    message. Commits on success.
+    """
+    if not debate.voting_open:
+        return False, "Voting is closed.", "warning"
+    round_num = 2 if debate.second_voting_open else 1
+    if topic_id not in set(db.session.scalars(round_topic_ids(debate))):
+        return False, "This topic is not up for vote.", "danger"
+    existing_vote = Vote.query.filter_by(
+        user_id=user.id, topic_id=topic_id, round=round_num
+    ).first()
+    user_votes_in_debate = (
+        Vote.query.join(Topic)
+        .filter(
+            Vote.user_id == user.id,
+            Topic.debate_id == debate.id,
+            Vote.round == round_num,
+        )
+        .count()
+    )
+    max_votes = 1 if debate.second_voting_open else 2
+    if existing_vote:
+        return False, "You have already voted for this topic.", "warning"
+    if user_votes_in_debate >= max_votes:
+        if debate.second_voting_open:
+            return False, "You can only vote for one topic in this round.", "danger"
+        return False, "You can only vote for up to 2 topics per debate.", "danger"
+
+    # Bump debate_count if this is their first vote in this debate
+    if user_votes_in_debate == 0 and round_num == 1:
+        if user.debate_count is None:
+            user.debate_count = 0
+        user.debate_count += 1
+        prev_skill = getattr(user, "debate_skill", "")
+        # if this is the user's third debate overall, they graduate to Newbie status and are more eligible for wing judge selection
+        prev_judge_skill = getattr(user, "judge_skill", "")
+        if prev_judge_skill == "Cant judge" and user.debate_count == 3:
+            user.judge_skill = "Newbie"
+        # experience level of user is upgraded to Beginner with the fifth debate
+        if prev_skill == "First Timer" and user.debate_count >= 5:
+            user.debate_skill = "Beginner"
+        # TODO count debates where the user judged? maybe with a 0.5 factor?
+        # generally requires a debates_judged variable which should be initialized through the difference of debate_count and existing scores for this user ignoring BP debates
+        # probably best as an admin functionality that is executed once for all users in order to avoid re-evaluating this with every new debate
+        elif prev_skill == "Beginner" and user.debate_count >= 15:
+            user.debate_skill = "Intermediate"
+        # step to advanced would make more sense to implement with a dependency on actual scores
+    if user_votes_in_debate == 0:
+        check_in(debate.id, user.id)
+    vote = Vote(user_id=user.id, topic_id=topic_id, round=round_num)
+    db.session.add(vote)
+    db.session.flush()
+    if user_votes_in_debate == 0:
+        count_new_voter(debate.id, user.id, vote.id)
+    db.session.commit()
+    return True, "Your vote has been cast!", "success"
+
+
+def count_new_voter(debate_id, user_id, vote_id):
+    """Bump ``Debate.voter_count`` if ``vote_id`` is the user's only vote in the debate.
+
+    Call after flushing the vote, so the check and the increment are one
+    conditional UPDATE and two concurrent first votes of a user count once.
+    The debate row is locked first: where the database has row locks the
+    other vote has committed, and is seen, before the UPDATE runs; SQLite
+    already serialises the two writes. Returns True if the user was counted.
+    """
+    db.session.execute(select(Debate.id).where(Debate.id == debate_id).with_for_update())
+    other_votes = (
+        select(Vote.id)
+        .join(Topic, Topic.id == Vote.topic_id)
+        .where(Vote.user_id == user_id, Topic.debate_id == debate_id, Vote.id != vote_id)
+        .exists()
+    )
+    counted = Debate.query.filter(Debate.id == debate_id, ~other_votes).update(
+        {Debate.voter_count: Debate.voter_count + 1}, synchronize_session=False
+    )
+    return counted == 1
+
+
+def recount_voters(debate_id):
+    """Recompute ``Debate.voter_count`` in SQL after votes were deleted."""
+    voters = (
+        select(func.count(distinct(Vote.user_id)))
+        .join(Topic, Topic.id == Vote.topic_id)
+        .where(Topic.debate_id == debate_id)
+        .scalar_subquery()
+    )
+    Debate.query.filter_by(id=debate_id).update(
+        {Debate.voter_count: voters}, synchronize_session=False
+    )
+
+
+def dialect_insert(dialect):
+    """The ``insert`` construct with upsert support for ``dialect``, or None."""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        return None
+    return insert
+
+
+def participation(debate_id, user_id, create=False):
+    """The user's ``Participation`` in the debate, added unsaved if ``create``."""
+    row = db.session.get(Participation, (debate_id, user_id))
+    if row is None and create:
+        row = Participation(
+            debate_id=debate_id, user_id=user_id, prefer_judging=False, prefer_free=False
+        )
+        db.session.add(row)
+    return row
 
 
-def reset_prefer_judging():
-    """Reset the prefer_judging flag for all users."""
-    User.query.update({User.prefer_judging: False}, synchronize_session=False)
+def check_in(debate_id, user_id):
+    """Put the user into the debate's assignment pool; the caller commits."""
+    row = participation(debate_id, user_id, create=True)
+    if row.checked_in_at is None:
+        row.checked_in_at = datetime.datetime.utcnow()
+    return row
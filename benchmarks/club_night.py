@@ -0,0 +1,566 @@
+"""Replay a full club night against the app and report latency per hot path.
+
+Runs entirely in-process with the Flask test client and the Socket.IO test
+client against a throw-away SQLite database:
+
+    login -> dashboard page -> Socket.IO snapshot -> voting over the socket
+    -> reconnects -> close voting -> run_assign -> chairs judging -> finalize
+
+Members drive the dashboard like the browser does: one snapshot on connect,
+events after that, votes over the ``vote`` event and resumed reconnects.
+Every request is timed and the SQL statements it issues are counted. A
+request counts as an error unless it did what was asked: a page answers
+200, an acknowledgement or JSON answer says ``success`` and a form POST
+redirects without flashing an error (failed actions redirect too). The report
+lists p50/p95/p99 latency, queries per request and throughput per phase,
+plus the Socket.IO events the connected clients received.
+
+    python benchmarks/club_night.py --users 60 --reconnects 5
+    python benchmarks/club_night.py --users 60 --workers 4 --json night.json
+    python benchmarks/club_night.py --memory        # in-memory SQLite
+
+Compare the JSON output of two runs to spot a regression in one hot path.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+PASSWORD = "club-night"
+# cheap on purpose, login cost is covered by password_burst.py
+HASH_METHOD = "pbkdf2:sha256:1000"
+PHASES = (
+    "login",
+    "dashboard",
+    "connect",
+    "vote",
+    "reconnect",
+    "close_voting",
+    "assign",
+    "judging_page",
+    "judging",
+    "finalize",
+)
+ROOM_TYPES = {"O": (7, 12), "B": (9, 11)}
+JUDGE_SKILLS = ("Chair", "Wing", "Wing", "Newbie", "Newbie", "Cant judge", "Cant judge", "Cant judge")
+DEBATE_SKILLS = ("First Timer", "Beginner", "Intermediate", "Advanced")
+# flash categories of a form POST that did not do what was asked
+ERROR_FLASHES = ("danger", "warning")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def page_ok(resp):
+    return resp.status_code == 200
+
+
+def json_ok(resp):
+    return resp.status_code == 200 and bool((resp.get_json() or {}).get("success"))
+
+
+def ack_ok(ack):
+    return isinstance(ack, dict) and bool(ack.get("success"))
+
+
+def redirect_ok(client):
+    """Check for a form POST: a redirect that flashed no error."""
+
+    def check(resp):
+        if not 300 <= resp.status_code < 400:
+            return False
+        with client.session_transaction() as sess:
+            flashes = sess.pop("_flashes", [])
+        return not any(category in ERROR_FLASHES for category, _ in flashes)
+
+    return check
+
+
+def pick_scenario(total):
+    """Return a room plan (e.g. ``"O-B"``) that fits ``total`` participants.
+
+    Prefers the most rooms and, for equal room counts, a mix of OPD and BP
+    so both assignment paths and both judging forms are exercised.
+    """
+    for num_rooms in range(min(5, total // 7), 0, -1):
+        combos = sorted(
+            itertools.product("OB", repeat=num_rooms),
+            key=lambda combo: -len(set(combo)),
+        )
+        for combo in combos:
+            low = sum(ROOM_TYPES[c][0] for c in combo)
+            high = sum(ROOM_TYPES[c][1] for c in combo)
+            if low <= total <= high:
+                return "-".join(combo)
+    return None
+
+
+class Recorder:
+    """Collect latency, outcome and SQL statement count for every request."""
+
+    def __init__(self, engine):
+        self.samples = {phase: [] for phase in PHASES}
+        self.wall = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._count)
+        self._engine = engine
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.queries = getattr(self._local, "queries", 0) + 1
+
+    def close(self):
+        event.remove(self._engine, "before_cursor_execute", self._count)
+
+    def request(self, phase, send, check):
+        """Time ``send()``; ``check`` tells from its result whether it worked."""
+        self._local.queries = 0
+        start = time.perf_counter()
+        result = send()
+        elapsed = time.perf_counter() - start
+        queries = self._local.queries
+        ok = check(result)
+        with self._lock:
+            self.samples[phase].append((elapsed, queries, ok))
+        return result
+
+    def summary(self):
+        report = {}
+        for phase in PHASES:
+            samples = self.samples[phase]
+            if not samples:
+                continue
+            latencies = [s[0] * 1000 for s in samples]
+            queries = [s[1] for s in samples]
+            wall = self.wall.get(phase) or sum(s[0] for s in samples)
+            report[phase] = {
+                "requests": len(samples),
+                "errors": sum(1 for s in samples if not s[2]),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+                "queries_per_request": round(sum(queries) / len(queries), 1),
+                "max_queries": max(queries),
+                "requests_per_second": round(len(samples) / wall, 1) if wall else 0.0,
+            }
+        return report
+
+
+class ClubNight:
+    """Drive one debate evening through ``app`` with ``users`` members."""
+
+    def __init__(self, app, users=40, reconnects=1, workers=1, scenario=None, seed=0):
+        from app import socketio
+
+        self.app = app
+        self.socketio = socketio
+        self.user_count = users
+        self.reconnects = reconnects
+        self.workers = workers
+        self.scenario = scenario or pick_scenario(users)
+        if self.scenario is None:
+            raise ValueError(f"No room plan fits {users} participants")
+        self.random = random.Random(seed)
+        self.clients = {}
+        self.sockets = {}
+        # last (epoch, seq) each member saw, sent back on reconnect
+        self.positions = {}
+        self.events = {}
+        self._events_lock = threading.Lock()
+
+    # -- setup -----------------------------------------------------------------
+
+    def setup(self):
+        from app.extensions import db
+        from app.models import Debate, Topic, User
+
+        pwhash = generate_password_hash(PASSWORD, HASH_METHOD)
+        with self.app.app_context():
+            users = [
+                User(
+                    first_name="Admin",
+                    last_name="Night",
+                    email="admin@club-night.test",
+                    password=pwhash,
+                    is_admin=True,
+                    date_joined_choice="first",
+                )
+            ]
+            for idx in range(self.user_count):
+                users.append(
+                    User(
+                        first_name=f"Member{idx}",
+                        last_name="Night",
+                        email=f"member{idx}@club-night.test",
+                        password=pwhash,
+                        date_joined_choice="first",
+                        languages="de",
+                        judge_skill=JUDGE_SKILLS[idx % len(JUDGE_SKILLS)],
+                        debate_skill=DEBATE_SKILLS[idx % len(DEBATE_SKILLS)],
+                        debate_count=idx % 20,
+                    )
+                )
+            db.session.add_all(users)
+            debate = Debate(
+                title="Club Night",
+                style="Dynamic",
+                active=True,
+                voting_open=True,
+                assignment_mode="Random",
+            )
+            db.session.add(debate)
+            db.session.flush()
+            for idx in range(4):
+                db.session.add(
+                    Topic(debate_id=debate.id, text=f"This House would test {idx}", factsheet="Facts")
+                )
+            db.session.commit()
+            self.debate_id = debate.id
+            self.topic_ids = [t.id for t in Topic.query.filter_by(debate_id=debate.id)]
+            self.admin_email = users[0].email
+            self.member_emails = [u.email for u in users[1:]]
+
+    # -- helpers ---------------------------------------------------------------
+
+    def _each(self, phase, items, action):
+        # requests run on pool threads so none of them inherits an app context
+        # the caller may have pushed (which would pin ``g`` and the login)
+        start = time.perf_counter()
+        list(self.pool.map(action, items))
+        wall = self.recorder.wall
+        wall[phase] = wall.get(phase, 0.0) + time.perf_counter() - start
+
+    def _single(self, phase, action):
+        self._each(phase, [None], lambda _: action())
+
+    # -- phases ----------------------------------------------------------------
+
+    def _receive(self, email):
+        """Count the packets the member's socket got and remember its position."""
+        epoch, seq = self.positions.get(email, (None, None))
+        names = []
+        for packet in self.sockets[email].get_received():
+            names.append(packet["name"])
+            data = packet["args"][0] if packet["args"] else None
+            if not isinstance(data, dict):
+                continue
+            if packet["name"] == "snapshot":
+                epoch = data.get("epoch")
+            if isinstance(data.get("seq"), int):
+                seq = data["seq"]
+        self.positions[email] = (epoch, seq)
+        with self._events_lock:
+            for name in names:
+                self.events[name] = self.events.get(name, 0) + 1
+        return names
+
+    def login(self):
+        def log_in(email):
+            client = self.app.test_client()
+            self.recorder.request(
+                "login",
+                lambda: client.post("/login", data={"email": email, "password": PASSWORD}),
+                redirect_ok(client),
+            )
+            self.clients[email] = client
+
+        self._each("login", [self.admin_email] + self.member_emails, log_in)
+
+    def connect(self):
+        def open_dashboard(email):
+            client = self.clients[email]
+            self.recorder.request("dashboard", lambda: client.get("/"), page_ok)
+
+        def connect(email):
+            def send():
+                self.sockets[email] = self.socketio.test_client(
+                    self.app, flask_test_client=self.clients[email], auth={"snapshot": True}
+                )
+                return self._receive(email)
+
+            self.recorder.request("connect", send, lambda names: "snapshot" in names)
+
+        self._each("dashboard", self.member_emails, open_dashboard)
+        self._each("connect", self.member_emails, connect)
+
+    def vote(self):
+        choices = {
+            email: self.random.sample(self.topic_ids, 2) for email in self.member_emails
+        }
+
+        def cast(email):
+            sock = self.sockets[email]
+            for topic_id in choices[email]:
+                self.recorder.request(
+                    "vote",
+                    lambda: sock.emit(
+                        "vote",
+                        {"debate_id": self.debate_id, "topic_id": topic_id},
+                        callback=True,
+                    ),
+                    ack_ok,
+                )
+
+        self._each("vote", self.member_emails, cast)
+
+    def reconnect(self):
+        # phones that went to sleep resume from the last event they saw
+        def resume(email):
+            sock = self.sockets[email]
+            self._receive(email)
+            sock.disconnect()
+            epoch, seq = self.positions[email]
+
+            def send():
+                sock.connect(auth={"snapshot": True, "epoch": epoch, "seq": seq})
+                self._receive(email)
+                return sock.is_connected()
+
+            self.recorder.request("reconnect", send, bool)
+
+        # one round at a time, a member holds a single socket
+        for _ in range(self.reconnects):
+            self._each("reconnect", self.member_emails, resume)
+
+    def close_voting(self):
+        admin = self.clients[self.admin_email]
+        self._single(
+            "close_voting",
+            lambda: self.recorder.request(
+                "close_voting",
+                lambda: admin.get(f"/admin/{self.debate_id}/toggle_voting"),
+                redirect_ok(admin),
+            ),
+        )
+
+    def assign(self, runs=1):
+        admin = self.clients[self.admin_email]
+        data = {"scenario": self.scenario, "assignment_mode": "Random"}
+
+        def run(_):
+            self.recorder.request(
+                "assign",
+                lambda: admin.post(f"/admin/{self.debate_id}/assign", data=data),
+                redirect_ok(admin),
+            )
+
+        # re-running replaces the previous slots, an admin never does it in parallel
+        for idx in range(runs):
+            self._each("assign", [idx], run)
+
+    def _chairs(self):
+        from app.debate.routes import infer_room_style
+        from app.models import Debate, SpeakerSlot, User
+
+        with self.app.app_context():
+            debate = Debate.query.get(self.debate_id)
+            chairs = []
+            for chair in SpeakerSlot.query.filter_by(
+                debate_id=self.debate_id, role="Judge-Chair"
+            ):
+                slots = SpeakerSlot.query.filter_by(
+                    debate_id=self.debate_id, room=chair.room
+                ).all()
+                speakers = [s for s in slots if not s.role.startswith("Judge")]
+                judges = [s for s in slots if s.role.startswith("Judge")]
+                # the operations judging.js queues and syncs
+                if infer_room_style(debate.style, speakers) == "BP":
+                    ranks = [1, 2, 3, 4]
+                    self.random.shuffle(ranks)
+                    ops = [
+                        {"kind": "rank", "team": team, "rank": rank}
+                        for team, rank in zip(("OG", "OO", "CG", "CO"), ranks)
+                    ]
+                else:
+                    ops = [
+                        {
+                            "kind": "score",
+                            "speaker_id": sp.user_id,
+                            "judge_id": j.user_id,
+                            "value": self.random.randint(60, 80),
+                        }
+                        for sp in speakers
+                        for j in judges
+                    ]
+                for idx, op in enumerate(ops):
+                    op["id"] = f"room{chair.room}-{idx}"
+                email = db_email(User, chair.user_id)
+                chairs.append((email, chair.room, ops))
+        return chairs
+
+    def judge_and_finalize(self):
+        chairs = self._chairs()
+        url = f"/debate/{self.debate_id}/judging"
+
+        def page(chair):
+            email, _, _ = chair
+            self.recorder.request("judging_page", lambda: self.clients[email].get(url), page_ok)
+
+        def judge(chair):
+            email, _, ops = chair
+            self.recorder.request(
+                "judging",
+                lambda: self.clients[email].post(
+                    f"/debate/{self.debate_id}/sync", json={"ops": ops}
+                ),
+                lambda resp: json_ok(resp) and not resp.get_json()["rejected"],
+            )
+
+        def finalize(chair):
+            email, room, _ = chair
+            client = self.clients[email]
+            self.recorder.request(
+                "finalize",
+                lambda: client.post(f"/debate/{self.debate_id}/finalize/{room}"),
+                redirect_ok(client),
+            )
+
+        # BP ranks are stored per debate, so judge rooms one after the other
+        # like chairs submitting across the evening
+        self._each("judging_page", chairs, page)
+        for chair in chairs:
+            self._each("judging", [chair], judge)
+            self._each("finalize", [chair], finalize)
+
+    # -- driver ----------------------------------------------------------------
+
+    def run(self, assign_runs=1):
+        from app.extensions import db
+        from app.models import Debate
+
+        self.setup()
+        with self.app.app_context():
+            self.recorder = Recorder(db.engine)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="member")
+        try:
+            self.login()
+            self.connect()
+            self.vote()
+            self.reconnect()
+            self.close_voting()
+            self.assign(runs=assign_runs)
+            self.judge_and_finalize()
+        finally:
+            self.pool.shutdown()
+            self.recorder.close()
+
+        for email, sock in self.sockets.items():
+            self._receive(email)
+            sock.disconnect()
+        with self.app.app_context():
+            debate = Debate.query.get(self.debate_id)
+            rooms = debate.rooms or 0
+            finalized = debate.finalized_rooms or 0
+
+        return {
+            "users": self.user_count,
+            "workers": self.workers,
+            "scenario": self.scenario,
+            "rooms_finalized": f"{finalized}/{rooms}",
+            "socket_events": self.events,
+            "phases": self.recorder.summary(),
+        }
+
+
+def db_email(model, user_id):
+    from app.extensions import db
+
+    return db.session.get(model, user_id).email
+
+
+def print_report(report):
+    print(
+        f"Club night: {report['users']} members, {report['workers']} worker(s), "
+        f"rooms {report['scenario']}, finalized {report['rooms_finalized']}"
+    )
+    header = f"{'phase':<14}{'reqs':>6}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'q/req':>8}{'req/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for phase, row in report["phases"].items():
+        print(
+            f"{phase:<14}{row['requests']:>6}{row['errors']:>5}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+            f"{row['queries_per_request']:>8.1f}{row['requests_per_second']:>9.1f}"
+        )
+    print("latencies in ms")
+    events = ", ".join(f"{name}={count}" for name, count in sorted(report["socket_events"].items()))
+    print(f"Socket.IO events received: {events or 'none'}")
+
+
+def make_app(memory=False):
+    """Create the app on a fresh SQLite database with the worker threads off."""
+    workdir = tempfile.mkdtemp(prefix="club-night-")
+    settings = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite://" if memory else f"sqlite:///{workdir}/night.db",
+        "MAIL_WORKER_ENABLED": False,
+        "SOCKETIO_ASYNC_MODE": "threading",
+        "PASSWORD_HASH_METHOD": HASH_METHOD,
+        "SERVER_NAME": "localhost",
+    }
+    lines = [f"{key} = {value!r}" for key, value in settings.items()]
+    if memory:
+        lines.append("from sqlalchemy.pool import StaticPool")
+        lines.append(
+            "SQLALCHEMY_ENGINE_OPTIONS = {'poolclass': StaticPool, "
+            "'connect_args': {'check_same_thread': False}}"
+        )
+    config_file = os.path.join(workdir, "club_night_config.py")
+    with open(config_file, "w") as fh:
+        fh.write("\n".join(lines) + "\n")
+
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app(config_file)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--reconnects", type=int, default=3, help="dashboard reconnects per member")
+    parser.add_argument("--workers", type=int, default=1, help="concurrent clients")
+    parser.add_argument("--assign-runs", type=int, default=3)
+    parser.add_argument("--scenario", help="room plan, e.g. O-B (default: picked from --users)")
+    parser.add_argument("--memory", action="store_true", help="use in-memory SQLite (forces --workers 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    app = make_app(memory=args.memory)
+    night = ClubNight(
+        app,
+        users=args.users,
+        reconnects=args.reconnects,
+        workers=1 if args.memory else args.workers,
+        scenario=args.scenario,
+        seed=args.seed,
+    )
+    report = night.run(assign_runs=args.assign_runs)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
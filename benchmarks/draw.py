@@ -0,0 +1,153 @@
+"""Time tournament draws for growing numbers of teams.
+
+For each team count a tournament is set up on a throw-away in-memory
+SQLite database and every round is drawn with ``generate_round`` (the
+admin "Draw Round" action), then given random BP results and finalized.
+The report lists per team count the time of the draw alone
+(``draw_round``, the assignment solve), the time and SQL queries of the
+whole round generation, and how evenly the positions were rotated.
+
+    python benchmarks/draw.py                      # 50, 100 and 400 teams
+    python benchmarks/draw.py --teams 100 --rounds 9 --json draw.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from club_night import make_app
+
+RANKS = (1, 2, 3, 4)
+
+
+def setup_tournament(teams, rounds, judges):
+    from app.extensions import db
+    from app.models import Tournament, TournamentAdjudicator, TournamentTeam, User
+
+    users = [
+        User(first_name=f"Speaker{i}", email=f"speaker{i}@example.com", password="-",
+             judge_skill="Cant judge")
+        for i in range(2 * teams)
+    ]
+    users += [
+        User(first_name=f"Judge{i}", email=f"judge{i}@example.com", password="-",
+             judge_skill="Chair" if i % 2 == 0 else "Wing")
+        for i in range(judges)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+    tournament = Tournament(title=f"Open {teams}", rounds=rounds)
+    for i in range(teams):
+        tournament.teams.append(
+            TournamentTeam(name=f"Team {i + 1}", speaker_1_id=users[2 * i].id,
+                           speaker_2_id=users[2 * i + 1].id)
+        )
+    for user in users[2 * teams:]:
+        tournament.adjudicators.append(TournamentAdjudicator(user_id=user.id))
+    db.session.add(tournament)
+    db.session.commit()
+    return tournament
+
+
+def play_round(debates, rng):
+    """Random ranks for every room, then mark the rooms finalized."""
+    from app.extensions import db
+    from app.logic import lifecycle
+    from app.models import BpRank
+
+    for debate in debates:
+        ranks = list(RANKS)
+        rng.shuffle(ranks)
+        for position, rank in zip(("OG", "OO", "CG", "CO"), ranks):
+            db.session.add(BpRank(debate_id=debate.id, team=position, rank=rank))
+        debate.finalized_rooms = 1
+        lifecycle.transition(debate, lifecycle.FINALIZED)
+    db.session.commit()
+
+
+def run(app, teams, rounds, seed):
+    from app.extensions import db
+    from app.logic import draw
+    from app.profiling import count_queries
+
+    rng = random.Random(seed)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        tournament = setup_tournament(teams, rounds, judges=teams // 2)
+        solve_ms, generate_ms, queries = [], [], []
+        for _ in range(rounds):
+            # the solve alone, on the standings the round is drawn from
+            table = draw.standings(tournament)
+            entries = [(table[t.id], t.swing) for t in tournament.teams]
+            if len(entries) % 4 == 0:
+                started = time.perf_counter()
+                draw.draw_round(entries, random.Random(seed))
+                solve_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            with count_queries() as statements:
+                number, debates = draw.generate_round(tournament, rng)
+                db.session.commit()
+            generate_ms.append((time.perf_counter() - started) * 1000)
+            queries.append(len(statements))
+            play_round(debates, rng)
+
+        table = draw.standings(tournament)
+        worst = max(max(s.positions) for s in table.values())
+        return {
+            "teams": teams,
+            "rooms": len(debates),
+            "rounds": rounds,
+            "swing_teams": sum(t.swing for t in tournament.teams),
+            "solve_p50_ms": statistics.median(solve_ms) if solve_ms else None,
+            "solve_max_ms": max(solve_ms) if solve_ms else None,
+            "generate_p50_ms": statistics.median(generate_ms),
+            "generate_max_ms": max(generate_ms),
+            "queries_per_round": max(queries),
+            "most_rounds_in_one_position": worst,
+        }
+
+
+def print_report(rows):
+    header = (
+        f"{'teams':>6}{'rooms':>7}{'swings':>8}{'solve p50':>11}{'solve max':>11}"
+        f"{'round p50':>11}{'round max':>11}{'queries':>9}{'same pos':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        solve_p50 = row["solve_p50_ms"] if row["solve_p50_ms"] is not None else float("nan")
+        solve_max = row["solve_max_ms"] if row["solve_max_ms"] is not None else float("nan")
+        print(
+            f"{row['teams']:>6}{row['rooms']:>7}{row['swing_teams']:>8}"
+            f"{solve_p50:>11.1f}{solve_max:>11.1f}"
+            f"{row['generate_p50_ms']:>11.1f}{row['generate_max_ms']:>11.1f}"
+            f"{row['queries_per_round']:>9}{row['most_rounds_in_one_position']:>10}"
+        )
+    print("times in ms; 'same pos' is the most rounds any team spent in one position")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, nargs="+", default=[50, 100, 400])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    app = make_app(memory=True)
+    rows = [run(app, teams, args.rounds, args.seed) for teams in args.teams]
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Socket latency while a burst of logins hashes passwords.
+
+Replays the start-of-evening login wave against an eventlet hub like the one
+started by start.py: an echo socket is pinged every few milliseconds while
+N concurrent logins verify their password, once with Werkzeug called inline
+and once through app.passwords' bounded native thread pool.
+
+    python benchmarks/password_burst.py --logins 100
+
+Requires eventlet.
+"""
+import eventlet
+
+eventlet.monkey_patch()
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from werkzeug.security import check_password_hash
+
+from app import create_app
+from app.passwords import hash_password, verify_password
+
+PING_INTERVAL = 0.005
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def echo_server(sock):
+    while True:
+        conn, _ = sock.accept()
+        eventlet.spawn(_echo, conn)
+
+
+def _echo(conn):
+    while True:
+        data = conn.recv(16)
+        if not data:
+            return
+        conn.sendall(data)
+
+
+def run_burst(app, verify, pwhash, logins):
+    server = eventlet.listen(("127.0.0.1", 0))
+    server_gt = eventlet.spawn(echo_server, server)
+    client = eventlet.connect(server.getsockname())
+    rtts = []
+    done = []
+
+    def pinger():
+        # latency = time from when the ping was due until its echo arrived,
+        # so a blocked hub shows up even if no ping was in flight
+        due = time.perf_counter()
+        while not done:
+            client.sendall(b"x")
+            client.recv(16)
+            rtts.append(time.perf_counter() - due)
+            due = time.perf_counter() + PING_INTERVAL
+            eventlet.sleep(PING_INTERVAL)
+
+    def login():
+        with app.app_context():
+            assert verify(pwhash, "secret")
+
+    ping_gt = eventlet.spawn(pinger)
+    eventlet.sleep(0.05)  # baseline pings before the wave
+    start = time.perf_counter()
+    pool = eventlet.GreenPool(logins)
+    for _ in range(logins):
+        pool.spawn(login)
+    pool.waitall()
+    elapsed = time.perf_counter() - start
+    done.append(True)
+    ping_gt.wait()
+    server_gt.kill()
+    client.close()
+    server.close()
+    return elapsed, rtts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--method", default=None, help="e.g. scrypt:32768:8:1")
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.workers:
+        app.config["PASSWORD_HASH_WORKERS"] = args.workers
+    if args.method:
+        app.config["PASSWORD_HASH_METHOD"] = args.method
+    with app.app_context():
+        pwhash = hash_password("secret")
+
+    print(
+        f"{args.logins} logins, method {pwhash.split('$', 1)[0]}, "
+        f"{app.config['PASSWORD_HASH_WORKERS']} hash workers"
+    )
+    print(f"{'mode':<8}{'burst s':>10}{'latency p50 ms':>17}{'p95 ms':>10}{'max ms':>10}")
+    for name, verify in (("inline", check_password_hash), ("pool", verify_password)):
+        elapsed, rtts = run_burst(app, verify, pwhash, args.logins)
+        print(
+            f"{name:<8}{elapsed:>10.2f}"
+            f"{percentile(rtts, 50) * 1000:>17.1f}"
+            f"{percentile(rtts, 95) * 1000:>10.1f}"
+            f"{max(rtts) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,63 @@ class Config:
     PORT = int(os.getenv("PORT", 5000))
     SERVER_NAME = os.getenv("SERVER_NAME", "example.com")
     PREFERRED_URL_SCHEME = os.getenv("PREFERRED_URL_SCHEME", "http")
+    # "eventlet", "threading", ... ; None lets Flask-SocketIO pick the best
+    # installed server, which imports eventlet even when it is not used
+    SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE") or None
+
+    # Request profiling: Server-Timing headers (always on in debug mode) and
+    # warnings for requests/queries over budget. 0 disables a budget.
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "False").lower() in ("true", "1")
+    REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", 30))
+    REQUEST_TIME_BUDGET_MS = int(os.getenv("REQUEST_TIME_BUDGET_MS", 500))
+    SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", 100))
+
+    # /metrics: with a directory set, every worker process writes its numbers
+    # there and a scrape of any worker returns the sum over all of them
+    METRICS_DIR = os.getenv("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+    # Scrapers send "Authorization: Bearer <METRICS_TOKEN>" or connect from one
+    # of the comma separated METRICS_ALLOWED_IPS; admins can always look
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_ALLOWED_IPS = [
+        ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "").split(",") if ip.strip()
+    ]
+
+    # gzip/brotli for text and JSON responses of at least this many bytes
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 500))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+
+    # Seconds a process trusts its cached id of the current (single active)
+    # debate; commits changing a debate's state drop it immediately
+    CURRENT_DEBATE_TTL = int(os.getenv("CURRENT_DEBATE_TTL", 5))
+
+    # Broadcast Socket.IO events kept per worker for reconnecting clients
+    SOCKET_EVENT_LOG_SIZE = int(os.getenv("SOCKET_EVENT_LOG_SIZE", 256))
+    # Open sockets are shared through the database: each worker pushes changed
+    # vote totals every PRESENCE_INTERVAL seconds (0 turns the worker off) and
+    # connections not refreshed for PRESENCE_TTL seconds stop counting
+    PRESENCE_INTERVAL = float(os.getenv("PRESENCE_INTERVAL", 2))
+    PRESENCE_TTL = int(os.getenv("PRESENCE_TTL", 90))
+
+    # Skill used to rank participants for room assignment: Elo counts once
+    # elo_sigma is at most the threshold, blended over a band of SKILL_BLEND
+    # sigma around it (0 switches hard); SKILL_UNCERTAINTY sigmas are
+    # subtracted from the rating
+    SKILL_SIGMA_THRESHOLD = float(os.getenv("SKILL_SIGMA_THRESHOLD", 320))
+    SKILL_BLEND = float(os.getenv("SKILL_BLEND", 0))
+    SKILL_UNCERTAINTY = float(os.getenv("SKILL_UNCERTAINTY", 0))
+
+    # Seconds a logged-in user's identity is served from memory before the
+    # row is reloaded. 0 disables the cache.
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 30))
+    # Minimum seconds between two last_seen writes for the same user
+    LAST_SEEN_INTERVAL = int(os.getenv("LAST_SEEN_INTERVAL", 60))
+
+    # Werkzeug hash method incl. work factors, e.g. "scrypt:32768:8:1" or
+    # "pbkdf2:sha256:600000". Existing hashes are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    # Native threads used for password hashing, bounds concurrent hashes
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
 
     # Email configuration
     MAIL_SERVER = os.getenv("MAIL_SERVER", "localhost")
@@ -22,3 +79,16 @@ class Config:
     MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "False").lower() in ("true", "1")
     MAIL_USE_SSL = os.getenv("MAIL_USE_SSL", "False").lower() in ("true", "1")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "noreply@example.com")
+    MAIL_TIMEOUT = int(os.getenv("MAIL_TIMEOUT", 10))
+
+    # Outbox worker: mails are queued in the database and sent in the background
+    MAIL_WORKER_ENABLED = os.getenv("MAIL_WORKER_ENABLED", "True").lower() in (
+        "true",
+        "1",
+    )
+    MAIL_POLL_INTERVAL = int(os.getenv("MAIL_POLL_INTERVAL", 5))
+    MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", 1))
+    MAIL_IDLE_TIMEOUT = int(os.getenv("MAIL_IDLE_TIMEOUT", 30))
+    MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+    MAIL_RETRY_BASE = int(os.getenv("MAIL_RETRY_BASE", 30))
+    MAIL_LEASE_SECONDS = int(os.getenv("MAIL_LEASE_SECONDS", 300))
@@ -0,0 +1,31 @@
+"""add library_topic
+
+Revision ID: 5c8e2d17b4a9
+Revises: a3e9f07c6d21
+Create Date: 2026-10-19 15:02:41.530718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e2d17b4a9'
+down_revision = 'a3e9f07c6d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('library_topic',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('text', sa.String(length=240), nullable=False),
+    sa.Column('factsheet', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('text')
+    )
+
+
+def downgrade():
+    op.drop_table('library_topic')
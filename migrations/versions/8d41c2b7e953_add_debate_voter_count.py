@@ -0,0 +1,49 @@
+"""add denormalized voter count to debate
+
+Revision ID: 8d41c2b7e953
+Revises: 2f7a1c9e4b10
+Create Date: 2026-10-19 11:02:17.530961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c2b7e953'
+down_revision = '2f7a1c9e4b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('voter_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('topic', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_topic_debate_id'), ['debate_id'], unique=False)
+
+    with op.batch_alter_table('vote', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_vote_topic_id'), ['topic_id'], unique=False)
+
+    # backfill from the votes cast so far
+    op.execute(
+        """
+        UPDATE debate SET voter_count = (
+            SELECT COUNT(DISTINCT vote.user_id)
+            FROM vote JOIN topic ON topic.id = vote.topic_id
+            WHERE topic.debate_id = debate.id
+        )
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('vote', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_vote_topic_id'))
+
+    with op.batch_alter_table('topic', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_topic_debate_id'))
+
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.drop_column('voter_count')
@@ -0,0 +1,32 @@
+"""indexes for admin user search
+
+Revision ID: a3e9f07c6d21
+Revises: 8d41c2b7e953
+Create Date: 2026-10-19 13:40:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e9f07c6d21'
+down_revision = '8d41c2b7e953'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_first_name_lower', 'user', [sa.text('lower(first_name)')], unique=False)
+    op.create_index('ix_user_last_name_lower', 'user', [sa.text('lower(last_name)')], unique=False)
+    op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=False)
+    with op.batch_alter_table('pending_user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_pending_user_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pending_user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pending_user_created_at'))
+    op.drop_index('ix_user_email_lower', table_name='user')
+    op.drop_index('ix_user_last_name_lower', table_name='user')
+    op.drop_index('ix_user_first_name_lower', table_name='user')
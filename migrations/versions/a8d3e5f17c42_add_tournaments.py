@@ -0,0 +1,72 @@
+"""add tournaments with teams, adjudicators and draw positions
+
+Revision ID: a8d3e5f17c42
+Revises: f6b2d94c1e38
+Create Date: 2026-10-19 23:02:41.527310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3e5f17c42'
+down_revision = 'f6b2d94c1e38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tournament',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=140), nullable=False),
+    sa.Column('rounds', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('tournament_team',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tournament_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=80), nullable=False),
+    sa.Column('speaker_1_id', sa.Integer(), nullable=True),
+    sa.Column('speaker_2_id', sa.Integer(), nullable=True),
+    sa.Column('swing', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['speaker_1_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['speaker_2_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['tournament_id'], ['tournament.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tournament_id', 'name', name='tournament_team_name_uc')
+    )
+    op.create_table('tournament_adjudicator',
+    sa.Column('tournament_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tournament_id'], ['tournament.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('tournament_id', 'user_id')
+    )
+    op.create_table('draw_position',
+    sa.Column('debate_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.String(length=2), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('tournament_id', sa.Integer(), nullable=False),
+    sa.Column('round', sa.Integer(), nullable=False),
+    sa.Column('room', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['debate_id'], ['debate.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['tournament_team.id'], ),
+    sa.ForeignKeyConstraint(['tournament_id'], ['tournament.id'], ),
+    sa.PrimaryKeyConstraint('debate_id', 'position')
+    )
+    with op.batch_alter_table('draw_position', schema=None) as batch_op:
+        batch_op.create_index('ix_draw_position_team_id', ['team_id'], unique=False)
+        batch_op.create_index('ix_draw_position_tournament_round', ['tournament_id', 'round'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('draw_position', schema=None) as batch_op:
+        batch_op.drop_index('ix_draw_position_tournament_round')
+        batch_op.drop_index('ix_draw_position_team_id')
+
+    op.drop_table('draw_position')
+    op.drop_table('tournament_adjudicator')
+    op.drop_table('tournament_team')
+    op.drop_table('tournament')
@@ -0,0 +1,64 @@
+"""add factsheet_hash to topic and library_topic
+
+Revision ID: b71f4e0a9c35
+Revises: 5c8e2d17b4a9
+Create Date: 2026-10-19 16:11:27.904512
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71f4e0a9c35'
+down_revision = '5c8e2d17b4a9'
+branch_labels = None
+depends_on = None
+
+
+def _backfill(table_name):
+    conn = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        sa.column('factsheet', sa.Text),
+        sa.column('factsheet_hash', sa.String),
+    )
+    rows = conn.execute(
+        sa.select(table.c.id, table.c.factsheet).where(table.c.factsheet.isnot(None))
+    ).all()
+    updates = [
+        {'row_id': row_id, 'digest': hashlib.sha256(text.encode('utf-8')).hexdigest()}
+        for row_id, text in rows
+        if text
+    ]
+    if updates:
+        conn.execute(
+            table.update()
+            .where(table.c.id == sa.bindparam('row_id'))
+            .values(factsheet_hash=sa.bindparam('digest')),
+            updates,
+        )
+
+
+def upgrade():
+    with op.batch_alter_table('topic', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('factsheet_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_topic_factsheet_hash'), ['factsheet_hash'], unique=False)
+
+    with op.batch_alter_table('library_topic', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('factsheet_hash', sa.String(length=64), nullable=True))
+
+    _backfill('topic')
+    _backfill('library_topic')
+
+
+def downgrade():
+    with op.batch_alter_table('library_topic', schema=None) as batch_op:
+        batch_op.drop_column('factsheet_hash')
+
+    with op.batch_alter_table('topic', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_topic_factsheet_hash'))
+        batch_op.drop_column('factsheet_hash')
@@ -0,0 +1,42 @@
+"""add debate.state lifecycle column
+
+Revision ID: c4d93a6e1f08
+Revises: b71f4e0a9c35
+Create Date: 2026-10-19 17:24:53.661907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d93a6e1f08'
+down_revision = 'b71f4e0a9c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('state', sa.String(length=16), server_default='voting', nullable=False))
+        batch_op.create_index(batch_op.f('ix_debate_state'), ['state'], unique=False)
+
+    # derive the state from the legacy flags
+    op.execute(
+        """
+        UPDATE debate SET state = CASE
+            WHEN assignment_complete AND finalized_rooms >= rooms THEN 'finalized'
+            WHEN assignment_complete AND finalized_rooms > 0 THEN 'running'
+            WHEN assignment_complete THEN 'assigned'
+            WHEN second_voting_open THEN 'runoff'
+            WHEN voting_open THEN 'voting'
+            ELSE 'closed'
+        END
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_debate_state'))
+        batch_op.drop_column('state')
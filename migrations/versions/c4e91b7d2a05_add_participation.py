@@ -0,0 +1,114 @@
+"""move judging and free speech preferences to per-debate participation
+
+Revision ID: c4e91b7d2a05
+Revises: a8d3e5f17c42
+Create Date: 2026-10-20 09:14:06.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# expression indexes from a3e9f07c6d21; batch mode cannot reflect them, so a
+# rebuild of the user table drops them and they are created again after it
+SEARCH_INDEXES = (
+    ('ix_user_first_name_lower', 'lower(first_name)'),
+    ('ix_user_last_name_lower', 'lower(last_name)'),
+    ('ix_user_email_lower', 'lower(email)'),
+)
+
+
+# lightweight tables for the data moves; Core quotes "user" and renders
+# false() for the dialect, so the statements also run on PostgreSQL
+user = sa.table('user', sa.column('id'), sa.column('prefer_judging', sa.Boolean),
+                sa.column('prefer_free', sa.Boolean))
+participation = sa.table('participation', sa.column('debate_id'), sa.column('user_id'),
+                         sa.column('prefer_judging', sa.Boolean),
+                         sa.column('prefer_free', sa.Boolean), sa.column('checked_in_at'))
+vote = sa.table('vote', sa.column('user_id'), sa.column('topic_id'))
+topic = sa.table('topic', sa.column('id'), sa.column('debate_id'))
+debate = sa.table('debate', sa.column('id'))
+
+
+def latest_debate_id():
+    return sa.select(sa.func.max(debate.c.id)).scalar_subquery()
+
+
+def drop_search_indexes():
+    for name, _ in SEARCH_INDEXES:
+        op.drop_index(name, table_name='user', if_exists=True)
+
+
+def create_search_indexes():
+    for name, expression in SEARCH_INDEXES:
+        op.create_index(name, 'user', [sa.text(expression)], unique=False)
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e91b7d2a05'
+down_revision = 'a8d3e5f17c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('participation',
+    sa.Column('debate_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('prefer_judging', sa.Boolean(), nullable=False),
+    sa.Column('prefer_free', sa.Boolean(), nullable=False),
+    sa.Column('checked_in_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['debate_id'], ['debate.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('debate_id', 'user_id')
+    )
+
+    # everybody who voted in a debate was in its pool
+    op.execute(participation.insert().from_select(
+        ['debate_id', 'user_id', 'prefer_judging', 'prefer_free', 'checked_in_at'],
+        sa.select(topic.c.debate_id, vote.c.user_id, sa.false(), sa.false(),
+                  sa.func.current_timestamp())
+        .select_from(vote.join(topic, topic.c.id == vote.c.topic_id))
+        .distinct()
+    ))
+
+    # the global flags only ever applied to the latest debate
+    def user_flag(column):
+        return sa.func.coalesce(
+            sa.select(user.c[column])
+            .where(user.c.id == participation.c.user_id)
+            .scalar_subquery(),
+            sa.false(),
+        )
+
+    op.execute(
+        participation.update()
+        .where(participation.c.debate_id == latest_debate_id())
+        .values(prefer_judging=user_flag('prefer_judging'), prefer_free=user_flag('prefer_free'))
+    )
+
+    drop_search_indexes()
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('prefer_free')
+        batch_op.drop_column('prefer_judging')
+    create_search_indexes()
+
+
+def downgrade():
+    drop_search_indexes()
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('prefer_judging', sa.Boolean(), nullable=True))
+        batch_op.add_column(sa.Column('prefer_free', sa.Boolean(), nullable=True))
+    create_search_indexes()
+
+    def participation_flag(column):
+        return (
+            sa.select(participation.c[column])
+            .where(participation.c.user_id == user.c.id,
+                   participation.c.debate_id == latest_debate_id())
+            .scalar_subquery()
+        )
+
+    op.execute(user.update().values(prefer_judging=participation_flag('prefer_judging'),
+                                    prefer_free=participation_flag('prefer_free')))
+    op.drop_table('participation')
@@ -0,0 +1,34 @@
+"""store chair feedback on wing judges per debate
+
+Revision ID: d2f07a9c5b31
+Revises: c4e91b7d2a05
+Create Date: 2026-10-20 10:41:52.903164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f07a9c5b31'
+down_revision = 'c4e91b7d2a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('judge_feedback',
+    sa.Column('debate_id', sa.Integer(), nullable=False),
+    sa.Column('judge_id', sa.Integer(), nullable=False),
+    sa.Column('given_by_id', sa.Integer(), nullable=True),
+    sa.Column('rating', sa.String(length=8), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['debate_id'], ['debate.id'], ),
+    sa.ForeignKeyConstraint(['given_by_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['judge_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('debate_id', 'judge_id')
+    )
+
+
+def downgrade():
+    op.drop_table('judge_feedback')
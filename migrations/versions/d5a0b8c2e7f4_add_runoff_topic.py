@@ -0,0 +1,76 @@
+"""replace debate.second_voting_topics with runoff_topic
+
+Revision ID: d5a0b8c2e7f4
+Revises: c4d93a6e1f08
+Create Date: 2026-10-19 18:05:12.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a0b8c2e7f4'
+down_revision = 'c4d93a6e1f08'
+branch_labels = None
+depends_on = None
+
+
+debate = sa.table(
+    'debate',
+    sa.column('id', sa.Integer),
+    sa.column('second_voting_topics', sa.String),
+)
+topic = sa.table('topic', sa.column('id', sa.Integer), sa.column('debate_id', sa.Integer))
+runoff_topic = sa.table(
+    'runoff_topic', sa.column('debate_id', sa.Integer), sa.column('topic_id', sa.Integer)
+)
+
+
+def upgrade():
+    op.create_table('runoff_topic',
+    sa.Column('debate_id', sa.Integer(), nullable=False),
+    sa.Column('topic_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['debate_id'], ['debate.id'], ),
+    sa.ForeignKeyConstraint(['topic_id'], ['topic.id'], ),
+    sa.PrimaryKeyConstraint('debate_id', 'topic_id')
+    )
+
+    conn = op.get_bind()
+    existing = set(conn.execute(sa.select(topic.c.debate_id, topic.c.id)).all())
+    rows = []
+    for debate_id, ids in conn.execute(
+        sa.select(debate.c.id, debate.c.second_voting_topics).where(
+            debate.c.second_voting_topics.isnot(None)
+        )
+    ):
+        for tid in {int(t) for t in ids.split(',') if t.strip().isdigit()}:
+            if (debate_id, tid) in existing:
+                rows.append({'debate_id': debate_id, 'topic_id': tid})
+    if rows:
+        op.bulk_insert(runoff_topic, rows)
+
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.drop_column('second_voting_topics')
+
+
+def downgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('second_voting_topics', sa.VARCHAR(), nullable=True))
+
+    conn = op.get_bind()
+    tied = {}
+    for debate_id, topic_id in conn.execute(
+        sa.select(runoff_topic.c.debate_id, runoff_topic.c.topic_id).order_by(
+            runoff_topic.c.debate_id, runoff_topic.c.topic_id
+        )
+    ):
+        tied.setdefault(debate_id, []).append(str(topic_id))
+    for debate_id, ids in tied.items():
+        conn.execute(
+            debate.update()
+            .where(debate.c.id == debate_id)
+            .values(second_voting_topics=','.join(ids))
+        )
+
+    op.drop_table('runoff_topic')
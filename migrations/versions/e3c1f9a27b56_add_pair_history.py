@@ -0,0 +1,38 @@
+"""add pair_history for repeat pairing avoidance
+
+Revision ID: e3c1f9a27b56
+Revises: d5a0b8c2e7f4
+Create Date: 2026-10-19 20:41:07.118265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3c1f9a27b56'
+down_revision = 'd5a0b8c2e7f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pair_history',
+    sa.Column('user_a', sa.Integer(), nullable=False),
+    sa.Column('user_b', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=8), nullable=False),
+    sa.Column('weight', sa.Float(), nullable=False),
+    sa.Column('last_debate_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_a'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['user_b'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_a', 'user_b', 'kind')
+    )
+    with op.batch_alter_table('pair_history', schema=None) as batch_op:
+        batch_op.create_index('ix_pair_history_user_b', ['user_b'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pair_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_pair_history_user_b')
+
+    op.drop_table('pair_history')
@@ -0,0 +1,33 @@
+"""record synced judging operations for idempotent offline sync
+
+Revision ID: e5a1c8f3d947
+Revises: d2f07a9c5b31
+Create Date: 2026-10-20 13:27:18.660452
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a1c8f3d947'
+down_revision = 'd2f07a9c5b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('client_op',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('op_id', sa.String(length=64), nullable=False),
+    sa.Column('debate_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('applied_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['debate_id'], ['debate.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'op_id')
+    )
+
+
+def downgrade():
+    op.drop_table('client_op')
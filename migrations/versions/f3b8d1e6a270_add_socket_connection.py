@@ -0,0 +1,37 @@
+"""share open socket connections between worker processes
+
+Revision ID: f3b8d1e6a270
+Revises: e5a1c8f3d947
+Create Date: 2026-10-21 10:02:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1e6a270'
+down_revision = 'e5a1c8f3d947'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('socket_connection',
+    sa.Column('sid', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('seen_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('sid')
+    )
+    with op.batch_alter_table('socket_connection', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_socket_connection_seen_at'), ['seen_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_socket_connection_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('socket_connection', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_socket_connection_user_id'))
+        batch_op.drop_index(batch_op.f('ix_socket_connection_seen_at'))
+
+    op.drop_table('socket_connection')
@@ -0,0 +1,59 @@
+"""add user.language_mask
+
+Revision ID: f6b2d94c1e38
+Revises: e3c1f9a27b56
+Create Date: 2026-10-19 21:34:52.660417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b2d94c1e38'
+down_revision = 'e3c1f9a27b56'
+branch_labels = None
+depends_on = None
+
+
+user = sa.table(
+    'user',
+    sa.column('id', sa.Integer),
+    sa.column('languages', sa.String),
+    sa.column('language_mask', sa.Integer),
+)
+
+# bit i is app.models.LANGUAGES[i] at the time of this migration
+LANGUAGE_BITS = {'german': 0, 'deutsch': 0, 'english': 1, 'englisch': 1}
+
+
+def mask_of(languages):
+    mask = 0
+    for name in (languages or '').split(','):
+        bit = LANGUAGE_BITS.get(name.strip().lower())
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('language_mask', sa.Integer(), nullable=False, server_default='0')
+        )
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(user.c.id, user.c.languages).where(user.c.languages.isnot(None))
+    ).all()
+    for user_id, languages in rows:
+        mask = mask_of(languages)
+        if mask:
+            conn.execute(
+                user.update().where(user.c.id == user_id).values(language_mask=mask)
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('language_mask')
@@ -20,8 +20,7 @@ function createButton() {
 
 global.document = { addEventListener: () => {}, getElementById: () => null };
 global.window = {};
-global.io = () => ({ on: () => {} });
-global.fetch = () => Promise.resolve({ json: () => Promise.resolve({ assignments: [] }) });
+global.io = () => ({ on: () => {}, onAny: () => {}, emit: () => {} });
 
 const code = fs.readFileSync('app/static/js/dashboard.js', 'utf8');
 vm.runInThisContext(code);
@@ -40,14 +39,12 @@ async function runScenario(preferJudging, expected) {
     currentDebateStyle: 'OPD',
     preferJudging: preferJudging
   };
-  global.fetch = () => Promise.resolve({
-    json: () => Promise.resolve({
-      assignments: [
-        { role: 'Free-1', room: 1 },
-        { role: 'Judge-Wing', room: 1 }
-      ]
-    })
-  });
+  live.assignments = {
+    assignments: [
+      { role: 'Free-1', room: 1 },
+      { role: 'Judge-Wing', room: 1 }
+    ]
+  };
   updateJoinLaterAvailability();
   await new Promise(r => setTimeout(r, 0));
   const text = btn.textContent.trim();
@@ -0,0 +1,136 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db, utils
+from app.models import Debate, Topic, User, Vote
+from app.profiling import assert_max_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def create_user(idx, **kwargs):
+    user = User(
+        first_name=f'User{idx}',
+        last_name='Test',
+        email=f'user{idx}@example.com',
+        password='pw',
+        date_joined_choice='first',
+        **kwargs,
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def create_debate(title, topics=2, **kwargs):
+    debate = Debate(title=title, style='OPD', **kwargs)
+    db.session.add(debate)
+    db.session.flush()
+    db.session.add_all(Topic(debate_id=debate.id, text=f'{title} topic {i}') for i in range(topics))
+    db.session.commit()
+    return debate
+
+
+@pytest.mark.parametrize('debates', [3, 30])
+def test_dashboard_query_count_does_not_grow_with_debates(client, debates):
+    admin = create_user(1, is_admin=True)
+    voter = create_user(2)
+    for idx in range(debates):
+        debate = create_debate(f'Debate {idx}')
+        db.session.add(Vote(user_id=voter.id, topic_id=debate.topics[0].id, round=1))
+    db.session.commit()
+    login(client, admin)
+    client.get('/profile')  # warm the identity cache
+    login(client, admin)
+
+    with assert_max_queries(4):
+        resp = client.get('/admin')
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True).count('data-debate-id=') == min(debates, 20)
+
+
+def test_dashboard_is_paginated_newest_first(client):
+    admin = create_user(1, is_admin=True)
+    for idx in range(25):
+        create_debate(f'Debate {idx:02d}', topics=0)
+    login(client, admin)
+
+    first = client.get('/admin').get_data(as_text=True)
+    second = client.get('/admin?page=2').get_data(as_text=True)
+    assert 'Debate 24' in first and 'Debate 04' not in first
+    assert 'Debate 04' in second and 'Debate 24' not in second
+
+
+def test_voter_count_follows_votes(client):
+    debate = create_debate('Club', topics=3, active=True, voting_open=True)
+    admin = create_user(1, is_admin=True)
+    voters = [create_user(10 + i) for i in range(3)]
+
+    for user in voters:
+        login(client, user)
+        for topic in debate.topics[:2]:
+            client.post(f'/debate/{debate.id}', data={'topic_id': topic.id})
+    db.session.refresh(debate)
+    assert debate.voter_count == 3
+
+    # votes on a deleted topic no longer count
+    only_third = debate.topics[2]
+    login(client, voters[0])
+    db.session.add(Vote(user_id=create_user(20).id, topic_id=only_third.id, round=1))
+    db.session.commit()
+    login(client, admin)
+    client.post(f'/admin/topic/{only_third.id}/delete')
+    db.session.refresh(debate)
+    assert debate.voter_count == 3
+
+
+def test_concurrent_first_votes_count_once(client, monkeypatch):
+    debate = create_debate('Club', topics=2, active=True, voting_open=True)
+    user = create_user(1)
+    first, second = debate.topics
+
+    real_check_in = utils.check_in
+
+    def check_in(debate_id, user_id):
+        # the same user's vote from another tab lands after this request's checks
+        db.session.add(Vote(user_id=user_id, topic_id=second.id, round=1))
+        db.session.flush()
+        utils.count_new_voter(debate_id, user_id, Vote.query.filter_by(topic_id=second.id).one().id)
+        return real_check_in(debate_id, user_id)
+
+    monkeypatch.setattr(utils, 'check_in', check_in)
+    login(client, user)
+    assert utils.cast_vote(debate, user, first.id)[0]
+    db.session.refresh(debate)
+    assert debate.voter_count == 1
@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.logic import lifecycle
+from app.logic.assign import Participant, assign_dynamic, load_participants
+from app.models import Debate, SpeakerSlot, Topic, User, Vote
+from app.profiling import count_queries
+from app.utils import check_in
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def closed_debate_with_voters(n):
+    debate = Debate(title='Night', style='OPD', active=True, voting_open=False,
+                    state=lifecycle.CLOSED, assignment_mode='Random')
+    db.session.add(debate)
+    db.session.flush()
+    topic = Topic(debate_id=debate.id, text='T')
+    db.session.add(topic)
+    db.session.flush()
+    for i in range(n):
+        user = User(first_name=f'User{i}', last_name='Test', email=f'user{i}@example.com',
+                    password='pw', date_joined_choice='first', languages='German, English',
+                    judge_skill='Chair' if i < 3 else 'Wing', debate_skill='Beginner')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Vote(user_id=user.id, topic_id=topic.id, round=1))
+        check_in(debate.id, user.id)
+    db.session.commit()
+    return debate
+
+
+def test_participants_are_detached_rows(app):
+    debate = closed_debate_with_voters(2)
+    participants = load_participants(debate)
+    assert all(isinstance(p, Participant) for p in participants)
+    first = participants[0]
+    assert first.judge_skill == 'Chair'
+    assert first.languages == 0b11
+    assert (first.bp_skill, first.opd_skill) == (850.0, 40.0)
+
+
+def test_assignment_touches_users_once_and_inserts_once(app):
+    debate = closed_debate_with_voters(27)
+    with count_queries() as statements:
+        participants = load_participants(debate)
+        ok, msg = assign_dynamic(debate, participants, scenario='O-O-B')
+    assert ok, msg
+
+    user_reads = [s for s in statements if 'FROM user' in s]
+    inserts = [s for s in statements if s.startswith('INSERT INTO speaker_slot')]
+    assert len(user_reads) == 1
+    assert len(inserts) == 1
+    assert SpeakerSlot.query.filter_by(debate_id=debate.id).count() == 27
+    assert debate.rooms == 3
+    assert debate.state == lifecycle.ASSIGNED
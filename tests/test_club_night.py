@@ -0,0 +1,64 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+from club_night import PASSWORD, ClubNight, Recorder, make_app, pick_scenario, redirect_ok
+
+
+def test_pick_scenario_mixes_room_types():
+    assert pick_scenario(18) == 'O-B'
+    assert pick_scenario(6) is None
+
+
+def test_small_club_night_runs_clean():
+    app = make_app()
+    report = ClubNight(app, users=18, reconnects=1).run()
+
+    phases = report['phases']
+    assert set(phases) == {
+        'login', 'dashboard', 'connect', 'vote', 'reconnect', 'close_voting',
+        'assign', 'judging_page', 'judging', 'finalize',
+    }
+    assert all(row['errors'] == 0 for row in phases.values())
+    assert phases['vote']['requests'] == 36
+    assert report['rooms_finalized'] == '2/2'
+    assert report['socket_events']['vote_update'] > 0
+    assert report['socket_events']['snapshot'] == 18
+
+
+def test_failed_actions_that_redirect_count_as_errors():
+    app = make_app()
+    night = ClubNight(app, users=18)
+    night.setup()
+    with app.app_context():
+        from app.extensions import db
+        recorder = Recorder(db.engine)
+    client = app.test_client()
+    try:
+        # a wrong password renders the form again, finalizing an open debate redirects
+        recorder.request(
+            'login',
+            lambda: client.post('/login', data={'email': night.admin_email, 'password': 'nope'}),
+            redirect_ok(client),
+        )
+        recorder.request(
+            'login',
+            lambda: client.post('/login', data={'email': night.admin_email, 'password': PASSWORD}),
+            redirect_ok(client),
+        )
+        resp = recorder.request(
+            'finalize',
+            lambda: client.post(f'/debate/{night.debate_id}/finalize/1'),
+            redirect_ok(client),
+        )
+    finally:
+        recorder.close()
+
+    assert resp.status_code == 302
+    phases = recorder.summary()
+    assert phases['login']['requests'] == 2
+    assert phases['login']['errors'] == 1
+    assert phases['finalize']['errors'] == 1
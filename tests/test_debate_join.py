@@ -4,8 +4,8 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
-from app import create_app, db
-from app.models import User, Debate, SpeakerSlot
+from app import create_app, db, socketio
+from app.models import User, Debate, Participation, SpeakerSlot
 
 
 @pytest.fixture
@@ -35,21 +35,22 @@ def login(client, user):
         sess['_fresh'] = True
 
 
-def create_user(idx, judge_skill='Cant judge', prefer_judging=False):
+def create_user(idx, judge_skill='Cant judge'):
     user = User(
         first_name=f'User{idx}',
         last_name='Test',
         email=f'user{idx}@example.com',
         password='pw',
         judge_skill=judge_skill,
-        prefer_judging=prefer_judging,
     )
     db.session.add(user)
     db.session.commit()
     return user
 
 
-def test_join_assigns_free_slot_after_judges_filled(client):
+def test_join_assigns_free_slot_after_judges_filled(client, monkeypatch):
+    sent = []
+    monkeypatch.setattr(socketio, 'emit', lambda event, data=None, **kw: sent.append((event, data)))
     gov = create_user(1)
     opp = create_user(2)
     free1_user = create_user(3)
@@ -81,6 +82,13 @@ def test_join_assigns_free_slot_after_judges_filled(client):
     assert slot.role == 'Free-2'
     assert slot.room == 1
 
+    # dashboards find the new slot in the event instead of asking for a snapshot
+    [(event, payload)] = sent
+    assert event == 'assignments_ready'
+    slots = payload['assignments']['assignments']
+    assert {'role': 'Free-2', 'room': 1, 'user_id': joiner.id} in [
+        {k: a[k] for k in ('role', 'room', 'user_id')} for a in slots]
+
 
 def test_join_assigns_judge_when_needed(client):
     gov = create_user(1)
@@ -122,11 +130,13 @@ def test_join_prefers_judge_when_flagged(client):
     opp = create_user(2)
     free1 = create_user(3)
     chair = create_user(4, judge_skill='Chair')
-    joiner = create_user(5, judge_skill='Wing', prefer_judging=True)
+    joiner = create_user(5, judge_skill='Wing')
 
     debate = Debate(title='Debate', style='OPD', active=True)
     db.session.add(debate)
     db.session.commit()
+    db.session.add(Participation(debate_id=debate.id, user_id=joiner.id, prefer_judging=True))
+    db.session.commit()
 
     db.session.add_all([
         SpeakerSlot(debate_id=debate.id, user_id=gov.id, role='Gov', room=1),
@@ -185,11 +195,13 @@ def test_join_prefer_judge_even_with_two_judges(client):
     free1 = create_user(3)
     chair = create_user(4, judge_skill='Chair')
     wing1 = create_user(5, judge_skill='Wing')
-    joiner = create_user(6, judge_skill='Wing', prefer_judging=True)
+    joiner = create_user(6, judge_skill='Wing')
 
     debate = Debate(title='Debate', style='OPD', active=True)
     db.session.add(debate)
     db.session.commit()
+    db.session.add(Participation(debate_id=debate.id, user_id=joiner.id, prefer_judging=True))
+    db.session.commit()
 
     db.session.add_all([
         SpeakerSlot(debate_id=debate.id, user_id=gov.id, role='Gov', room=1),
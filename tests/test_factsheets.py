@@ -0,0 +1,129 @@
+import gzip
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+from werkzeug.datastructures import Accept
+
+from app import compression, create_app, db
+from app.logic import lifecycle
+from app.models import Debate, SpeakerSlot, Topic, User, Vote, factsheet_hash
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def setup_debate(client, factsheet='Background ' * 400):
+    user = User(first_name='A', last_name='B', email='a@example.com',
+                password='pw', date_joined_choice='first', is_admin=True)
+    debate = Debate(title='Night', style='OPD')
+    db.session.add_all([user, debate])
+    db.session.flush()
+    topic = Topic(debate_id=debate.id, text='Motion', factsheet=factsheet)
+    db.session.add(topic)
+    db.session.commit()
+    login(client, user)
+    return debate, topic
+
+
+def test_hash_follows_factsheet(client):
+    debate, topic = setup_debate(client)
+    assert topic.factsheet_hash == factsheet_hash(topic.factsheet)
+    topic.factsheet = 'new text'
+    db.session.commit()
+    assert topic.factsheet_hash == factsheet_hash('new text')
+    topic.factsheet = ''
+    assert topic.factsheet_hash is None
+
+    client.post(f'/admin/{debate.id}/import_topics', json={'topics': [{'text': 'B', 'factsheet': 'fb'}]})
+    imported = Topic.query.filter_by(text='B').one()
+    assert imported.factsheet_hash == factsheet_hash('fb')
+
+
+def test_listing_carries_hash_not_text(client):
+    debate, topic = setup_debate(client)
+    data = client.get(f'/debate/{debate.id}/topics_json').get_json()
+    assert data['topics'] == [{'id': topic.id, 'text': 'Motion', 'factsheet_hash': topic.factsheet_hash}]
+
+
+def test_factsheet_endpoint_is_immutable(client):
+    debate, topic = setup_debate(client)
+    resp = client.get(f'/factsheet/{topic.factsheet_hash}')
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True) == topic.factsheet
+    assert 'immutable' in resp.headers['Cache-Control']
+    assert resp.get_etag()[0] == topic.factsheet_hash
+
+    resp = client.get(f'/factsheet/{topic.factsheet_hash}',
+                      headers={'If-None-Match': f'W/"{topic.factsheet_hash}"'})
+    assert resp.status_code == 304
+    assert client.get('/factsheet/' + '0' * 64).status_code == 404
+
+
+def test_dashboard_references_the_winning_factsheet(client):
+    debate, topic = setup_debate(client)
+    user = User.query.one()
+    debate.active = True
+    debate.state = lifecycle.CLOSED
+    for column, value in lifecycle.FLAGS[lifecycle.CLOSED].items():
+        setattr(debate, column, value)
+    db.session.add_all([
+        Vote(user_id=user.id, topic_id=topic.id, round=1),
+        SpeakerSlot(debate_id=debate.id, user_id=user.id, role='Gov', room=1),
+    ])
+    db.session.commit()
+
+    page = client.get('/').get_data(as_text=True)
+    assert f'data-factsheet-hash="{topic.factsheet_hash}"' in page
+    assert 'Background' not in page
+
+
+def test_responses_are_compressed(client):
+    debate, topic = setup_debate(client)
+    url = f'/factsheet/{topic.factsheet_hash}'
+    resp = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    assert resp.get_etag() == (topic.factsheet_hash, True)
+    assert gzip.decompress(resp.data).decode() == topic.factsheet
+
+    assert 'Content-Encoding' not in client.get(url).headers
+    small = client.get(f'/debate/{debate.id}/topics_json', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_encoding_negotiation(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert compression.choose_encoding(Accept([('br', 1), ('gzip', 1)])) == 'gzip'
+    assert compression.choose_encoding(Accept([('identity', 1)])) is None
+    monkeypatch.setattr(compression, 'brotli', object())
+    assert compression.choose_encoding(Accept([('br', 1), ('gzip', 1)])) == 'br'
+    assert compression.choose_encoding(Accept([('br', 0.5), ('gzip', 1)])) == 'gzip'
@@ -0,0 +1,93 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.logic import feedback, lifecycle
+from app.models import Debate, JudgeFeedback, SpeakerSlot, User
+from app.profiling import count_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+@pytest.mark.parametrize('skill, rating, expected', [
+    ('Cant judge', 'positive', 'Newbie'),
+    ('Newbie', 'positive', 'Wing'),
+    ('Wing', 'positive', 'Wing'),
+    ('Newbie', 'negative', 'Suspended'),
+    ('Wing', 'negative', 'Newbie'),
+    ('Cant judge', 'negative', 'Cant judge'),
+    ('Wing', 'neutral', 'Wing'),
+    ('Chair', 'negative', 'Chair'),
+    ('Suspended', 'positive', 'Suspended'),
+])
+def test_transitions(skill, rating, expected):
+    assert feedback.next_skill(skill, rating) == expected
+
+
+def test_feedback_is_stored_and_applied_in_one_update(app):
+    debate = Debate(title='Night', style='OPD', active=True, rooms=1, finalized_rooms=0,
+                    state=lifecycle.ASSIGNED, **lifecycle.FLAGS[lifecycle.ASSIGNED])
+    db.session.add(debate)
+    users = {}
+    for name, skill in [('chair', 'Chair'), ('newbie', 'Newbie'), ('wing', 'Wing'),
+                        ('novice', 'Cant judge'), ('gov', 'Cant judge'), ('opp', 'Cant judge')]:
+        users[name] = User(first_name=name, email=f'{name}@example.com', password='pw',
+                           judge_skill=skill)
+    db.session.add_all(users.values())
+    db.session.flush()
+    roles = {'chair': 'Judge-Chair', 'newbie': 'Judge-Wing', 'wing': 'Judge-Wing',
+             'novice': 'Judge-Wing', 'gov': 'Gov', 'opp': 'Opp'}
+    db.session.add_all(SpeakerSlot(debate_id=debate.id, user_id=users[name].id, role=role, room=1)
+                       for name, role in roles.items())
+    db.session.commit()
+    ids = {name: user.id for name, user in users.items()}
+
+    phone = app.test_client()
+    login(phone, users['chair'])
+    phone.post(f'/debate/{debate.id}/judging', data={
+        f'feedback_{ids["newbie"]}': 'positive',
+        f'feedback_{ids["wing"]}': 'negative',
+        f'feedback_{ids["novice"]}': 'neutral',
+    })
+    assert JudgeFeedback.query.count() == 3
+
+    # the ratings follow the chair to another device
+    laptop = app.test_client()
+    login(laptop, users['chair'])
+    page = laptop.get(f'/debate/{debate.id}/judging').get_data(as_text=True)
+    assert page.count('checked') == 3
+
+    with count_queries() as statements:
+        laptop.post(f'/debate/{debate.id}/finalize/1')
+    updates = [s for s in statements if s.startswith('UPDATE user SET judge_skill')]
+    assert len(updates) == 1
+    skills = {name: db.session.get(User, uid).judge_skill for name, uid in ids.items()}
+    assert skills == {'chair': 'Chair', 'newbie': 'Wing', 'wing': 'Newbie',
+                      'novice': 'Cant judge', 'gov': 'Cant judge', 'opp': 'Cant judge'}
+    assert db.session.get(Debate, debate.id).state == lifecycle.FINALIZED
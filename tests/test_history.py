@@ -0,0 +1,86 @@
+import os
+import sys
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.logic.assign import Participant, _spread_teams
+from app.logic.history import (
+    HALF_LIFE_DAYS,
+    CooccurrenceIndex,
+    record_room,
+    room_pairs,
+)
+from app.models import PairHistory, User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def slot(user_id, role):
+    return SimpleNamespace(user_id=user_id, role=role)
+
+
+def participant(user_id):
+    return Participant(user_id, 'Wing', 'Beginner', False, False, 850.0, 40.0, frozenset())
+
+
+def test_room_pairs_by_kind():
+    pairs = room_pairs([
+        slot(1, 'Judge-Chair'), slot(2, 'Gov'), slot(3, 'Gov'), slot(4, 'Opp'), slot(5, 'Free-1'),
+    ])
+    assert (2, 3, 'team') in pairs
+    assert (2, 4, 'opponent') in pairs and (4, 5, 'opponent') in pairs
+    assert (1, 2, 'judge') in pairs and (1, 5, 'judge') in pairs
+    assert len(pairs) == 10
+
+
+def test_meetings_are_upserted_once_per_debate_and_decay(app):
+    for i in range(1, 4):
+        db.session.add(User(id=i, first_name=f'U{i}', email=f'u{i}@example.com',
+                            password='pw', date_joined_choice='first'))
+    db.session.commit()
+    room = [slot(1, 'Judge-Chair'), slot(2, 'OG-1'), slot(3, 'OG-2')]
+    today = date(2026, 10, 19)
+
+    record_room(7, room, day=today)
+    record_room(7, room, day=today)  # finalized twice
+    record_room(8, room, day=today)
+    db.session.commit()
+    assert PairHistory.query.count() == 3
+
+    index = CooccurrenceIndex.load([1, 2, 3], day=today)
+    assert index.count(3, 2, 'team') == pytest.approx(2.0)
+    assert index.count(1, 2, 'judge') == pytest.approx(2.0)
+    assert index.penalty(2, 3) > index.penalty(1, 2) > 0
+    assert index.penalty(1, 99) == 0.0
+
+    later = CooccurrenceIndex.load([1, 2, 3], day=today + timedelta(days=HALF_LIFE_DAYS))
+    assert later.count(2, 3, 'team') == pytest.approx(1.0)
+    assert not CooccurrenceIndex.load([2])
+
+
+def test_teams_avoid_previous_partners():
+    a, b, c, d = (participant(i) for i in range(1, 5))
+    history = CooccurrenceIndex([(1, 2, 'team', 1.0), (3, 4, 'team', 1.0)], day=date(2020, 1, 1))
+    teams = _spread_teams([[a, b], [c, d]], history)
+    assert history.group_penalty([u.id for u in teams[0]]) == 0
+    assert history.group_penalty([u.id for u in teams[1]]) == 0
+    # first members keep their position within the team
+    assert {teams[0][0], teams[1][0]} == {a, c}
@@ -0,0 +1,125 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.logic import languages, lifecycle
+from app.logic.assign import assign_dynamic, is_chair, load_participants
+from app.models import Debate, SpeakerSlot, Topic, User, Vote, language_mask
+from app.utils import check_in
+
+DE, EN = 0b01, 0b10
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_language_mask_follows_the_text():
+    assert language_mask('German, english') == DE | EN
+    assert language_mask('Englisch') == EN
+    assert language_mask('Klingon') == 0
+    assert language_mask(None) == 0
+    user = User(first_name='A', email='a@example.com', password='pw', languages='German')
+    assert user.language_mask == DE
+    user.languages = 'English,German'
+    assert user.language_mask == DE | EN
+
+
+def test_feasibility_from_counts():
+    masks = [DE] * 9 + [EN] * 7 + [DE | EN] * 2
+    assert languages.common_language(masks) is None
+    assert languages.common_language([DE, DE | EN, 0]) == 0
+    assert languages.feasible([9, 9], [0, 1], masks)
+    assert not languages.feasible([9, 9], [0, 0], masks)
+    # the English-only speakers don't fit into a room of 7 plus a room of 11
+    assert not languages.feasible([11, 7], [1, 0], masks)
+    assert languages.room_languages([9, 9], masks) in ([0, 1], [1, 0])
+    assert languages.room_languages([9, 9], [DE] * 12 + [EN] * 6) is None
+    # each room needs a chair speaking its language
+    assert not languages.feasible([9, 9], [0, 1], masks, chair_masks=[DE, DE])
+
+
+def test_split_seats_everyone_in_a_language_they_speak():
+    class P:
+        def __init__(self, languages, chair=False):
+            self.languages = languages
+            self.judge_skill = 'Chair' if chair else 'Wing'
+
+    users = [P(DE | EN, chair=True), P(EN, chair=True)] + [P(DE)] * 8 + [P(EN)] * 6 + [P(DE | EN)] * 2
+    groups = languages.split_by_language(users, [9, 9], [0, 1], is_chair)
+    assert sorted(len(g) for g in groups.values()) == [9, 9]
+    for lang, group in groups.items():
+        assert all(u.languages & (1 << lang) for u in group)
+        assert any(is_chair(u) for u in group)
+
+
+def voters(debate, specs):
+    topic = Topic(debate_id=debate.id, text='T')
+    db.session.add(topic)
+    db.session.flush()
+    for i, (langs, judge) in enumerate(specs):
+        user = User(first_name=f'U{i}', email=f'u{i}@example.com', password='pw',
+                    date_joined_choice='first', languages=langs, judge_skill=judge,
+                    debate_skill='Beginner')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Vote(user_id=user.id, topic_id=topic.id, round=1))
+        check_in(debate.id, user.id)
+    db.session.commit()
+
+
+def test_rooms_are_formed_per_language(app):
+    debate = Debate(title='Night', style='OPD', voting_open=False,
+                    state=lifecycle.CLOSED, assignment_mode='Random')
+    db.session.add(debate)
+    db.session.flush()
+    voters(debate, [('German', 'Chair')] + [('German', 'Wing')] * 8
+           + [('English', 'Chair')] + [('English', 'Wing')] * 6 + [('German,English', 'Wing')] * 2)
+
+    ok, msg = assign_dynamic(debate, load_participants(debate), scenario='O-O')
+    assert ok, msg
+    assert 'Languages:' in msg
+    masks = {u.id: u.language_mask for u in User.query}
+    for room in (1, 2):
+        ids = [s.user_id for s in SpeakerSlot.query.filter_by(debate_id=debate.id, room=room)]
+        assert len(ids) == 9
+        shared = DE | EN
+        for uid in ids:
+            shared &= masks[uid]
+        assert shared
+
+
+def test_dynamic_plan_marks_mixed_language_scenarios(app):
+    admin = User(first_name='Admin', email='admin@example.com', password='pw', is_admin=True)
+    debate = Debate(title='Night', style='Dynamic', voting_open=False, state=lifecycle.CLOSED)
+    db.session.add_all([admin, debate])
+    db.session.flush()
+    voters(debate, [('German', 'Chair')] * 2 + [('German', 'Wing')] * 7 + [('English', 'Wing')] * 7)
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+    page = client.get(f'/admin/{debate.id}/dynamic_plan').get_data(as_text=True)
+    # two rooms of 8 can't seat 9 German speakers, OPD 7 + BP 9 can
+    assert page.count('Mixed languages') == 1
+    assert '8 speakers, 1 judges, German' in page
+    assert '6 speakers, 1 judges, English' in page
@@ -0,0 +1,193 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db, socketio
+from app.logic import lifecycle
+from app.models import Debate, RunoffTopic, Topic, User, Vote
+from app.profiling import count_queries
+from app.utils import compute_winning_topic, set_runoff, tied_topic_ids
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def emits(monkeypatch):
+    sent = []
+    monkeypatch.setattr(socketio, 'emit', lambda event, data=None, **kw: sent.append((event, data)))
+    return sent
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def create_user(idx, **kwargs):
+    user = User(first_name=f'User{idx}', last_name='Test', email=f'user{idx}@example.com',
+                password='pw', date_joined_choice='first', **kwargs)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_admin_walks_debate_through_voting_and_runoff(client, emits):
+    admin = create_user(1, is_admin=True)
+    login(client, admin)
+    client.post('/admin/create_debate', data={'title': 'Club night'})
+    debate = Debate.query.one()
+    assert debate.state == lifecycle.CREATED
+    assert debate.voting_open is False
+
+    client.get(f'/admin/{debate.id}/toggle_voting')
+    assert (debate.state, debate.voting_open) == (lifecycle.VOTING, True)
+
+    topics = [Topic(debate_id=debate.id, text=f'T{i}') for i in range(2)]
+    db.session.add_all(topics)
+    db.session.flush()
+    db.session.add_all(Vote(user_id=admin.id, topic_id=t.id, round=1) for t in topics)
+    db.session.commit()
+
+    client.get(f'/admin/{debate.id}/toggle_voting')
+    assert debate.state == lifecycle.CLOSED
+    assert RunoffTopic.query.filter_by(debate_id=debate.id).count() == 2
+
+    client.get(f'/admin/{debate.id}/open_second_voting')
+    assert (debate.state, debate.voting_open, debate.second_voting_open) == (
+        lifecycle.RUNOFF, True, True)
+
+    client.get(f'/admin/{debate.id}/toggle_voting')
+    assert (debate.state, debate.voting_open, debate.second_voting_open) == (
+        lifecycle.CLOSED, False, False)
+
+    statuses = [d for e, d in emits if e == 'debate_status']
+    assert [d['state'] for d in statuses] == [
+        lifecycle.VOTING, lifecycle.CLOSED, lifecycle.RUNOFF, lifecycle.CLOSED]
+    # dashboards apply the new round from the event instead of asking for a snapshot
+    runoff = statuses[2]
+    assert runoff['fresh_round'] and [t['id'] for t in runoff['topics']] == [t.id for t in topics]
+    assert runoff['vote_data'] == {'total_users': 0, 'voted_users': 0}
+    lists = [d for e, d in emits if e == 'debate_list_update']
+    assert len(lists) == 4 and lists[-1]['current_debate_id'] is None
+    assert [d['id'] for d in lists[-1]['upcoming_debates']] == [debate.id]
+
+
+def test_invalid_transitions_are_rejected(client, emits):
+    admin = create_user(1, is_admin=True)
+    debate = Debate(title='Night', style='OPD', active=True)
+    db.session.add(debate)
+    db.session.commit()
+    assert debate.state == lifecycle.VOTING
+
+    login(client, admin)
+    client.post(f'/admin/{debate.id}/assign')
+    assert debate.state == lifecycle.VOTING
+    assert not any(e == 'assignments_ready' for e, _ in emits)
+
+    with pytest.raises(lifecycle.LifecycleError):
+        lifecycle.transition(debate, lifecycle.FINALIZED)
+    debate.state = lifecycle.FINALIZED
+    db.session.commit()
+    resp = client.get(f'/admin/{debate.id}/toggle_voting', follow_redirects=True)
+    assert 'cannot go from finalized to voting' in resp.get_data(as_text=True)
+
+
+def test_hooks_run_after_commit_only(app):
+    seen = []
+    hook = lifecycle.on_enter(lifecycle.CLOSED)(seen.append)
+    try:
+        debate = Debate(title='Night', style='OPD')
+        db.session.add(debate)
+        db.session.commit()
+
+        lifecycle.transition(debate, lifecycle.CLOSED)
+        db.session.flush()
+        assert seen == []
+        db.session.rollback()
+        assert seen == []
+        assert debate.state == lifecycle.VOTING
+
+        lifecycle.transition(debate, lifecycle.CLOSED)
+        db.session.commit()
+        assert seen == [lifecycle.Transition(debate.id, lifecycle.VOTING, lifecycle.CLOSED)]
+    finally:
+        lifecycle._hooks[lifecycle.CLOSED].remove(hook)
+
+
+def test_current_debate_pointer_is_cached_and_invalidated(app):
+    first = Debate(title='First', style='OPD', active=True)
+    second = Debate(title='Second', style='OPD')
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    assert lifecycle.current_debate_id() == first.id
+    with count_queries() as statements:
+        assert lifecycle.current_debate_id() == first.id
+    assert statements == []
+
+    second.active = True
+    db.session.commit()
+    assert lifecycle.current_debate_id() is None  # two active debates
+
+    first.active = False
+    db.session.commit()
+    assert lifecycle.current_debate().id == second.id
+
+
+def test_runoff_round_is_selected_in_sql(client):
+    user = create_user(1)
+    debate = Debate(title='Night', style='OPD', active=True)
+    db.session.add(debate)
+    db.session.flush()
+    topics = [Topic(debate_id=debate.id, text=f'T{i}') for i in range(3)]
+    db.session.add_all(topics)
+    db.session.flush()
+    db.session.add_all(Vote(user_id=user.id, topic_id=t.id, round=1) for t in topics[:2])
+    db.session.commit()
+
+    assert sorted(tied_topic_ids(debate.id)) == sorted(t.id for t in topics[:2])
+    set_runoff(debate.id, tied_topic_ids(debate.id))
+    lifecycle.transition(debate, lifecycle.CLOSED)
+    db.session.commit()
+    lifecycle.transition(debate, lifecycle.RUNOFF)
+    db.session.add(Vote(user_id=user.id, topic_id=topics[1].id, round=2))
+    db.session.commit()
+
+    login(client, user)
+    listed = client.get(f'/debate/{debate.id}/topics_json').get_json()['topics']
+    assert [t['id'] for t in listed] == [t.id for t in topics[:2]]
+    lifecycle.transition(debate, lifecycle.CLOSED)
+    db.session.commit()
+    assert compute_winning_topic(debate) == topics[1]
+
+    db.session.delete(topics[0])
+    db.session.commit()
+    assert [r.topic_id for r in RunoffTopic.query.all()] == [topics[1].id]
+    db.session.delete(debate)
+    db.session.commit()
+    assert RunoffTopic.query.count() == 0
@@ -0,0 +1,204 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db, live, socketio
+from app.models import Debate, SocketConnection, Topic, User
+from app.presence import registry
+from app.utils import vote_counts
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+        # tests push vote totals by hand
+        PRESENCE_INTERVAL=0,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def connect(app, client, **auth):
+    return socketio.test_client(app, flask_test_client=client, auth=auth or None,
+                                headers={'Host': 'example.com'})
+
+
+def create_user(idx, **kwargs):
+    user = User(first_name=f'User{idx}', last_name='Test', email=f'user{idx}@example.com',
+                password='pw', date_joined_choice='first', **kwargs)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def voting_debate():
+    debate = Debate(title='Night', style='OPD', active=True, voting_open=True)
+    db.session.add(debate)
+    db.session.flush()
+    topics = [Topic(debate_id=debate.id, text=f'T{i}') for i in range(3)]
+    db.session.add_all(topics)
+    db.session.commit()
+    return debate, topics
+
+
+def test_snapshot_is_sent_on_connect(app, client):
+    user = create_user(1)
+    debate, topics = voting_debate()
+    assert not connect(app, client, snapshot=True).is_connected()
+
+    login(client, user)
+    received = connect(app, client, snapshot=True).get_received()
+    assert [p['name'] for p in received] == ['snapshot']
+    state = received[0]['args'][0]
+    assert state['current_debate']['id'] == debate.id
+    assert [t['id'] for t in state['topics']] == [t.id for t in topics]
+    assert state['vote_status'] == {'user_votes': [], 'votes_left': 2}
+    assert state['assignments'] is None
+
+    # other pages connect without asking for one
+    assert connect(app, client).get_received() == []
+
+
+def test_vote_is_acknowledged_and_broadcast(app, client):
+    user = create_user(1)
+    debate, topics = voting_debate()
+    login(client, user)
+    sock = connect(app, client, snapshot=True)
+    sock.get_received()
+
+    vote = {'debate_id': debate.id, 'topic_id': topics[0].id}
+    assert sock.emit('vote', vote, callback=True) == {
+        'success': True,
+        'message': 'Your vote has been cast!',
+        'user_votes': [topics[0].id],
+        'votes_left': 1,
+    }
+    updates = [p['args'][0] for p in sock.get_received() if p['name'] == 'vote_update']
+    assert len(updates) == 1
+    assert updates[0]['vote_data']['voted_users'] == 1
+    assert updates[0]['seq'] >= 1
+
+    ack = sock.emit('vote', vote, callback=True)
+    assert (ack['success'], ack['votes_left']) == (False, 1)
+    ack = sock.emit('vote', {'debate_id': debate.id, 'topic_id': 999}, callback=True)
+    assert ack['message'] == 'This topic is not up for vote.'
+
+
+def test_reconnect_replays_missed_events(app, client):
+    app.config['SOCKET_EVENT_LOG_SIZE'] = 2
+    user = create_user(1)
+    debate = Debate(title='Night', style='OPD', active=True, voting_open=False)
+    db.session.add(debate)
+    db.session.commit()
+    login(client, user)
+    sock = connect(app, client, snapshot=True)
+    state = sock.get_received()[0]['args'][0]
+    sock.disconnect()
+
+    socketio.emit('debate_list_update', {'debate_id': debate.id})
+    socketio.emit('winning_topic', {'debate_id': debate.id, 'topic': None})
+    resumed = connect(app, client, snapshot=True, epoch=state['epoch'], seq=state['seq'])
+    received = resumed.get_received()
+    assert [p['name'] for p in received] == ['debate_list_update', 'winning_topic']
+    assert [p['args'][0]['seq'] for p in received] == [state['seq'] + 1, state['seq'] + 2]
+
+    # older events have dropped out of the log
+    socketio.emit('debate_list_update', {'debate_id': debate.id})
+    stale = connect(app, client, snapshot=True, epoch=state['epoch'], seq=state['seq'])
+    assert [p['name'] for p in stale.get_received()] == ['snapshot']
+    other = connect(app, client, snapshot=True, epoch='elsewhere', seq=state['seq'] + 3)
+    assert [p['name'] for p in other.get_received()] == ['snapshot']
+
+
+def test_vote_stats_for_admins_only(app, client):
+    member = create_user(1)
+    admin = create_user(2, is_admin=True)
+    debate, _ = voting_debate()
+
+    login(client, member)
+    assert connect(app, client).emit('vote_stats', {'debate_ids': [debate.id]}, callback=True) == {}
+
+    login(client, admin)
+    stats = connect(app, client).emit('vote_stats', {'debate_ids': [debate.id]}, callback=True)
+    assert list(stats) == [str(debate.id)]
+    assert stats[str(debate.id)]['voted_users'] == 0
+
+
+def test_presence_follows_open_connections(app, client):
+    first, second = create_user(1), create_user(2)
+    debate, topics = voting_debate()
+    login(client, first)
+    tab = connect(app, client)
+    other_tab = connect(app, client)
+    login(client, second)
+    phone = connect(app, client)
+    assert vote_counts(debate)['total_users'] == 2
+
+    phone.disconnect()
+    assert vote_counts(debate)['total_users'] == 1
+    live.push_presence()
+    updates = [p['args'][0] for p in tab.get_received() if p['name'] == 'vote_update']
+    assert [u['vote_data'] for u in updates] == [{'total_users': 1, 'voted_users': 0}]
+    # nothing changed since
+    live.push_presence()
+    assert not tab.get_received()
+
+    # the voter's other tabs learn about the vote, nobody else does
+    login(client, second)
+    phone = connect(app, client)
+    g.pop('_login_user', None)
+    tab.emit('vote', {'debate_id': debate.id, 'topic_id': topics[0].id}, callback=True)
+    statuses = [p['args'][0] for p in other_tab.get_received() if p['name'] == 'vote_status']
+    assert statuses == [{'debate_id': debate.id, 'user_votes': [topics[0].id], 'votes_left': 1}]
+    assert not any(p['name'] == 'vote_status' for p in phone.get_received())
+
+    tab.disconnect()
+    assert vote_counts(debate)['total_users'] == 2
+
+
+def test_presence_is_shared_between_workers(app, client):
+    first, second, third = create_user(1), create_user(2), create_user(3)
+    debate, topics = voting_debate()
+    login(client, first)
+    tab = connect(app, client)
+    # connections held by other worker processes, one of them long dead
+    db.session.add_all([
+        SocketConnection(sid='elsewhere', user_id=second.id),
+        SocketConnection(sid='dead', user_id=third.id,
+                         seen_at=datetime.utcnow() - timedelta(hours=1)),
+    ])
+    db.session.commit()
+    assert vote_counts(debate)['total_users'] == 2
+
+    live.push_presence()
+    updates = [p['args'][0] for p in tab.get_received() if p['name'] == 'vote_update']
+    assert updates[-1]['vote_data'] == {'total_users': 2, 'voted_users': 0}
+
+    registry().heartbeat()
+    sids = {c.sid for c in SocketConnection.query}
+    assert 'dead' not in sids and 'elsewhere' in sids and len(sids) == 2
@@ -0,0 +1,153 @@
+import os
+import socketserver
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.mail import deliver_pending
+from app.models import OutboundEmail, PendingUser
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Minimal local SMTP server that records every message it accepts."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPSinkHandler)
+        self.messages = []
+        self.connections = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 sink ready')
+        data = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if data is not None:
+                if line in (b'.\r\n', b'.\n'):
+                    self.server.messages.append(b''.join(data).decode())
+                    data = None
+                    self.reply('250 queued')
+                else:
+                    data.append(line)
+                continue
+            cmd = line.decode().strip().upper()
+            if cmd.startswith('EHLO'):
+                self.reply('250 sink')
+            elif cmd == 'DATA':
+                data = []
+                self.reply('354 go ahead')
+            elif cmd == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+        MAIL_WORKER_ENABLED=False,
+        MAIL_SERVER='127.0.0.1',
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def register(client, idx):
+    return client.post('/register', data={
+        'first_name': f'User{idx}',
+        'last_name': 'Test',
+        'email': f'user{idx}@example.com',
+        'password': 'secret',
+        'password2': 'secret',
+    })
+
+
+def test_register_only_enqueues_mail(app, client):
+    app.config['MAIL_PORT'] = 1  # nothing listens here, sending would fail
+    resp = register(client, 1)
+
+    assert resp.status_code == 302
+    assert PendingUser.query.count() == 1
+    queued = OutboundEmail.query.one()
+    assert queued.recipient == 'user1@example.com'
+    assert queued.status == 'pending'
+    assert queued.attempts == 0
+
+
+def test_batch_is_delivered_over_one_connection(app, client, sink):
+    app.config['MAIL_PORT'] = sink.port
+    for idx in range(5):
+        register(client, idx)
+
+    assert deliver_pending() == 5
+    assert len(sink.messages) == 5
+    assert sink.connections == 1
+    assert OutboundEmail.query.filter_by(status='sent').count() == 5
+
+
+def test_failed_delivery_backs_off_then_gives_up(app, client):
+    app.config.update(MAIL_PORT=1, MAIL_MAX_ATTEMPTS=2, MAIL_RETRY_BASE=60)
+    client.post('/forgot_password', data={'email': 'nobody@example.com'})
+    assert OutboundEmail.query.count() == 0
+
+    register(client, 1)
+    assert deliver_pending() == 0
+    msg = OutboundEmail.query.one()
+    assert msg.status == 'pending'
+    assert msg.attempts == 1
+    assert msg.last_error
+    assert msg.next_attempt_at > datetime.utcnow() + timedelta(seconds=30)
+
+    # not due yet, nothing happens
+    deliver_pending()
+    assert OutboundEmail.query.one().attempts == 1
+
+    msg.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    deliver_pending()
+    msg = OutboundEmail.query.one()
+    assert msg.status == 'failed'
+    assert msg.attempts == 2
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+from itertools import permutations
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from app.logic.assign import Participant, _allocate_by_mode, _place_chairs, is_chair, is_trainee
+from app.logic.matching import linear_sum_assignment
+
+
+def brute_force(cost):
+    n, m = cost.shape
+    if n > m:
+        return brute_force(cost.T)
+    return min(sum(cost[i, j] for i, j in enumerate(cols)) for cols in permutations(range(m), n))
+
+
+def test_matching_is_optimal_on_rectangular_matrices():
+    rng = np.random.default_rng(7)
+    for _ in range(100):
+        cost = rng.integers(0, 20, (int(rng.integers(1, 6)), int(rng.integers(1, 6)))).astype(float)
+        rows, cols = linear_sum_assignment(cost)
+        assert len(set(rows.tolist())) == len(set(cols.tolist())) == min(cost.shape)
+        assert cost[rows, cols].sum() == pytest.approx(brute_force(cost))
+
+
+def test_twenty_rooms_are_matched_in_milliseconds():
+    cost = np.random.default_rng(1).random((45, 20))
+    started = time.perf_counter()
+    rows, cols = linear_sum_assignment(cost)
+    assert time.perf_counter() - started < 0.05
+    assert sorted(cols.tolist()) == list(range(20))
+
+
+def participant(i, judge='Wing', skill=40.0, prefer_judging=False):
+    return Participant(i, judge, 'Beginner', prefer_judging, False, 800.0 + skill, skill, 0)
+
+
+def club_night():
+    users = [participant(1, 'Chair', 90.0), participant(2, 'Chair', 10.0),
+             participant(3, 'Chair', 50.0), participant(4, 'Chair', 60.0, prefer_judging=True),
+             participant(5, 'Trainee', 30.0)]
+    users += [participant(i, skill=float(i)) for i in range(6, 27)]
+    return users
+
+
+@pytest.mark.parametrize('mode', ['Random', 'Skill based', 'ProAm', 'True random'])
+def test_every_participant_is_placed_exactly_once(mode):
+    users = club_night()
+    counts = [9, 9, 8]
+    rooms, unsafe, msg = _allocate_by_mode(users, counts, [('OPD', 7, 9)] * 3, mode)
+    assert not unsafe and msg == ''
+    placed = [u.id for room in rooms for u in room]
+    assert sorted(placed) == sorted(u.id for u in users)
+    assert [len(room) for room in rooms] == counts
+    if mode != 'True random':
+        assert all(any(is_chair(u) for u in room) for room in rooms)
+        assert sum(is_trainee(u) for u in rooms[0] + rooms[1] + rooms[2]) == 1
+
+
+def test_chairs_follow_room_levels_and_preferences():
+    users = club_night()
+    rooms, _, _ = _allocate_by_mode(users, [9, 9, 8], [('OPD', 7, 9)] * 3, 'Skill based')
+    heads = [{u.id for u in room if is_chair(u)} for room in rooms]
+    # the strongest chair heads the strongest tier
+    assert 1 in heads[0]
+    # of four chairs for three rooms the one preferring to judge is picked
+    chairs, unsafe = _place_chairs(users[:4], None, 'OPD', 3)
+    assert not unsafe and 4 in [c.id for c in chairs]
+
+
+def test_missing_chairs_are_replaced_not_dropped():
+    users = [participant(1, 'Chair')] + [participant(i) for i in range(2, 17)]
+    rooms, unsafe, _ = _allocate_by_mode(users, [8, 8], [('OPD', 7, 9)] * 2, 'Skill based')
+    assert unsafe
+    assert sorted(u.id for room in rooms for u in room) == list(range(1, 17))
+    rooms, unsafe, msg = _allocate_by_mode(users, [8, 8], [('OPD', 7, 9)] * 2, 'Random')
+    assert (rooms, unsafe, msg) == ([], True, 'Not enough Chair judges')
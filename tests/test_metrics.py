@@ -0,0 +1,133 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db, metrics, socketio
+from app.models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+        PRESENCE_INTERVAL=0,
+        # the test client connects from 127.0.0.1
+        METRICS_ALLOWED_IPS=['127.0.0.1'],
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_metrics_gated_to_scrapers_and_admins(app, client):
+    remote = {'REMOTE_ADDR': '10.1.2.3'}
+    assert client.get('/metrics', environ_base=remote).status_code == 403
+    # behind a local reverse proxy every request looks local; loopback alone is not enough
+    app.config['METRICS_ALLOWED_IPS'] = []
+    assert client.get('/metrics').status_code == 403
+
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    bearer = {'Authorization': 'Bearer scrape-secret'}
+    assert client.get('/metrics', environ_base=remote, headers=bearer).status_code == 200
+    wrong = {'Authorization': 'Bearer guess'}
+    assert client.get('/metrics', environ_base=remote, headers=wrong).status_code == 403
+    app.config['METRICS_ALLOWED_IPS'] = ['10.1.2.3']
+    assert client.get('/metrics', environ_base=remote).status_code == 200
+    app.config['METRICS_ALLOWED_IPS'] = []
+
+    member = User(first_name='M', last_name='M', email='m@example.com', password='pw')
+    admin = User(first_name='A', last_name='A', email='a@example.com', password='pw', is_admin=True)
+    db.session.add_all([member, admin])
+    db.session.commit()
+
+    login(client, member)
+    assert client.get('/metrics', environ_base=remote).status_code == 403
+    login(client, admin)
+    assert client.get('/metrics', environ_base=remote).status_code == 200
+
+
+def test_request_latency_and_db_time_are_exported(client):
+    client.get('/login')
+    resp = client.get('/metrics')
+
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    text = resp.get_data(as_text=True)
+    assert '# TYPE dcs_request_duration_seconds histogram' in text
+    assert sample(text, 'dcs_request_duration_seconds_count{endpoint="auth.login"}') >= 1
+    assert 'dcs_request_duration_seconds_bucket{endpoint="auth.login",le="+Inf"}' in text
+    assert 'dcs_db_query_seconds_total' in text
+
+
+def test_socket_clients_and_emits_are_counted(app, client):
+    before = sample(client.get('/metrics').get_data(as_text=True),
+                    'dcs_socketio_emits_total{event="vote_update"}')
+
+    assert not socketio.test_client(app).is_connected()
+    member = User(first_name='M', last_name='M', email='m@example.com', password='pw')
+    db.session.add(member)
+    db.session.commit()
+    login(client, member)
+    sock = socketio.test_client(app, flask_test_client=client, headers={'Host': 'example.com'})
+    assert sock.is_connected()
+    socketio.emit('vote_update', {'debate_id': 1})
+    text = client.get('/metrics').get_data(as_text=True)
+    connected = sample(text, 'dcs_socketio_connected_clients')
+    assert sample(text, 'dcs_socketio_emits_total{event="vote_update"}') == before + 1
+
+    sock.disconnect()
+    text = client.get('/metrics').get_data(as_text=True)
+    assert sample(text, 'dcs_socketio_connected_clients') == connected - 1
+
+
+def test_snapshots_of_live_workers_are_summed(app, client, tmp_path):
+    app.config['METRICS_DIR'] = str(tmp_path)
+    other_worker = {
+        'pid': os.getppid(),
+        'metrics': {
+            'dcs_socketio_emits_total': {
+                'type': 'counter', 'help': 'x', 'labels': ['event'], 'buckets': [],
+                'samples': [[['worker_test_event'], 5]],
+            },
+        },
+    }
+    (tmp_path / f'{os.getppid()}.json').write_text(json.dumps(other_worker))
+    dead = dict(other_worker, pid=2 ** 22 + 1)
+    (tmp_path / 'dead.json').write_text(json.dumps(dead))
+
+    metrics.SOCKET_EMITS.inc('worker_test_event', amount=2)
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert sample(text, 'dcs_socketio_emits_total{event="worker_test_event"}') == 7
+    assert (tmp_path / f'{os.getpid()}.json').exists()
+    assert not (tmp_path / 'dead.json').exists()
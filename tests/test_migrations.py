@@ -0,0 +1,67 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+
+from app import create_app, db
+
+MIGRATIONS = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'migrations'))
+SEARCH_INDEXES = {'ix_user_first_name_lower', 'ix_user_last_name_lower', 'ix_user_email_lower'}
+
+
+def user_indexes():
+    return {row[1] for row in db.session.execute(text("PRAGMA index_list('user')"))}
+
+
+def migrations_app(tmp_path):
+    # the engine is bound in create_app, so the database comes from a config file
+    config = tmp_path / 'config.py'
+    config.write_text(f"TESTING = True\nSQLALCHEMY_DATABASE_URI = 'sqlite:///{tmp_path / 'app.db'}'\n")
+    return create_app(str(config))
+
+
+def test_user_rebuilds_keep_the_search_indexes(tmp_path):
+    app = migrations_app(tmp_path)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        assert SEARCH_INDEXES <= user_indexes()
+        db.session.remove()
+
+        # c4e91b7d2a05 rebuilds the user table in both directions
+        downgrade(directory=MIGRATIONS, revision='a8d3e5f17c42')
+        assert SEARCH_INDEXES <= user_indexes()
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_preferences_move_to_participation_and_back(tmp_path):
+    app = migrations_app(tmp_path)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS, revision='a8d3e5f17c42')
+        for statement in (
+            "INSERT INTO user (id, first_name, email, password, prefer_judging, prefer_free) "
+            "VALUES (1, 'A', 'a@example.com', 'pw', 1, 0), (2, 'B', 'b@example.com', 'pw', 0, 1)",
+            "INSERT INTO debate (id, title, style) VALUES (1, 'Old', 'OPD'), (2, 'Night', 'OPD')",
+            "INSERT INTO topic (id, debate_id, text) VALUES (1, 1, 'T1'), (2, 2, 'T2')",
+            "INSERT INTO vote (user_id, topic_id, round) VALUES (1, 1, 1), (1, 2, 1), (2, 2, 1)",
+        ):
+            db.session.execute(text(statement))
+        db.session.commit()
+        db.session.remove()
+
+        upgrade(directory=MIGRATIONS, revision='c4e91b7d2a05')
+        rows = db.session.execute(text(
+            'SELECT debate_id, user_id, prefer_judging, prefer_free FROM participation'
+        )).all()
+        # the flags only count for the latest debate
+        assert sorted(rows) == [(1, 1, 0, 0), (2, 1, 1, 0), (2, 2, 0, 1)]
+        db.session.remove()
+
+        downgrade(directory=MIGRATIONS, revision='a8d3e5f17c42')
+        rows = db.session.execute(text('SELECT id, prefer_judging, prefer_free FROM user')).all()
+        assert sorted(rows) == [(1, 1, 0), (2, 0, 1)]
+        db.session.remove()
+        db.engine.dispose()
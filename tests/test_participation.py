@@ -0,0 +1,94 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.logic import lifecycle
+from app.logic.assign import load_participants
+from app.models import Debate, Participation, Topic, User
+from app.profiling import count_queries
+from app.utils import cast_vote
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def create_user(idx, **kwargs):
+    user = User(first_name=f'User{idx}', email=f'user{idx}@example.com', password='pw',
+                date_joined_choice='first', **kwargs)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def voting_debate(title):
+    debate = Debate(title=title, style='OPD', active=True, state=lifecycle.VOTING,
+                    **lifecycle.FLAGS[lifecycle.VOTING])
+    db.session.add(debate)
+    db.session.flush()
+    db.session.add(Topic(debate_id=debate.id, text=f'{title} topic'))
+    db.session.commit()
+    return debate
+
+
+def test_creating_a_debate_leaves_users_alone(app):
+    admin = create_user(1, is_admin=True)
+    for idx in range(2, 12):
+        create_user(idx)
+    client = app.test_client()
+    login(client, admin)
+
+    with count_queries() as statements:
+        response = client.post('/admin/create_debate', data={'title': 'Night'})
+    assert response.status_code == 302
+    assert Debate.query.one().title == 'Night'
+    assert not [s for s in statements if s.startswith('UPDATE user')]
+
+
+def test_voting_checks_in_and_preferences_stay_with_the_debate(app):
+    user = create_user(1, judge_skill='Wing', debate_skill='Beginner')
+    bystander = create_user(2)
+    first = voting_debate('First')
+    client = app.test_client()
+    login(client, user)
+
+    response = client.post('/profile/prefer_judging',
+                           json={'debate_id': first.id, 'prefer_judging': True})
+    assert response.get_json() == {'prefer_judging': True}
+    # a preference alone does not put the user in the pool
+    assert load_participants(first) == []
+
+    ok, _, _ = cast_vote(first, user, first.topics[0].id)
+    assert ok
+    (participant,) = load_participants(first)
+    assert (participant.id, participant.prefer_judging) == (user.id, True)
+
+    second = voting_debate('Second')
+    ok, _, _ = cast_vote(second, user, second.topics[0].id)
+    assert ok
+    assert [p.prefer_judging for p in load_participants(second)] == [False]
+    assert db.session.get(Participation, (second.id, bystander.id)) is None
@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.models import User
+from app.passwords import hash_password, verify_password
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+        PASSWORD_HASH_METHOD='pbkdf2:sha256:1000',
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_hash_roundtrip_uses_configured_method(app):
+    pwhash = hash_password('secret')
+    assert pwhash.startswith('pbkdf2:sha256:1000$')
+    assert verify_password(pwhash, 'secret')
+    assert not verify_password(pwhash, 'wrong')
+
+
+def test_login_upgrades_outdated_hash(app, client):
+    user = User(
+        first_name='Old',
+        last_name='Hash',
+        email='old@example.com',
+        password=generate_password_hash('secret', method='pbkdf2:sha256:500'),
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    resp = client.post('/login', data={'email': 'old@example.com', 'password': 'secret'})
+
+    assert resp.status_code == 302
+    db.session.refresh(user)
+    assert user.password.startswith('pbkdf2:sha256:1000$')
+    assert verify_password(user.password, 'secret')
@@ -0,0 +1,125 @@
+import logging
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.models import Debate, Topic, User, Vote
+from app.profiling import assert_max_queries, count_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def create_user(idx, **kwargs):
+    user = User(
+        first_name=f'User{idx}',
+        last_name='Test',
+        email=f'user{idx}@example.com',
+        password='pw',
+        date_joined_choice='first',
+        **kwargs,
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def voting_debate():
+    debate = Debate(title='Debate', style='OPD', active=True, voting_open=True)
+    db.session.add(debate)
+    db.session.flush()
+    topics = [Topic(debate_id=debate.id, text=f'Topic {i}') for i in range(4)]
+    db.session.add_all(topics)
+    db.session.commit()
+    for idx in range(10):
+        user = create_user(100 + idx)
+        db.session.add(Vote(user_id=user.id, topic_id=topics[idx % 4].id, round=1))
+    db.session.commit()
+    return debate
+
+
+@pytest.mark.parametrize('path, limit', [
+    ('/dashboard/debates_json', 6),
+    ('/debate/{id}/vote_status_json', 3),
+    ('/debate/{id}/topics_json', 2),
+])
+def test_polling_endpoints_stay_within_query_budget(client, voting_debate, path, limit):
+    user = create_user(1)
+    login(client, user)
+    client.get('/profile')  # warm the identity cache
+    login(client, user)
+
+    with assert_max_queries(limit):
+        resp = client.get(path.format(id=voting_debate.id))
+    assert resp.status_code == 200
+
+
+def test_assert_max_queries_lists_statements(app):
+    with pytest.raises(AssertionError) as exc:
+        with assert_max_queries(1):
+            User.query.all()
+            Debate.query.all()
+    assert '2 queries executed' in str(exc.value)
+    assert 'FROM user' in str(exc.value)
+
+
+def test_server_timing_header_only_when_enabled(app, client):
+    user = create_user(1)
+    login(client, user)
+    resp = client.get('/privacy')
+    assert 'Server-Timing' not in resp.headers
+
+    app.config['SERVER_TIMING'] = True
+    login(client, user)
+    resp = client.get('/privacy')
+    timings = resp.headers.getlist('Server-Timing')
+    assert any(t.startswith('db;dur=') and 'queries' in t for t in timings)
+    assert any(t.startswith('app;dur=') for t in timings)
+
+
+def test_request_over_budget_is_logged(app, client, voting_debate, caplog):
+    app.config['REQUEST_QUERY_BUDGET'] = 1
+    user = create_user(1)
+    login(client, user)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        with count_queries() as statements:
+            client.get('/dashboard/debates_json')
+
+    assert len(statements) > 1
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(
+        'Slow request GET /dashboard/debates_json (main.dashboard_debates_json)' in m
+        for m in messages
+    )
@@ -0,0 +1,133 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db, socketio
+from app.logic import lifecycle
+from app.models import Debate, Score, SpeakerSlot, User
+from app.profiling import count_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+        PRESENCE_INTERVAL=0,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def connect(app, client):
+    return socketio.test_client(app, flask_test_client=client, headers={'Host': 'example.com'})
+
+
+def opd_rooms():
+    """Two OPD rooms; returns the debate and ``{name: user}``."""
+    debate = Debate(title='Night', style='OPD', active=True, rooms=2, finalized_rooms=0,
+                    state=lifecycle.ASSIGNED, **lifecycle.FLAGS[lifecycle.ASSIGNED])
+    db.session.add(debate)
+    roles = {
+        'chair': ('Judge-Chair', 1), 'wing': ('Judge-Wing', 1),
+        'gov': ('Gov', 1), 'opp': ('Opp', 1),
+        'other_chair': ('Judge-Chair', 2), 'other_gov': ('Gov', 2),
+    }
+    users = {name: User(first_name=name, email=f'{name}@example.com', password='pw')
+             for name in roles}
+    db.session.add_all(users.values())
+    db.session.flush()
+    db.session.add_all(SpeakerSlot(debate_id=debate.id, user_id=users[name].id, role=role, room=room)
+                       for name, (role, room) in roles.items())
+    db.session.commit()
+    return debate, users
+
+
+def cell(speaker, judge, value):
+    return {'speaker_id': speaker.id, 'judge_id': judge.id, 'value': value}
+
+
+def test_autosave_upserts_only_the_changed_cells(app):
+    debate, users = opd_rooms()
+    client = app.test_client()
+    login(client, users['chair'])
+    url = f'/debate/{debate.id}/scores'
+
+    response = client.patch(url, json={'scores': [
+        cell(users['gov'], users['chair'], 70), cell(users['opp'], users['chair'], 65),
+        cell(users['gov'], users['wing'], 72),
+    ]})
+    assert response.get_json() == {'success': True, 'saved': 3}
+
+    # a resend over a flaky connection and a changed cell: one upsert, no delete
+    with count_queries() as statements:
+        response = client.patch(url, json={'scores': [
+            cell(users['gov'], users['chair'], 70), cell(users['opp'], users['chair'], 68),
+        ]})
+    assert response.status_code == 200
+    writes = [s for s in statements if s.startswith(('INSERT', 'UPDATE', 'DELETE'))]
+    assert len(writes) == 1 and 'ON CONFLICT' in writes[0]
+
+    client.patch(url, json={'scores': [cell(users['gov'], users['wing'], None)]})
+    scores = {(s.speaker_id, s.judge_id): s.value for s in Score.query}
+    assert scores == {
+        (users['gov'].id, users['chair'].id): 70,
+        (users['opp'].id, users['chair'].id): 68,
+    }
+
+
+def test_autosave_rejects_foreign_cells_and_other_judges(app):
+    debate, users = opd_rooms()
+    client = app.test_client()
+    url = f'/debate/{debate.id}/scores'
+
+    login(client, users['chair'])
+    response = client.patch(url, json={'scores': [cell(users['other_gov'], users['chair'], 70)]})
+    assert response.status_code == 400
+    response = client.patch(url, json={'scores': [cell(users['gov'], users['chair'], 101)]})
+    assert response.get_json()['message'] == 'Scores go from 0 to 100.'
+
+    login(client, users['wing'])
+    response = client.patch(url, json={'scores': [cell(users['gov'], users['wing'], 70)]})
+    assert response.status_code == 403
+    assert Score.query.count() == 0
+
+
+def test_judges_of_the_room_see_saved_scores_live(app):
+    debate, users = opd_rooms()
+    watchers = {}
+    for name in ('wing', 'other_chair', 'gov'):
+        client = app.test_client()
+        login(client, users[name])
+        watchers[name] = connect(app, client)
+        ack = watchers[name].emit('watch_scores', {'debate_id': debate.id}, callback=True)
+        assert ack['success'] == (name != 'gov')
+        watchers[name].get_received()
+
+    chair = app.test_client()
+    login(chair, users['chair'])
+    chair.patch(f'/debate/{debate.id}/scores',
+                json={'scores': [cell(users['gov'], users['chair'], 75)]})
+
+    updates = [p['args'][0] for p in watchers['wing'].get_received() if p['name'] == 'score_update']
+    assert updates == [{'debate_id': debate.id, 'room': 1,
+                        'scores': [cell(users['gov'], users['chair'], 75)]}]
+    for name in ('other_chair', 'gov'):
+        assert not [p for p in watchers[name].get_received() if p['name'] == 'score_update']
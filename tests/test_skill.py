@@ -0,0 +1,39 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from app.logic.skill import SkillModel
+
+
+def row(elo=1000, sigma=None, opd=None, level='First Timer'):
+    return SimpleNamespace(elo_rating=elo, elo_sigma=sigma, opd_skill=opd, debate_skill=level)
+
+
+def test_matches_the_per_user_rules():
+    model = SkillModel.from_rows([
+        row(elo=1200, sigma=100),              # trusted rating
+        row(elo=1200, sigma=400, level='Advanced'),  # experience instead
+        row(elo=None, sigma=None, opd=55.5, level='Beginner'),
+    ])
+    assert model.bp.tolist() == [1200.0, 950.0, 850.0]
+    assert model.opd.tolist() == [35.0, 50.0, 55.5]
+    assert model.overall.tolist() == [95.0, 97.5, 98.0]
+
+
+def test_blend_and_uncertainty():
+    rows = [row(elo=1200, sigma=s, level='Beginner') for s in (270, 320, 370)]
+    assert SkillModel.from_rows(rows, blend=100).bp.tolist() == [1200.0, 1025.0, 850.0]
+    penalised = SkillModel.from_rows(rows[:1], uncertainty=1).bp
+    assert penalised.tolist() == [930.0]
+
+
+def test_ranking_is_stable_and_restricts_to_subsets():
+    model = SkillModel(bp=[900, 1100, 900, 1000], opd=[40, 40, 60, 35])
+    assert model.ranking('BP').tolist() == [1, 3, 0, 2]
+    assert model.ranking('OPD').tolist() == [2, 0, 1, 3]
+    assert model.ranking('BP', among=[0, 2, 3]).tolist() == [3, 0, 2]
+    assert np.array_equal(model.ranking(None), np.argsort(-model.overall, kind='stable'))
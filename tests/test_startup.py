@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# Cold import + create_app measured at ~0.8s on a developer laptop; the budget
+# leaves room for slower CI machines but catches a heavy import sneaking in.
+STARTUP_BUDGET = float(os.getenv('STARTUP_BUDGET_SECONDS', 2.0))
+
+SCRIPT = '''
+import time
+start = time.perf_counter()
+from app import create_app
+create_app()
+print(time.perf_counter() - start)
+'''
+
+
+def cold_start():
+    result = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.splitlines()
+
+
+def test_cold_start_within_budget():
+    best = min(float(cold_start()[-1]) for _ in range(3))
+    assert best < STARTUP_BUDGET, f'startup took {best:.2f}s, budget {STARTUP_BUDGET}s'
+
+
+def test_create_app_prints_nothing():
+    # only the timing line from the script itself, no url_map dump
+    assert len(cold_start()) == 1
+
+
+def test_create_app_has_no_database_side_effects(tmp_path):
+    db_path = tmp_path / 'startup.db'
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}')
+    subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', 'from app import create_app; create_app()'],
+        cwd=ROOT, env=env, check=True,
+    )
+    assert not db_path.exists()
@@ -0,0 +1,122 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.logic import lifecycle
+from app.models import BpRank, ClientOp, Debate, JudgeFeedback, Score, SpeakerSlot, User
+from app.profiling import count_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def room(app, style, roles):
+    """One room of ``roles``; returns the debate, the users and the chair's client."""
+    debate = Debate(title='Night', style=style, active=True, rooms=1, finalized_rooms=0,
+                    state=lifecycle.ASSIGNED, **lifecycle.FLAGS[lifecycle.ASSIGNED])
+    db.session.add(debate)
+    users = {name: User(first_name=name, email=f'{name}@example.com', password='pw')
+             for name in roles}
+    db.session.add_all(users.values())
+    db.session.flush()
+    db.session.add_all(SpeakerSlot(debate_id=debate.id, user_id=users[name].id, role=role, room=1)
+                       for name, role in roles.items())
+    db.session.commit()
+    client = app.test_client()
+    login(client, users['chair'])
+    return debate, users, client
+
+
+OPD = {'chair': 'Judge-Chair', 'wing': 'Judge-Wing', 'gov': 'Gov', 'opp': 'Opp'}
+BP = {'chair': 'Judge-Chair', 'og': 'OG', 'oo': 'OO', 'cg': 'CG', 'co': 'CO'}
+
+
+def test_offline_queue_is_applied_once(app):
+    debate, users, client = room(app, 'OPD', OPD)
+    ops = [
+        {'id': 'a1', 'kind': 'score', 'speaker_id': users['gov'].id,
+         'judge_id': users['chair'].id, 'value': 60},
+        # a later edit of the same cell wins
+        {'id': 'a2', 'kind': 'score', 'speaker_id': users['gov'].id,
+         'judge_id': users['chair'].id, 'value': 64},
+        {'id': 'a3', 'kind': 'score', 'speaker_id': users['opp'].id,
+         'judge_id': users['wing'].id, 'value': 58},
+        {'id': 'a4', 'kind': 'feedback', 'judge_id': users['wing'].id, 'rating': 'positive'},
+        {'id': 'a5', 'kind': 'score', 'speaker_id': users['wing'].id,
+         'judge_id': users['chair'].id, 'value': 70},
+        {'id': 'a6', 'kind': 'feedback', 'judge_id': users['chair'].id, 'rating': 'negative'},
+        {'kind': 'score'},
+    ]
+    data = client.post(f'/debate/{debate.id}/sync', json={'ops': ops}).get_json()
+    assert data['success'] and (data['applied'], data['duplicates']) == (4, 0)
+    assert data['acked'] == ['a1', 'a2', 'a3', 'a4', 'a5', 'a6']
+    assert [r['id'] for r in data['rejected']] == ['a5', 'a6', None]
+
+    scores = {(s.speaker_id, s.judge_id): s.value for s in Score.query}
+    assert scores == {(users['gov'].id, users['chair'].id): 64,
+                      (users['opp'].id, users['wing'].id): 58}
+    assert [(f.judge_id, f.rating) for f in JudgeFeedback.query] == [(users['wing'].id, 'positive')]
+    assert ClientOp.query.count() == 4
+
+    # the response got lost: the same batch again writes nothing
+    with count_queries() as statements:
+        data = client.post(f'/debate/{debate.id}/sync', json={'ops': ops[:4]}).get_json()
+    assert (data['applied'], data['duplicates']) == (0, 4)
+    assert not [s for s in statements if s.startswith(('INSERT', 'UPDATE', 'DELETE'))]
+    assert Score.query.count() == 2
+
+
+def test_ranks_sync_and_only_the_chair_may(app):
+    debate, users, client = room(app, 'BP', BP)
+    ops = [{'id': f'r{i}', 'kind': 'rank', 'team': team, 'rank': i}
+           for i, team in enumerate(('OG', 'OO', 'CG', 'CO'), start=1)]
+    data = client.post(f'/debate/{debate.id}/sync', json={'ops': ops}).get_json()
+    assert data['applied'] == 4
+    ops = [{'id': 'r5', 'kind': 'rank', 'team': 'OG', 'rank': 4},
+           {'id': 'r6', 'kind': 'rank', 'team': 'CO', 'rank': 1}]
+    client.post(f'/debate/{debate.id}/sync', json={'ops': ops})
+    assert {r.team: r.rank for r in BpRank.query} == {'OG': 4, 'OO': 2, 'CG': 3, 'CO': 1}
+
+    response = client.post(f'/debate/{debate.id}/sync', json={'ops': {'id': 'x'}})
+    assert response.status_code == 400
+
+    login(client, users['og'])
+    response = client.post(f'/debate/{debate.id}/sync', json={'ops': ops})
+    assert response.status_code == 403
+
+
+def test_judging_page_uses_the_service_worker(app):
+    debate, users, client = room(app, 'OPD', OPD)
+    page = client.get(f'/debate/{debate.id}/judging').get_data(as_text=True)
+    assert f'data-judging-debate="{debate.id}"' in page and 'js/judging.js' in page
+
+    worker = client.get('/judging-sw.js')
+    assert worker.status_code == 200
+    assert worker.mimetype == 'application/javascript'
+    assert worker.headers['Cache-Control'] == 'no-cache'
+    assert b'/judging$/' in worker.data
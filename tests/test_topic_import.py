@@ -0,0 +1,146 @@
+import io
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db, socketio
+from app.logic.topic_import import TopicImportError, detect_format, parse_topics
+from app.models import Debate, LibraryTopic, Topic, User
+from app.profiling import count_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def emits(monkeypatch):
+    sent = []
+    monkeypatch.setattr(socketio, 'emit', lambda event, data=None, **kw: sent.append((event, data)))
+    return sent
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+def setup_admin_and_debate(client):
+    admin = User(first_name='Admin', last_name='A', email='admin@example.com',
+                 password='pw', date_joined_choice='first', is_admin=True)
+    debate = Debate(title='Night', style='OPD')
+    db.session.add_all([admin, debate])
+    db.session.commit()
+    login(client, admin)
+    return debate
+
+
+def test_parse_formats():
+    csv_text = 'text,factsheet\nTopic A,Facts A\n"Topic, B",\n'
+    assert parse_topics(csv_text, 'csv') == [
+        {'text': 'Topic A', 'factsheet': 'Facts A'},
+        {'text': 'Topic, B', 'factsheet': None},
+    ]
+    assert parse_topics('["A", {"text": "B", "factsheet": "fb"}]', 'json') == [
+        {'text': 'A', 'factsheet': None},
+        {'text': 'B', 'factsheet': 'fb'},
+    ]
+    md = '# A\n\nline one\nline two\n\n## B\n'
+    assert parse_topics(md, 'markdown') == [
+        {'text': 'A', 'factsheet': 'line one\nline two'},
+        {'text': 'B', 'factsheet': None},
+    ]
+    assert parse_topics('- A\n- B\n- a\n', 'markdown') == [
+        {'text': 'A', 'factsheet': None},
+        {'text': 'B', 'factsheet': None},
+    ]
+    assert detect_format('motions.md', 'x') == 'markdown'
+    assert detect_format(None, '[{"text": "x"}]') == 'json'
+
+
+@pytest.mark.parametrize('content, fmt', [
+    ('{"topics": 3}', 'json'),
+    ('not json', 'json'),
+    ('[{"factsheet": "no text"}]', 'json'),
+    ('text\n' + 'x' * 241 + '\n', 'csv'),
+    ('', 'csv'),
+])
+def test_parse_rejects_invalid_input(content, fmt):
+    with pytest.raises(TopicImportError):
+        parse_topics(content, fmt)
+
+
+def test_import_inserts_in_one_statement_and_emits_once(client, emits):
+    debate = setup_admin_and_debate(client)
+    db.session.add(Topic(debate_id=debate.id, text='Existing'))
+    db.session.commit()
+    lines = ['text,factsheet', 'existing,dup'] + [f'Topic {i},Facts {i}' for i in range(50)]
+    upload = (io.BytesIO('\n'.join(lines).encode()), 'motions.csv')
+
+    with count_queries() as statements:
+        resp = client.post(f'/admin/{debate.id}/import_topics',
+                           data={'file': upload, 'save_to_library': '1'},
+                           content_type='multipart/form-data')
+    assert resp.status_code == 302
+    topic_inserts = [s for s in statements if s.startswith('INSERT INTO topic')]
+    assert len(topic_inserts) == 1
+    assert Topic.query.filter_by(debate_id=debate.id).count() == 51
+    assert LibraryTopic.query.count() == 50
+
+    assert [e for e, _ in emits] == ['topic_list_update']
+    payload = emits[0][1]
+    assert payload['debate_id'] == debate.id
+    assert len(payload['topics']) == 51
+    assert set(payload['topics'][1]) == {'id', 'text', 'factsheet_hash'}
+
+
+def test_invalid_import_changes_nothing(client, emits):
+    debate = setup_admin_and_debate(client)
+    resp = client.post(f'/admin/{debate.id}/import_topics',
+                       json={'content': '[{"text": ""}]', 'format': 'json'})
+    assert resp.status_code == 400
+    assert resp.get_json()['success'] is False
+    assert Topic.query.count() == 0
+    assert emits == []
+
+
+def test_library_topics_are_copied_with_factsheets(client, emits):
+    debate = setup_admin_and_debate(client)
+    other = Debate(title='Next week', style='OPD')
+    lib = LibraryTopic(text='Reusable', factsheet='long factsheet ' * 500)
+    db.session.add_all([other, lib])
+    db.session.commit()
+
+    for target in (debate, other, other):
+        resp = client.post(f'/admin/{target.id}/import_topics', json={'library_ids': [lib.id]})
+        assert resp.status_code == 200
+
+    assert resp.get_json()['imported'] == 0  # already in the debate
+    copies = Topic.query.filter_by(text='Reusable').all()
+    assert sorted(t.debate_id for t in copies) == sorted([debate.id, other.id])
+    assert all(t.factsheet == lib.factsheet for t in copies)
+    assert all(t.factsheet_hash == lib.factsheet_hash is not None for t in copies)
+    assert len(emits) == 2
@@ -0,0 +1,159 @@
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.logic import draw, lifecycle
+from app.models import (
+    BpRank,
+    Debate,
+    DrawPosition,
+    SpeakerSlot,
+    Tournament,
+    TournamentAdjudicator,
+    TournamentTeam,
+    User,
+)
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_power_pairing_keeps_brackets_and_rotates_positions():
+    rng = random.Random(3)
+    table = {i: draw.Standing(i, 0, 0.0, (0, 0, 0, 0)) for i in range(100)}
+    for _ in range(4):
+        started = time.perf_counter()
+        rooms = draw.draw_round([(table[i], False) for i in table], rng)
+        assert time.perf_counter() - started < 1.0
+        assert sorted(t for room in rooms for t in room) == list(range(100))
+        # no team in a room above a team with more points
+        for upper, lower in zip(rooms, rooms[1:]):
+            assert min(table[t].points for t in upper) >= max(table[t].points for t in lower)
+        for room in rooms:
+            order = list(room)
+            rng.shuffle(order)
+            for rank, team_id in enumerate(order, start=1):
+                standing = table[team_id]
+                positions = list(standing.positions)
+                positions[room.index(team_id)] += 1
+                table[team_id] = standing._replace(
+                    points=standing.points + draw.TEAM_POINTS[rank], positions=tuple(positions)
+                )
+    assert max(max(s.positions) for s in table.values()) <= 2
+
+
+def tournament_with_teams(n, judges=('Chair', 'Chair', 'Wing')):
+    tournament = Tournament(title='Open', rounds=3)
+    for i in range(n):
+        a = User(first_name=f'A{i}', email=f'a{i}@example.com', password='pw')
+        b = User(first_name=f'B{i}', email=f'b{i}@example.com', password='pw')
+        db.session.add_all([a, b])
+        db.session.flush()
+        tournament.teams.append(TournamentTeam(name=f'Team {i}', speaker_1_id=a.id, speaker_2_id=b.id))
+    for i, skill in enumerate(judges):
+        judge = User(first_name=f'J{i}', email=f'j{i}@example.com', password='pw', judge_skill=skill)
+        db.session.add(judge)
+        db.session.flush()
+        tournament.adjudicators.append(TournamentAdjudicator(user_id=judge.id))
+    db.session.add(tournament)
+    db.session.commit()
+    return tournament
+
+
+def test_rounds_are_drawn_from_the_results(app):
+    tournament = tournament_with_teams(8)
+    number, debates = draw.generate_round(tournament)
+    db.session.commit()
+    assert number == 1 and len(debates) == 2
+    assert DrawPosition.query.count() == 8
+    for debate in debates:
+        assert (debate.style, debate.state, debate.active) == ('BP', lifecycle.ASSIGNED, True)
+        roles = [s.role for s in SpeakerSlot.query.filter_by(debate_id=debate.id)]
+        assert roles.count('Judge-Chair') == 1
+    # 16 speakers and 3 judges
+    assert SpeakerSlot.query.count() == 19
+
+    with pytest.raises(draw.DrawError):
+        draw.generate_round(tournament)
+
+    for debate in debates:
+        for position, rank in zip(draw.POSITIONS, (1, 2, 3, 4)):
+            db.session.add(BpRank(debate_id=debate.id, team=position, rank=rank))
+        lifecycle.transition(debate, lifecycle.FINALIZED)
+    db.session.commit()
+
+    table = draw.standings(tournament)
+    assert sorted(s.points for s in table.values()) == [0, 0, 1, 1, 2, 2, 3, 3]
+    winners = {p.team_id for p in DrawPosition.query.filter_by(position='OG')}
+    assert {t.id for t in draw.ranking(tournament)[:2]} == winners
+
+    number, debates = draw.generate_round(tournament)
+    db.session.commit()
+    top_room = DrawPosition.query.filter_by(round=2, room=1).all()
+    assert sorted(table[p.team_id].points for p in top_room) == [2, 2, 3, 3]
+    # everybody changes position: last round's OG teams are not OG again
+    assert winners.isdisjoint(p.team_id for p in top_room if p.position == 'OG')
+
+
+def test_swing_teams_fill_the_last_room(app):
+    tournament = tournament_with_teams(6)
+    assert draw.add_swing_teams(tournament) == 2
+    db.session.commit()
+    swings = {t.id for t in tournament.teams if t.swing}
+    assert [t.name for t in tournament.teams if t.swing] == ['Swing 1', 'Swing 2']
+    assert swings.isdisjoint(t.id for t in draw.ranking(tournament))
+
+    table = draw.standings(tournament)
+    # swings are drawn below teams with fewer points
+    table = {tid: s._replace(points=0 if tid in swings else 1) for tid, s in table.items()}
+    rooms = draw.draw_round([(table[t.id], t.swing) for t in tournament.teams])
+    assert swings <= set(rooms[-1])
+
+
+def test_admin_builds_a_tournament(app):
+    admin = User(first_name='Admin', email='admin@example.com', password='pw', is_admin=True)
+    speaker = User(first_name='Sam', email='sam@example.com', password='pw')
+    db.session.add_all([admin, speaker])
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+    response = client.post('/admin/tournaments', data={'title': 'Open', 'rounds': '5'})
+    tournament = Tournament.query.one()
+    assert response.headers['Location'].endswith(f'/admin/tournaments/{tournament.id}')
+
+    client.post(f'/admin/tournaments/{tournament.id}/teams',
+                data={'name': 'Sams', 'speaker_1': 'SAM@example.com'})
+    client.post(f'/admin/tournaments/{tournament.id}/teams',
+                data={'name': 'Ghosts', 'speaker_1': 'nobody@example.com'})
+    client.post(f'/admin/tournaments/{tournament.id}/adjudicators', data={'email': 'admin@example.com'})
+    assert [(t.name, t.speaker_1_id) for t in tournament.teams] == [('Sams', speaker.id)]
+    assert [a.user_id for a in tournament.adjudicators] == [admin.id]
+
+    client.post(f'/admin/tournaments/{tournament.id}/draw')
+    assert Debate.query.count() == 0
+    page = client.get(f'/admin/tournaments/{tournament.id}').get_data(as_text=True)
+    assert 'Sams' in page and 'needs at least four teams' in page
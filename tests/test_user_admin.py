@@ -0,0 +1,143 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+
+from app import create_app, db
+from app.models import PendingUser, User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    g.pop('_login_user', None)
+
+
+@pytest.fixture
+def admin(client):
+    admin = User(first_name='Ada', last_name='Admin', email='ada@example.com',
+                 password='pw', is_admin=True, date_joined_choice='first')
+    db.session.add(admin)
+    db.session.commit()
+    login(client, admin)
+    return admin
+
+
+def add_users(names, **kwargs):
+    users = [
+        User(first_name=first, last_name=last, email=f'{first}.{last}@example.com'.lower(),
+             password='pw', **kwargs)
+        for first, last in names
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def test_keyset_pages_cover_every_user_once(client, admin):
+    add_users([(f'Member{i:02d}', 'Test') for i in range(25)])
+
+    seen, after = [], None
+    while True:
+        query = {'per_page': 10}
+        if after:
+            query['after'] = after
+        data = client.get('/admin/api/users', query_string=query).get_json()
+        seen.extend(u['first_name'] for u in data['users'])
+        after = data['next_cursor']
+        if not after:
+            break
+
+    assert len(seen) == 26
+    assert seen == sorted(seen, key=str.lower)
+
+
+@pytest.mark.parametrize('per_page, expected', [(0, 6), (-3, 1), ('x', 6), (1000, 6)])
+def test_page_size_is_clamped(client, admin, per_page, expected):
+    add_users([(f'Member{i}', 'Test') for i in range(5)])
+    response = client.get('/admin/api/users', query_string={'per_page': per_page})
+    assert response.status_code == 200
+    assert len(response.get_json()['users']) == expected
+
+
+def test_filters_by_prefix_skill_admin_and_activity(client, admin):
+    old, recent, _ = add_users(
+        [('Maria', 'Muster'), ('Mario', 'Rossi'), ('Tom', 'Maier')],
+        judge_skill='Wing',
+    )
+    old.last_seen = datetime.utcnow() - timedelta(days=60)
+    recent.judge_skill = 'Chair'
+    db.session.commit()
+
+    def names(**query):
+        users = client.get('/admin/api/users', query_string=query).get_json()['users']
+        return sorted(u['first_name'] for u in users)
+
+    assert names(q='MAR') == ['Maria', 'Mario']
+    assert names(q='mai') == ['Tom']
+    assert names(q='maria mu') == ['Maria']
+    assert names(q='tom.maier@') == ['Tom']
+    assert names(judge_skill='Wing') == ['Maria', 'Tom']
+    assert names(q='mar', seen_within=30) == ['Mario']
+    assert names(admin='1') == ['Ada']
+
+
+def test_bulk_edit_updates_all_selected_users(client, admin):
+    users = add_users([(f'Judge{i}', 'Test') for i in range(30)], judge_skill='Newbie')
+    ids = [u.id for u in users]
+
+    resp = client.post('/admin/users/bulk_edit', json={'user_ids': ids, 'judge_skill': 'Wing'})
+    assert resp.get_json() == {'success': True, 'updated': 30}
+    assert User.query.filter_by(judge_skill='Wing').count() == 30
+
+    resp = client.post('/admin/users/bulk_edit', data={
+        'user_ids': [str(ids[0]), str(ids[1])], 'debate_skill': 'Advanced',
+    })
+    assert resp.status_code == 302
+    assert User.query.filter_by(debate_skill='Advanced').count() == 2
+
+    resp = client.post('/admin/users/bulk_edit', json={'user_ids': ids, 'judge_skill': 'Emperor'})
+    assert resp.status_code == 400
+
+
+def test_users_page_and_pending_list_paginate(client, admin):
+    add_users([(f'Member{i:02d}', 'Test') for i in range(60)])
+    db.session.add_all(
+        PendingUser(first_name=f'Pending{i}', email=f'p{i}@example.com', password='pw')
+        for i in range(55)
+    )
+    db.session.commit()
+
+    page = client.get('/admin/users').get_data(as_text=True)
+    assert page.count('name="user_ids"') == 50
+    assert 'Next page' in page
+
+    pending = client.get('/admin/pending_users').get_data(as_text=True)
+    assert pending.count('Confirm</button>') == 50
+    assert '1 / 2' in pending
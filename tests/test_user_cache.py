@@ -0,0 +1,128 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import g
+from sqlalchemy import event, text
+
+from app import create_app, db
+from app.models import User, Debate
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SERVER_NAME='example.com',
+        WTF_CSRF_ENABLED=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    # requests share the fixture's app context, drop Flask-Login's per-context user
+    g.pop('_login_user', None)
+
+
+def create_user(idx, **kwargs):
+    user = User(
+        first_name=f'User{idx}',
+        last_name='Test',
+        email=f'user{idx}@example.com',
+        password='pw',
+        date_joined_choice='first',
+        **kwargs,
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def user_selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith('SELECT') and 'FROM user' in s]
+
+
+@pytest.fixture
+def statements(app):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield captured
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_polling_endpoint_skips_user_select_when_cached(client, statements):
+    user = create_user(1)
+    debate = Debate(title='Debate', style='OPD', active=True)
+    db.session.add(debate)
+    db.session.commit()
+    login(client, user)
+
+    client.get(f'/debate/{debate.id}/vote_status_json')
+    login(client, user)
+    statements.clear()
+    resp = client.get(f'/debate/{debate.id}/vote_status_json')
+
+    assert resp.status_code == 200
+    assert user_selects(statements) == []
+    assert not any(s.lstrip().upper().startswith('UPDATE') for s in statements)
+
+
+def test_admin_edit_invalidates_cached_identity(client):
+    admin = create_user(1, is_admin=True)
+    member = create_user(2, judge_skill='Newbie')
+
+    login(client, member)
+    client.get('/profile')
+
+    login(client, admin)
+    resp = client.post(f'/admin/users/{member.id}/edit', data={'judge_skill': 'Wing'})
+    assert resp.status_code == 302
+
+    resp = client.post(f'/admin/users/{admin.id}/toggle_admin')
+    assert resp.status_code == 302
+
+    login(client, member)
+    client.get('/profile')
+    assert g._login_user.judge_skill == 'Wing'
+
+    # the admin revoked their own rights and must be locked out right away
+    login(client, admin)
+    resp = client.get('/admin')
+    assert resp.status_code == 302
+    assert '/admin' not in resp.headers['Location']
+
+
+def test_demotion_by_another_worker_applies_at_once(client):
+    admin = create_user(1, is_admin=True)
+    login(client, admin)
+    assert client.get('/admin').status_code == 200
+
+    # another process demotes the admin; this one never sees the flush
+    db.session.execute(text('UPDATE user SET is_admin = 0 WHERE id = :id'), {'id': admin.id})
+    db.session.commit()
+    db.session.expire_all()
+
+    login(client, admin)
+    resp = client.get('/admin')
+    assert resp.status_code == 302
+    assert '/admin' not in resp.headers['Location']